@@ -0,0 +1,68 @@
+"""
+Benchmark HashRing dibanding indeks modulo untuk pemetaan player_id ke backend.
+
+Mengukur biaya satu lookup dan persentase pemain yang pindah backend saat
+jumlah backend bertambah atau berkurang satu.
+
+    python bench_hash_ring.py [--players 100000] [--servers 4] [--vnodes 100]
+"""
+
+import argparse
+import time
+import zlib
+
+from hash_ring import HashRing
+
+
+def modulo_lookup(servers):
+    return lambda player_id: servers[zlib.crc32(player_id.encode()) % len(servers)]
+
+
+def measure_lookup(name, lookup, players):
+    start = time.perf_counter()
+    for player_id in players:
+        lookup(player_id)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<10} {elapsed / len(players) * 1e9:>8,.0f} ns/lookup")
+
+
+def remap_fraction(before, after, players):
+    moved = sum(1 for player_id in players if before(player_id) != after(player_id))
+    return moved / len(players)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark consistent-hash ring')
+    parser.add_argument('--players', type=int, default=100000, help='Jumlah player_id (default: 100000)')
+    parser.add_argument('--servers', type=int, default=4, help='Jumlah backend awal (default: 4)')
+    parser.add_argument('--vnodes', type=int, default=100, help='Virtual node per backend (default: 100)')
+    args = parser.parse_args()
+
+    players = [f"player{i}" for i in range(args.players)]
+    servers = [('127.0.0.1', 8889 + i) for i in range(args.servers + 1)]
+    current = servers[:args.servers]
+    grown = servers
+    shrunk = current[:-1]
+
+    ring = HashRing(current, args.vnodes)
+    print(f"{args.players} pemain, {args.servers} backend, {args.vnodes} vnode")
+    print("Lookup:")
+    measure_lookup('modulo', modulo_lookup(current), players)
+    measure_lookup('ring', ring.lookup, players)
+
+    print(f"Pemain yang pindah (ideal ring: {1 / (args.servers + 1):.1%} saat tambah, {1 / args.servers:.1%} saat kurang):")
+    for label, target in ((f"{args.servers} -> {len(grown)}", grown), (f"{args.servers} -> {len(shrunk)}", shrunk)):
+        modulo = remap_fraction(modulo_lookup(current), modulo_lookup(target), players)
+        ring_fraction = remap_fraction(ring.lookup, HashRing(target, args.vnodes).lookup, players)
+        print(f"  {label:<8} modulo {modulo:>6.1%}   ring {ring_fraction:>6.1%}")
+
+    counts = {}
+    for player_id in players:
+        server = ring.lookup(player_id)
+        counts[server] = counts.get(server, 0) + 1
+    share = [count / args.players for count in counts.values()]
+    print(f"Sebaran ring: min {min(share):.1%}, max {max(share):.1%} (rata-rata {1 / args.servers:.1%})")
+
+
+if __name__ == '__main__':
+    main()
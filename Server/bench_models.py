@@ -0,0 +1,108 @@
+"""
+Benchmark throughput model pemrosesan server_thread_http.py.
+
+Setiap model dijalankan sebagai process terpisah, lalu beberapa client thread
+mengirim perintah game selama beberapa detik. Model thread menutup koneksi
+setelah satu request sehingga client connect ulang, model asyncio memakai
+koneksi persistent (satu baris JSON per perintah).
+
+    python bench_models.py --models thread asyncio --clients 50 --seconds 5
+"""
+
+import argparse
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+PERSISTENT_MODELS = ('asyncio',)
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def client_loop(port, persistent, command, deadline, counts, index):
+    sock = None
+    done = 0
+    while time.time() < deadline:
+        try:
+            if sock is None:
+                sock = socket.create_connection(('127.0.0.1', port), timeout=5.0)
+            sock.sendall(command)
+            response = b""
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                response += data
+                if persistent and response.endswith(b"\r\n"):
+                    break
+            if not persistent:
+                sock.close()
+                sock = None
+            if response:
+                done += 1
+        except OSError:
+            if sock:
+                sock.close()
+            sock = None
+    if sock:
+        sock.close()
+    counts[index] = done
+
+
+def bench(model, port, clients, seconds):
+    server = subprocess.Popen(
+        [sys.executable, 'server_thread_http.py', '--model', model, '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_port(port):
+            print(f"{model:<12} server tidak bisa dijalankan")
+            return
+        # Pemain yang dibaca oleh benchmark
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'set_player_state 1 {"position": [100, 200], "health": 100}\r\n')
+        sock.recv(4096)
+        sock.close()
+
+        persistent = model in PERSISTENT_MODELS
+        counts = [0] * clients
+        deadline = time.time() + seconds
+        threads = [threading.Thread(target=client_loop, args=(port, persistent, b"get_player_state 1\r\n", deadline, counts, i))
+                   for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = sum(counts)
+        print(f"{model:<12} {total:>8} request  {total / seconds:>10,.0f} request/s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model pemrosesan server')
+    parser.add_argument('--models', nargs='+', default=['thread', 'asyncio'],
+                        help='Model yang dibandingkan (default: thread asyncio)')
+    parser.add_argument('--clients', type=int, default=50, help='Jumlah client bersamaan (default: 50)')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Durasi setiap model (default: 5)')
+    parser.add_argument('--port', type=int, default=8989, help='Port server benchmark (default: 8989)')
+    args = parser.parse_args()
+
+    print(f"{args.clients} client, {args.seconds:g} detik per model")
+    for i, model in enumerate(args.models):
+        bench(model, args.port + i, args.clients, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
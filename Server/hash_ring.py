@@ -0,0 +1,66 @@
+import bisect
+import hashlib
+
+
+def _hash(key):
+	# 64 bit pertama md5: tersebar merata dan sama di semua process (tidak seperti hash())
+	return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+	"""
+	Consistent-hash ring dengan virtual node untuk memetakan player_id ke backend.
+	Setiap backend ditaruh di `vnodes` titik pada ring, player_id dipetakan ke titik
+	backend pertama searah jarum jam. Menambah atau menghapus satu backend dari N
+	hanya memindahkan sekitar 1/N pemain, bukan semuanya seperti indeks modulo.
+	"""
+	def __init__(self, servers=(), vnodes=100):
+		self.vnodes = vnodes
+		self.points = []  # hash titik, terurut
+		self.owners = []  # backend untuk titik dengan indeks yang sama
+		self.servers = set()
+		for server in servers:
+			self.add(server)
+
+	def _points_of(self, server):
+		host, port = server
+		return [_hash(f"{host}:{port}#{i}") for i in range(self.vnodes)]
+
+	def add(self, server):
+		if server in self.servers:
+			return
+		self.servers.add(server)
+		for point in self._points_of(server):
+			index = bisect.bisect(self.points, point)
+			self.points.insert(index, point)
+			self.owners.insert(index, server)
+
+	def remove(self, server):
+		if server not in self.servers:
+			return
+		self.servers.discard(server)
+		keep = [(p, o) for p, o in zip(self.points, self.owners) if o != server]
+		self.points = [p for p, _ in keep]
+		self.owners = [o for _, o in keep]
+
+	def lookup(self, key, accept=None):
+		"""
+		Backend untuk key. Jika accept diberikan (misal cek health), titik yang
+		backend-nya ditolak dilewati sehingga hanya pemain backend itu yang pindah.
+		"""
+		if not self.points:
+			return None
+		start = bisect.bisect(self.points, _hash(str(key))) % len(self.points)
+		if accept is None:
+			return self.owners[start]
+		tried = set()
+		for i in range(len(self.points)):
+			server = self.owners[(start + i) % len(self.points)]
+			if server in tried:
+				continue
+			if accept(server):
+				return server
+			tried.add(server)
+			if len(tried) == len(self.servers):
+				break
+		return None
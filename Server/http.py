@@ -6,62 +6,285 @@ import threading
 import time
 from glob import glob
 from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+from player_store import PlayerStore, RoomView
+
+HTTP_PREFIXES = ('GET', 'POST', 'HTTP')
+
+# Room untuk perintah tanpa room, player_id "<room_id>/<player_id>" memilih room lain
+DEFAULT_ROOM = 'default'
+
+def send_parts(sock, parts):
+	"""
+	Kirim beberapa buffer (header, isi file, ...) dengan satu sendmsg
+	(scatter/gather) tanpa menggabungkannya dulu, sehingga isi file yang besar
+	tidak disalin. Fallback ke sendall jika platform tidak punya sendmsg (Windows).
+	"""
+	if not hasattr(sock, 'sendmsg'):
+		sock.sendall(b"".join(parts))
+		return
+	views = [memoryview(part) for part in parts if part]
+	while views:
+		sent = sock.sendmsg(views)
+		#sendmsg bisa mengirim sebagian, lanjutkan dari byte yang belum terkirim
+		while views and sent >= len(views[0]):
+			sent -= len(views[0])
+			views.pop(0)
+		if views and sent:
+			views[0] = views[0][sent:]
+
+class ResponseBuilder:
+	"""
+	Header response yang statis (status line, Connection, Server dan header
+	tambahan seperti Content-type) disusun sekali per kombinasi lalu di-cache,
+	header Date diperbarui paling banyak sekali per detik.
+	"""
+	def __init__(self, server='myserver/1.0', max_cache=256):
+		self.server = server
+		self.max_cache = max_cache
+		self.blocks = {}
+		self.date = (None, b'')
+
+	def date_header(self):
+		now = int(time.time())
+		second, header = self.date
+		if second != now:
+			header = "Date: {}\r\n" . format(datetime.now().strftime('%c')).encode()
+			#tuple diganti sekaligus, aman dibaca thread lain tanpa lock
+			self.date = (now, header)
+		return header
+
+	def block(self, kode, message, headers):
+		key = (kode, message, tuple(headers.items()))
+		cached = self.blocks.get(key)
+		if cached is None:
+			status = "HTTP/1.0 {} {}\r\n" . format(kode, message).encode()
+			middle = "Connection: close\r\nServer: {}\r\nContent-Length: " . format(self.server)
+			tail = "\r\n" + "".join("{}:{}\r\n" . format(kk, headers[kk]) for kk in headers) + "\r\n"
+			cached = (status, middle.encode(), tail.encode())
+			if len(self.blocks) >= self.max_cache:
+				#header dinamis (misal location) jangan sampai membuat cache tumbuh terus
+				self.blocks.clear()
+			self.blocks[key] = cached
+		return cached
+
+	def build(self, kode, message, messagebody, headers):
+		"""Return [header, body], body tidak disalin"""
+		status, middle, tail = self.block(kode, message, headers)
+		head = b"".join((status, self.date_header(), middle, str(len(messagebody)).encode(), tail))
+		return [head, messagebody]
+
+class RequestParser:
+	"""
+	Parser request inkremental untuk satu koneksi, menerima request HTTP dan
+	perintah game satu baris (misal `get_players\\r\\n`).
+	Data dibaca dengan recv_into ke satu bytearray yang dipakai ulang, posisi
+	pencarian disimpan antar recv sehingga byte yang sudah diperiksa tidak
+	discan ulang, dan header setiap request hanya diparse sekali.
+	"""
+	LINE = 0  # menunggu akhir baris pertama
+	HEAD = 1  # request HTTP, menunggu \r\n\r\n akhir header
+	BODY = 2  # header sudah diparse, menunggu Content-Length byte body
+
+	def __init__(self, size=4096, max_header=65536, max_body=1 << 20):
+		self.buffer = bytearray(size)
+		self.view = memoryview(self.buffer)
+		self.max_header = max_header
+		self.max_body = max_body
+		self.start = 0  # awal request yang sedang diparse
+		self.end = 0    # akhir data valid di buffer
+		self.scan = 0   # posisi lanjutan pencarian \r\n atau \r\n\r\n
+		self.state = self.LINE
+		self.request = None
+		self.body_start = 0
+		self.content_length = 0
+
+	def recv_into(self, sock):
+		"""Baca dari socket langsung ke buffer, return jumlah byte (0 jika koneksi ditutup)"""
+		if self.end == len(self.buffer):
+			self._make_room()
+		n = sock.recv_into(self.view[self.end:])
+		self.end += n
+		return n
+
+	def feed(self, data):
+		"""Tambahkan data yang sudah diterima di luar recv_into"""
+		if len(self.buffer) - self.end < len(data):
+			self._make_room(len(data))
+		self.view[self.end:self.end + len(data)] = data
+		self.end += len(data)
+
+	def _make_room(self, needed=1):
+		# geser data yang belum diproses ke awal buffer, perbesar jika tetap kurang dari needed byte
+		pending = self.end - self.start
+		if self.start > 0:
+			self.view[:pending] = self.view[self.start:self.end]
+			self.scan -= self.start
+			self.body_start -= self.start
+			self.start = 0
+			self.end = pending
+		if len(self.buffer) - self.end < needed:
+			self.view.release()
+			self.buffer.extend(bytes(max(len(self.buffer), needed)))
+			self.view = memoryview(self.buffer)
+
+	def _find(self, separator):
+		position = self.buffer.find(separator, self.scan, self.end)
+		if position < 0:
+			if self.end - self.start > self.max_header:
+				raise ValueError("header terlalu besar")
+			#separator bisa terpotong di antara dua recv
+			self.scan = max(self.scan, self.end - len(separator) + 1)
+		return position
+
+	def _done(self, end):
+		self.start = self.scan = end
+		self.state = self.LINE
+		self.request = None
+		if self.start == self.end:
+			self.start = self.end = self.scan = 0
+
+	def next_request(self):
+		"""
+		Return (request_line, headers, body) untuk request berikutnya yang sudah
+		lengkap, atau None jika masih perlu data. body berupa bytes, perintah game
+		dikembalikan dengan headers kosong.
+		"""
+		if self.state == self.LINE:
+			#baris kosong sebelum request line diabaikan (RFC 7230 3.5)
+			while self.start < self.end and self.buffer[self.start] in b"\r\n":
+				self.start += 1
+			self.scan = max(self.scan, self.start)
+			line_end = self._find(b"\r\n")
+			if line_end < 0:
+				return None
+			request_line = self.view[self.start:line_end].tobytes().decode()
+			if not request_line.startswith(HTTP_PREFIXES):
+				self._done(line_end + 2)
+				return request_line, [], b''
+			self.scan = line_end
+			self.state = self.HEAD
+
+		if self.state == self.HEAD:
+			header_end = self._find(b"\r\n\r\n")
+			if header_end < 0:
+				return None
+			lines = self.view[self.start:header_end].tobytes().decode('latin-1').split("\r\n")
+			headers = [n for n in lines[1:] if n != '']
+			content_length = 0
+			for header in headers:
+				key, _, value = header.partition(':')
+				if key.strip().lower() == 'content-length':
+					content_length = int(value.strip())
+					break
+			if content_length < 0 or content_length > self.max_body:
+				raise ValueError("Content-Length tidak valid")
+			self.request = (lines[0], headers)
+			self.body_start = header_end + 4
+			self.content_length = content_length
+			self.state = self.BODY
+
+		body_end = self.body_start + self.content_length
+		if self.end < body_end:
+			return None
+		body = self.view[self.body_start:body_end].tobytes()
+		request_line, headers = self.request
+		self._done(body_end)
+		return request_line, headers, body
 
 class HttpServer:
-	def __init__(self):
+	def __init__(self, store=None, cleanup=True):
 		self.sessions={}
 		self.types={}
 		self.types['.pdf']='application/pdf'
 		self.types['.jpg']='image/jpeg'
 		self.types['.txt']='text/plain'
 		self.types['.html']='text/html'
+		self.responses = ResponseBuilder()
+		self.metrics = {}  # {nama: fungsi yang return dict statistik}, ditampilkan di GET /metrics
 		
-		# Game state management
-		self.game_players = {}  # {player_id: {state_data}}
-		self.player_lock = threading.Lock()
-		self.last_activity = {}  # {player_id: timestamp}
+		# Game state management per room. Setiap room punya PlayerStore (dan lock)
+		# sendiri sehingga update di room berbeda tidak saling menunggu, pembaca
+		# memakai snapshot copy-on-write tanpa lock sama sekali. Store bersama
+		# model pre-fork dibagi menjadi room lewat RoomView (lihat player_store.py)
+		self.shared_store = store
+		self.rooms = {}  # {room_id: store}
+		self.rooms_lock = threading.Lock()  # hanya untuk membuat dan menghapus room
+		self.store = self.room(DEFAULT_ROOM)
 		self.player_timeout = 30  # seconds
+		self.expiry_tick = 0.1  # pemain dihapus paling lambat ~100 ms setelah timeout
+		self.shared_expiry_interval = 5  # store bersama pre-fork hanya bisa dipindai penuh
 		
-		# Start cleanup thread
-		self.cleanup_thread = threading.Thread(target=self._cleanup_inactive_players, daemon=True)
-		self.cleanup_thread.start()
+		# Start cleanup thread, cukup satu per store bersama
+		self.cleanup_thread = None
+		if cleanup:
+			self.cleanup_thread = threading.Thread(target=self._cleanup_inactive_players, daemon=True)
+			self.cleanup_thread.start()
+
+	def room(self, room_id):
+		"""Store untuk room_id, room dibuat saat pertama kali dipakai"""
+		store = self.rooms.get(room_id)
+		if store is None:
+			with self.rooms_lock:
+				store = self.rooms.get(room_id)
+				if store is None:
+					store = PlayerStore() if self.shared_store is None else RoomView(self.shared_store, room_id)
+					self.rooms[room_id] = store
+		return store
+
+	def room_counts(self):
+		"""
+		{room_id: jumlah pemain}. Dengan store bersama (pre-fork) dihitung dari store
+		itu, bukan dari RoomView milik worker ini, sehingga semua worker menjawab sama.
+		"""
+		if self.shared_store is None:
+			return {name: room.count() for name, room in list(self.rooms.items())}
+		counts = {DEFAULT_ROOM: 0}
+		for key in self.shared_store.ids():
+			room_id = key.partition('/')[0]
+			counts[room_id] = counts.get(room_id, 0) + 1
+		return counts
+
+	def existing_room(self, room_id):
+		"""Store room_id untuk request baca, room tidak dibuat. None jika room belum ada"""
+		store = self.rooms.get(room_id)
+		if store is None and self.shared_store is not None:
+			# room bisa sudah dibuat worker lain, view sementara tidak didaftarkan
+			store = RoomView(self.shared_store, room_id)
+		return store
+
 	def response(self,kode=404,message='Not Found',messagebody=bytes(),headers={}):
-		tanggal = datetime.now().strftime('%c')
-		resp=[]
-		resp.append("HTTP/1.0 {} {}\r\n" . format(kode,message))
-		resp.append("Date: {}\r\n" . format(tanggal))
-		resp.append("Connection: close\r\n")
-		resp.append("Server: myserver/1.0\r\n")
-		resp.append("Content-Length: {}\r\n" . format(len(messagebody)))
-		for kk in headers:
-			resp.append("{}:{}\r\n" . format(kk,headers[kk]))
-		resp.append("\r\n")
-
-		response_headers=''
-		for i in resp:
-			response_headers="{}{}" . format(response_headers,i)
-		#menggabungkan resp menjadi satu string dan menggabungkan dengan messagebody yang berupa bytes
-		#response harus berupa bytes
+		#response adalah bytes
+		return b"".join(self.response_parts(kode,message,messagebody,headers))
+
+	def response_parts(self,kode=404,message='Not Found',messagebody=bytes(),headers={}):
+		#sama dengan response(), tapi return [header, body] untuk send_parts
 		#message body harus diubah dulu menjadi bytes
 		if (type(messagebody) is not bytes):
 			messagebody = messagebody.encode()
-
-		response = response_headers.encode() + messagebody
-		#response adalah bytes
-		return response
+		return self.responses.build(kode,message,messagebody,headers)
 
 	def proses(self,data):
-		
-		requests = data.split("\r\n")
+		#data berupa satu request lengkap dalam bentuk string
+		head, _, body = data.partition("\r\n\r\n")
+		requests = head.split("\r\n")
 		#print(requests)
 
 		baris = requests[0]
 		#print(baris)
 
 		all_headers = [n for n in requests[1:] if n!='']
+		hasil = self.proses_request(baris, all_headers, body.encode())
+		if isinstance(hasil, list):
+			return b"".join(hasil)
+		return hasil
+
+	def proses_request(self, baris, all_headers, body):
+		#request yang sudah diparse RequestParser, body berupa bytes
+		#return bytes, atau list [header, isi file] untuk send_parts
 
 		# Check if this is a game command (not HTTP)
-		if not baris.startswith('HTTP') and not baris.startswith('GET') and not baris.startswith('POST'):
+		if not baris.startswith(HTTP_PREFIXES):
 			return self._handle_game_command(baris)
 
 		j = baris.split(" ")
@@ -80,10 +303,10 @@ class HttpServer:
 	
 	def _handle_game_command(self, command_line):
 		"""Handle game-specific commands"""
-		command, player_id, data = self._parse_command(command_line)
+		command, room_id, player_id, data = self._parse_command(command_line)
 		
 		if command == "get_players":
-			players = self.get_all_players()
+			players = self.get_all_players(room_id)
 			result = {
 				"status": "OK",
 				"players": players
@@ -91,7 +314,7 @@ class HttpServer:
 			return json.dumps(result).encode()
 		
 		elif command == "get_player_state" and player_id:
-			state = self.get_player_state(player_id)
+			state = self.get_player_state(player_id, room_id)
 			if state is not None:
 				result = {
 					"status": "OK",
@@ -105,15 +328,20 @@ class HttpServer:
 			return json.dumps(result).encode()
 		
 		elif command == "set_player_state" and player_id and data:
-			self.set_player_state(player_id, data)
-			result = {
-				"status": "OK",
-				"message": "State updated"
-			}
+			if self.set_player_state(player_id, data, room_id):
+				result = {
+					"status": "OK",
+					"message": "State updated"
+				}
+			else:
+				result = {
+					"status": "ERROR",
+					"message": "Player table full"
+				}
 			return json.dumps(result).encode()
 		
 		elif command == "remove_player" and player_id:
-			self.remove_player(player_id)
+			self.remove_player(player_id, room_id)
 			result = {
 				"status": "OK",
 				"message": "Player removed"
@@ -133,11 +361,18 @@ class HttpServer:
 		if (object_address == '/'):
 			return self.response(200,'OK','Knight Multiplayer Game Server - Ready!',dict())
 
-		if (object_address == '/status'):
+		parsed_url = urlparse(object_address)
+		if (parsed_url.path == '/status'):
+			# ?room=<room_id>, tanpa parameter memakai room default
+			room_id = parse_qs(parsed_url.query).get('room', [DEFAULT_ROOM])[0]
+			store = self.existing_room(room_id)
+			players = [] if store is None else store.ids()
 			status_info = {
 				"server": "Knight Game Server",
-				"active_players": len(self.game_players),
-				"players": list(self.game_players.keys()),
+				"room": room_id,
+				"active_players": len(players),
+				"players": players,
+				"rooms": self.room_counts(),
 				"timestamp": datetime.now().isoformat()
 			}
 			return self.response(200,'OK', json.dumps(status_info), {'Content-Type': 'application/json'})
@@ -145,6 +380,17 @@ class HttpServer:
 		if (object_address == '/health'):
 			return self.response(200,'OK','Server is healthy',dict())
 
+		if (object_address == '/metrics'):
+			counts = self.room_counts()
+			metrics = {
+				"active_players": sum(counts.values()),
+				"rooms": len(counts),
+				"timestamp": datetime.now().isoformat()
+			}
+			for name, source in list(self.metrics.items()):
+				metrics[name] = source()
+			return self.response(200,'OK', json.dumps(metrics), {'Content-Type': 'application/json'})
+
 		if (object_address == '/video'):
 			return self.response(302,'Found','',dict(location='https://youtu.be/katoxpnTf04'))
 		if (object_address == '/santai'):
@@ -163,79 +409,89 @@ class HttpServer:
 		headers={}
 		headers['Content-type']=content_type
 		
-		return self.response(200,'OK',isi,headers)
+		#isi file dikirim apa adanya lewat send_parts, tanpa digabung dengan header
+		return self.response_parts(200,'OK',isi,headers)
 	def http_post(self,object_address,headers):
 		headers ={}
 		isi = "kosong"
 		return self.response(200,'OK',isi,headers)
 		
 	def _cleanup_inactive_players(self):
-		"""Background thread to remove inactive players"""
+		"""
+		Background thread to remove inactive players. Setiap expiry_tick detik
+		setiap room hanya memeriksa heap deadline-nya (PlayerStore.expire), jadi
+		tidak ada pemindaian seluruh tabel yang membuat request menunggu.
+		"""
+		next_shared = time.monotonic()
 		while True:
 			try:
-				current_time = time.time()
-				with self.player_lock:
-					inactive_players = []
-					for player_id, last_time in self.last_activity.items():
-						if current_time - last_time > self.player_timeout:
-							inactive_players.append(player_id)
-					
-					for player_id in inactive_players:
-						if player_id in self.game_players:
-							del self.game_players[player_id]
-						if player_id in self.last_activity:
-							del self.last_activity[player_id]
-				
-				time.sleep(5)  # Check every 5 seconds
+				if self.shared_store is not None and time.monotonic() >= next_shared:
+					self.shared_store.expire(self.player_timeout)
+					next_shared = time.monotonic() + self.shared_expiry_interval
+				# setiap room dibersihkan dengan lock-nya sendiri, room kosong dihapus.
+				# retire() menolak set() berikutnya pada store itu, penulis yang masih
+				# memegangnya mengulang ke room yang dibuat ulang (set_player_state)
+				for room_id, store in list(self.rooms.items()):
+					store.expire(self.player_timeout)
+					if room_id != DEFAULT_ROOM and store.count() == 0:
+						with self.rooms_lock:
+							if self.rooms.get(room_id) is store and store.retire():
+								del self.rooms[room_id]
+				time.sleep(self.expiry_tick)
 			except Exception as e:
 				print(f"Cleanup thread error: {e}")
 				time.sleep(5)
 
-	def get_all_players(self):
+	def get_all_players(self, room_id=DEFAULT_ROOM):
 		"""Get list of all active player IDs"""
-		with self.player_lock:
-			return list(self.game_players.keys())
+		store = self.existing_room(room_id)
+		return [] if store is None else store.ids()
 
-	def get_player_state(self, player_id):
+	def get_player_state(self, player_id, room_id=DEFAULT_ROOM):
 		"""Get state of specific player"""
-		with self.player_lock:
-			return self.game_players.get(player_id, None)
+		store = self.existing_room(room_id)
+		return None if store is None else store.get(player_id)
 
-	def set_player_state(self, player_id, state):
-		"""Set state of specific player"""
-		with self.player_lock:
-			self.game_players[player_id] = state
-			self.last_activity[player_id] = time.time()
+	def set_player_state(self, player_id, state, room_id=DEFAULT_ROOM):
+		"""Set state of specific player, False jika store tidak bisa menyimpannya"""
+		while True:
+			result = self.room(room_id).set(player_id, state)
+			if result is not None:
+				return result
+			# store baru saja dihapus cleanup sebagai room kosong, tulis ke room baru
 
-	def remove_player(self, player_id):
+	def remove_player(self, player_id, room_id=DEFAULT_ROOM):
 		"""Remove player from game"""
-		with self.player_lock:
-			if player_id in self.game_players:
-				del self.game_players[player_id]
-			if player_id in self.last_activity:
-				del self.last_activity[player_id]
+		store = self.existing_room(room_id)
+		if store is not None:
+			store.remove(player_id)
 
 	def _parse_command(self, command_line):
-		"""Parse game command from request line"""
+		"""
+		Parse game command from request line, return (command, room_id, player_id, data).
+		player_id boleh ditulis "<room_id>/<player_id>", get_players menerima room_id opsional.
+		"""
 		parts = command_line.strip().split(' ', 2)
-		if len(parts) < 2:
-			return None, None, None
-		
 		command = parts[0]
 		if command == "get_players":
-			return "get_players", None, None
-		elif command == "get_player_state" and len(parts) >= 2:
-			return "get_player_state", parts[1], None
+			return "get_players", parts[1] if len(parts) >= 2 else DEFAULT_ROOM, None, None
+		if len(parts) < 2:
+			return None, None, None, None
+		
+		room_id, _, player_id = parts[1].rpartition('/')
+		room_id = room_id or DEFAULT_ROOM
+		if command == "get_player_state":
+			return "get_player_state", room_id, player_id, None
 		elif command == "set_player_state" and len(parts) >= 3:
 			try:
 				state_data = json.loads(parts[2])
-				return "set_player_state", parts[1], state_data
+				return "set_player_state", room_id, player_id, state_data
 			except json.JSONDecodeError:
-				return None, None, None
-		elif command == "remove_player" and len(parts) >= 2:
-			return "remove_player", parts[1], None
+				return None, None, None, None
+		elif command == "remove_player":
+			return "remove_player", room_id, player_id, None
 		
-		return None, None, None
+		return None, None, None, None
 #>>> import os.path
 #>>> ext = os.path.splitext('/ak/52.png')
 
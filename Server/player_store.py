@@ -0,0 +1,493 @@
+import heapq
+import multiprocessing
+import struct
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+
+
+class PlayerStore:
+	"""
+	Tabel pemain satu room (state + waktu aktivitas terakhir) di process ini.
+
+	Tabel diterbitkan sebagai snapshot copy-on-write: self.table berisi
+	{player_id: (state, last_seen)} dan tidak pernah diubah lagi setelah
+	diterbitkan. Penulis (diserialkan dengan self.lock) menyalin tabel, mengubah
+	salinannya lalu mengganti referensi self.table dalam satu assignment.
+	Pembaca cukup mengambil self.table sekali tanpa lock, sehingga tidak pernah
+	menunggu penulis maupun cleanup.
+
+	Pemain tidak aktif dicari lewat min-heap (last_seen, player_id) dengan satu
+	entri per pemain. set() tidak menyentuh heap jika pemain sudah terjadwal,
+	entri yang jatuh tempo dijadwalkan ulang dari last_seen terbaru jika pemain
+	ternyata masih aktif (lazy deletion), jadi expire() hanya memeriksa entri
+	yang sudah jatuh tempo dan tidak pernah memindai seluruh tabel.
+	"""
+	def __init__(self):
+		self.table = {}
+		self.lock = threading.Lock()  # hanya antar penulis
+		self.deadlines = []    # heap (last_seen saat dijadwalkan, player_id)
+		self.scheduled = set()  # player_id yang punya entri di heap
+		self.retired = False    # room sudah dihapus, set() ditolak
+
+	def snapshot(self):
+		"""Tabel versi saat ini, {player_id: (state, last_seen)}, jangan diubah"""
+		return self.table
+
+	def ids(self):
+		return list(self.table)
+
+	def count(self):
+		return len(self.table)
+
+	def get(self, player_id):
+		entry = self.table.get(player_id)
+		return None if entry is None else entry[0]
+
+	def set(self, player_id, state):
+		"""Return None jika store sudah di-retire, pemanggil menulis ke store room yang baru"""
+		entry = (state, time.time())
+		with self.lock:
+			if self.retired:
+				return None
+			table = dict(self.table)
+			table[player_id] = entry
+			self.table = table
+			if player_id not in self.scheduled:
+				self.scheduled.add(player_id)
+				heapq.heappush(self.deadlines, (entry[1], player_id))
+		return True
+
+	def remove(self, player_id):
+		with self.lock:
+			if player_id not in self.table:
+				return
+			table = dict(self.table)
+			del table[player_id]
+			self.table = table
+
+	def retire(self):
+		"""Tandai store kosong sebagai tidak dipakai lagi, return False jika masih ada pemain"""
+		with self.lock:
+			if self.table:
+				return False
+			self.retired = True
+			return True
+
+	def expire(self, timeout):
+		"""
+		Hapus pemain yang tidak aktif lebih dari timeout detik, return ID yang dihapus.
+		Biaya sebanding dengan jumlah entri heap yang jatuh tempo, bukan jumlah pemain.
+		"""
+		now = time.time()
+		deadlines = self.deadlines
+		if not deadlines or deadlines[0][0] + timeout > now:
+			return []  # jalur umum: tidak ada yang jatuh tempo, tanpa lock
+		removed = []
+		with self.lock:
+			table = self.table
+			while self.deadlines and self.deadlines[0][0] + timeout <= now:
+				_, player_id = heapq.heappop(self.deadlines)
+				entry = table.get(player_id)
+				if entry is None:
+					# sudah di-remove, entrinya baru dibuang sekarang
+					self.scheduled.discard(player_id)
+				elif entry[1] + timeout <= now:
+					if table is self.table:
+						table = dict(table)
+					del table[player_id]
+					self.scheduled.discard(player_id)
+					removed.append(player_id)
+				else:
+					# masih aktif sejak dijadwalkan, jadwalkan ulang dari aktivitas terakhir
+					heapq.heappush(self.deadlines, (entry[1], player_id))
+			self.table = table
+		return removed
+
+
+class ManagerPlayerStore:
+	"""
+	Tabel pemain bersama untuk model pre-fork dari shared_player_store(): dict dan
+	Lock proxy dari multiprocessing.Manager, sehingga state pemain sama di semua
+	process. Interface-nya sama dengan PlayerStore.
+	"""
+	def __init__(self, players, activity, lock):
+		self.players = players    # {player_id: state}
+		self.activity = activity  # {player_id: timestamp}
+		self.lock = lock
+
+	def ids(self):
+		return list(self.players.keys())
+
+	def count(self):
+		return len(self.players)
+
+	def get(self, player_id):
+		return self.players.get(player_id, None)
+
+	def set(self, player_id, state):
+		with self.lock:
+			self.players[player_id] = state
+			self.activity[player_id] = time.time()
+		return True
+
+	def remove(self, player_id):
+		with self.lock:
+			self.players.pop(player_id, None)
+			self.activity.pop(player_id, None)
+
+	def expire(self, timeout):
+		"""Hapus pemain yang tidak aktif lebih dari timeout detik, return ID yang dihapus"""
+		now = time.time()
+		with self.lock:
+			inactive = [player_id for player_id, last_time in self.activity.items() if now - last_time > timeout]
+			for player_id in inactive:
+				self.players.pop(player_id, None)
+				self.activity.pop(player_id, None)
+		return inactive
+
+
+def shared_player_store(manager):
+	"""Tabel pemain yang bisa dikirim ke process lain, isinya disimpan di process manager"""
+	return ManagerPlayerStore(manager.dict(), manager.dict(), manager.Lock())
+
+
+class RoomView:
+	"""
+	Satu room di atas store bersama model pre-fork. Room tidak bisa dibuat sebagai
+	store baru dari process worker, jadi pemain disimpan dengan kunci
+	'<room_id>/<player_id>' dan semua worker melihat isi room yang sama.
+	Lock dan cleanup tetap milik store bersama (lihat HttpServer).
+	"""
+	def __init__(self, store, room_id):
+		self.store = store
+		self.prefix = f"{room_id}/"
+
+	def ids(self):
+		return [key[len(self.prefix):] for key in self.store.ids() if key.startswith(self.prefix)]
+
+	def count(self):
+		return len(self.ids())
+
+	def get(self, player_id):
+		return self.store.get(self.prefix + str(player_id))
+
+	def set(self, player_id, state):
+		return self.store.set(self.prefix + str(player_id), state)
+
+	def remove(self, player_id):
+		self.store.remove(self.prefix + str(player_id))
+
+	def expire(self, timeout):
+		# dijalankan sekali untuk seluruh store bersama, bukan per room
+		return []
+
+	def retire(self):
+		# pemain disimpan di store bersama, view yang dibuang tidak menghilangkan apa pun
+		return True
+
+
+# Layout blok shared memory SharedMemoryPlayerStore (little endian tanpa padding):
+#   header     seq uint32 (seqlock struktur tabel), count uint32
+#   index      capacity x uint32, slot yang terisi (padat, index[0..count-1])
+#   where      capacity x uint32, posisi setiap slot terisi di index
+#   records    capacity x record 56 byte
+#
+# Record satu slot:
+#   seq        uint32   seqlock, ganjil selama record sedang ditulis
+#   used       uint8    SLOT_EMPTY / SLOT_USED
+#   player_id  32 byte  utf-8, diisi nol
+#   x, y       int32
+#   health     int16
+#   flags      uint8    bit 0 facing_right, bit 1 is_attacking, bit 2 is_hit
+#   last_seen  float64  waktu set terakhir (time.time())
+HEADER = struct.Struct('<II')
+SEQ = struct.Struct('<I')
+SLOT = struct.Struct('<I')
+BODY = struct.Struct('<B32siihBd')
+RECORD = struct.Struct('<IB32siihBd')
+
+SLOT_EMPTY = 0
+SLOT_USED = 1
+EMPTY_BODY = (SLOT_EMPTY, bytes(32), 0, 0, 0, 0, 0.0)
+
+FLAG_FACING_RIGHT = 0x01
+FLAG_ATTACKING = 0x02
+FLAG_HIT = 0x04
+
+
+def _clamp(value, low, high):
+	return max(low, min(high, int(value)))
+
+
+class SharedMemoryPlayerStore:
+	"""
+	Tabel pemain di multiprocessing.shared_memory dengan interface yang sama
+	dengan PlayerStore. Kapasitas tetap, slot dicari dengan open addressing
+	(crc32 dari player_id, linear probing). Slot yang dihapus langsung dikosongkan
+	dengan backward-shift (record sesudahnya digeser mundur), jadi tidak ada
+	tombstone dan rantai probing tidak pernah memanjang.
+
+	Setiap slot dilindungi seqlock: pembaca di process mana pun membaca record
+	langsung dari shared memory tanpa lock dan tanpa IPC, lalu mengulang jika seq
+	berubah selama dibaca. Perubahan struktur (pemain baru, hapus dan geser)
+	dilindungi seqlock header, dan daftar slot terisi disimpan padat di index
+	sehingga count() dan ids() tidak memindai seluruh kapasitas. Penulis
+	diserialkan dengan satu multiprocessing.Lock.
+
+	State yang disimpan hanya x, y, health, facing_right, is_attacking dan is_hit,
+	field lain di state diabaikan.
+	"""
+	def __init__(self, capacity=1024, name=None, lock=None):
+		self.capacity = capacity
+		self.owner = name is None
+		if self.owner:
+			size = _size(capacity)
+			self.shm = shared_memory.SharedMemory(create=True, size=size)
+			self.shm.buf[:size] = bytes(size)
+		else:
+			self.shm = _attach(name)
+		self.buf = self.shm.buf
+		self.lock = multiprocessing.Lock() if lock is None else lock
+		self._layout()
+
+	def __getstate__(self):
+		# process worker (spawn) cukup attach ke blok shared memory yang sama
+		return {'capacity': self.capacity, 'name': self.shm.name, 'lock': self.lock}
+
+	def __setstate__(self, state):
+		self.capacity = state['capacity']
+		self.owner = False
+		self.shm = _attach(state['name'])
+		self.buf = self.shm.buf
+		self.lock = state['lock']
+		self._layout()
+
+	def _layout(self):
+		self.index_offset = HEADER.size
+		self.where_offset = self.index_offset + self.capacity * SLOT.size
+		self.records_offset = self.where_offset + self.capacity * SLOT.size
+
+	def close(self):
+		"""Lepas shared memory, process pembuat juga menghapusnya"""
+		self.buf = None
+		self.shm.close()
+		if self.owner:
+			self.shm.unlink()
+
+	def _read(self, slot):
+		"""Body record (used, key, x, y, health, flags, last_seen) yang konsisten"""
+		offset = self.records_offset + slot * RECORD.size
+		while True:
+			before = SEQ.unpack_from(self.buf, offset)[0]
+			if not before & 1:
+				body = bytes(self.buf[offset + SEQ.size:offset + RECORD.size])
+				if SEQ.unpack_from(self.buf, offset)[0] == before:
+					return BODY.unpack(body)
+			time.sleep(0)  # penulis sedang aktif, beri kesempatan selesai
+
+	def _write(self, slot, *fields):
+		# hanya dipanggil dengan self.lock dipegang
+		offset = self.records_offset + slot * RECORD.size
+		seq = SEQ.unpack_from(self.buf, offset)[0]
+		SEQ.pack_into(self.buf, offset, (seq + 1) & 0xFFFFFFFF)
+		BODY.pack_into(self.buf, offset + SEQ.size, *fields)
+		SEQ.pack_into(self.buf, offset, (seq + 2) & 0xFFFFFFFF)
+
+	def _stable(self, read):
+		"""Jalankan read() sampai struktur tabel tidak berubah selama dibaca"""
+		while True:
+			before = SEQ.unpack_from(self.buf, 0)[0]
+			if not before & 1:
+				result = read()
+				if SEQ.unpack_from(self.buf, 0)[0] == before:
+					return result
+			time.sleep(0)
+
+	def _restructure(self):
+		# naikkan seq header (ganjil = struktur sedang diubah), dengan self.lock dipegang
+		seq = SEQ.unpack_from(self.buf, 0)[0]
+		SEQ.pack_into(self.buf, 0, (seq + 1) & 0xFFFFFFFF)
+
+	def _count(self):
+		return HEADER.unpack_from(self.buf, 0)[1]
+
+	def _slots(self):
+		count = self._count()
+		return struct.unpack_from(f'<{count}I', self.buf, self.index_offset)
+
+	def _link(self, slot):
+		count = self._count()
+		SLOT.pack_into(self.buf, self.index_offset + count * SLOT.size, slot)
+		SLOT.pack_into(self.buf, self.where_offset + slot * SLOT.size, count)
+		HEADER.pack_into(self.buf, 0, SEQ.unpack_from(self.buf, 0)[0], count + 1)
+
+	def _unlink(self, slot):
+		# swap-remove dari index
+		count = self._count() - 1
+		position = SLOT.unpack_from(self.buf, self.where_offset + slot * SLOT.size)[0]
+		last = SLOT.unpack_from(self.buf, self.index_offset + count * SLOT.size)[0]
+		SLOT.pack_into(self.buf, self.index_offset + position * SLOT.size, last)
+		SLOT.pack_into(self.buf, self.where_offset + last * SLOT.size, position)
+		HEADER.pack_into(self.buf, 0, SEQ.unpack_from(self.buf, 0)[0], count)
+
+	def _relink(self, old, new):
+		position = SLOT.unpack_from(self.buf, self.where_offset + old * SLOT.size)[0]
+		SLOT.pack_into(self.buf, self.index_offset + position * SLOT.size, new)
+		SLOT.pack_into(self.buf, self.where_offset + new * SLOT.size, position)
+
+	def _probe(self, key):
+		start = _home(key, self.capacity)
+		for i in range(self.capacity):
+			yield (start + i) % self.capacity
+
+	def _find(self, key):
+		for slot in self._probe(key):
+			record = self._read(slot)
+			if record[0] == SLOT_EMPTY:
+				return None, None
+			if record[1] == key:
+				return slot, record
+		return None, None
+
+	def _delete(self, slot):
+		"""
+		Kosongkan slot lalu geser mundur record berikutnya di rantai probing yang
+		home-nya tidak berada di antara slot kosong dan posisinya (backward-shift).
+		Dipanggil di antara dua _restructure().
+		"""
+		self._unlink(slot)
+		self._write(slot, *EMPTY_BODY)
+		hole = slot
+		current = slot
+		for _ in range(self.capacity - 1):
+			current = (current + 1) % self.capacity
+			record = self._read(current)
+			if record[0] == SLOT_EMPTY:
+				return
+			home = _home(record[1], self.capacity)
+			# record boleh tetap di tempat jika home-nya ada di (hole, current] secara siklik
+			if (hole < current and hole < home <= current) or (current < hole and (home > hole or home <= current)):
+				continue
+			self._write(hole, *record)
+			self._relink(current, hole)
+			self._write(current, *EMPTY_BODY)
+			hole = current
+
+	def ids(self):
+		return [_player_id(record) for record in self._records()]
+
+	def count(self):
+		return self._stable(self._count)
+
+	def _records(self):
+		return self._stable(lambda: [self._read(slot) for slot in self._slots()])
+
+	def get(self, player_id):
+		key = _key(player_id)
+		if key is None:
+			return None
+		slot, record = self._stable(lambda: self._find(key))
+		if record is None:
+			return None
+		return _record_to_state(record)
+
+	def snapshot(self):
+		"""{player_id: state} semua pemain, setiap record konsisten"""
+		return {_player_id(record): _record_to_state(record) for record in self._records()}
+
+	def set(self, player_id, state):
+		"""Return False jika tabel penuh atau player_id lebih dari 32 byte"""
+		key = _key(player_id)
+		if key is None:
+			return False
+		flags = 0
+		if state.get('facing_right', True):
+			flags |= FLAG_FACING_RIGHT
+		if state.get('is_attacking', False):
+			flags |= FLAG_ATTACKING
+		if state.get('is_hit', False):
+			flags |= FLAG_HIT
+		fields = (SLOT_USED, key,
+				  _clamp(state.get('x', 0), -2**31, 2**31 - 1),
+				  _clamp(state.get('y', 0), -2**31, 2**31 - 1),
+				  _clamp(state.get('health', 0), -2**15, 2**15 - 1),
+				  flags, time.time())
+		with self.lock:
+			for slot in self._probe(key):
+				record = self._read(slot)
+				if record[0] == SLOT_USED and record[1] == key:
+					self._write(slot, *fields)
+					return True
+				if record[0] == SLOT_EMPTY:
+					self._restructure()
+					self._write(slot, *fields)
+					self._link(slot)
+					self._restructure()
+					return True
+			return False
+
+	def remove(self, player_id):
+		key = _key(player_id)
+		if key is None:
+			return
+		with self.lock:
+			slot, record = self._find(key)
+			if record is not None:
+				self._restructure()
+				self._delete(slot)
+				self._restructure()
+
+	def expire(self, timeout):
+		"""Hanya memeriksa slot terisi lewat index, bukan seluruh kapasitas"""
+		now = time.time()
+		with self.lock:
+			inactive = [record[1] for record in (self._read(slot) for slot in self._slots()) if now - record[-1] > timeout]
+			if not inactive:
+				return []
+			self._restructure()
+			for key in inactive:
+				slot, _ = self._find(key)
+				self._delete(slot)
+			self._restructure()
+		return [_player_id((SLOT_USED, key)) for key in inactive]
+
+
+def _size(capacity):
+	return HEADER.size + 2 * capacity * SLOT.size + capacity * RECORD.size
+
+
+def _home(key, capacity):
+	return zlib.crc32(key) % capacity
+
+
+def _attach(name):
+	try:
+		# Python 3.13+: process worker tidak ikut menghapus blok saat keluar
+		return shared_memory.SharedMemory(name=name, track=False)
+	except TypeError:
+		return shared_memory.SharedMemory(name=name)
+
+
+def _key(player_id):
+	key = str(player_id).encode()
+	if len(key) > 32:
+		return None
+	return key.ljust(32, b'\0')
+
+
+def _player_id(record):
+	return record[1].rstrip(b'\0').decode()
+
+
+def _record_to_state(record):
+	_, _, x, y, health, flags, _ = record
+	return {
+		'x': x,
+		'y': y,
+		'facing_right': bool(flags & FLAG_FACING_RIGHT),
+		'is_attacking': bool(flags & FLAG_ATTACKING),
+		'health': health,
+		'is_hit': bool(flags & FLAG_HIT)
+	}
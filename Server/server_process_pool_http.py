@@ -5,7 +5,7 @@ import sys
 import logging
 import multiprocessing
 from concurrent.futures import ProcessPoolExecutor
-from http import HttpServer
+from http import HttpServer, RequestParser, send_parts
 
 httpserver = HttpServer()
 
@@ -13,32 +13,27 @@ httpserver = HttpServer()
 #maka class ProcessTheClient dirubah dulu menjadi function, tanpda memodifikasi behaviour didalamnya
 
 def ProcessTheClient(connection,address):
-		rcv=""
+		#bytes dari socket dibaca langsung ke buffer parser, request diparse secara inkremental
+		parser = RequestParser()
 		while True:
 			try:
-				data = connection.recv(32)
-				if data:
-					#merubah input dari socket (berupa bytes) ke dalam string
-					#agar bisa mendeteksi \r\n
-					d = data.decode()
-					rcv=rcv+d
-					if rcv[-2:]=='\r\n':
-						#end of command, proses string
-						#logging.warning("data dari client: {}" . format(rcv))
-						hasil = httpserver.proses(rcv)
-						#hasil akan berupa bytes
-						#untuk bisa ditambahi dengan string, maka string harus di encode
-						hasil=hasil+"\r\n\r\n".encode()
-						#logging.warning("balas ke  client: {}" . format(hasil))
-						#hasil sudah dalam bentuk bytes
-						connection.sendall(hasil)
-						rcv=""
-						connection.close()
-						return
-				else:
+				if parser.recv_into(connection) == 0:
 					break
+				request = parser.next_request()
+				if request is not None:
+					baris, headers, body = request
+					#logging.warning("data dari client: {}" . format(baris))
+					hasil = httpserver.proses_request(baris, headers, body)
+					#hasil berupa bytes, atau list [header, isi file] yang dikirim tanpa digabung
+					parts = hasil if isinstance(hasil, list) else [hasil]
+					#logging.warning("balas ke  client: {}" . format(parts[0]))
+					send_parts(connection, parts + [b"\r\n\r\n"])
+					connection.close()
+					return
+			except ValueError as e:
+				break
 			except OSError as e:
-				pass
+				break
 		connection.close()
 		return
 
@@ -5,9 +5,19 @@ import time
 import sys
 import logging
 import argparse
+import asyncio
+import errno
+import json
+import multiprocessing
+import os
+import math
+import queue
 import random
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from http import HttpServer
+import selectors
+from collections import deque
+from http import HttpServer, RequestParser, HTTP_PREFIXES, send_parts
+from player_store import shared_player_store, SharedMemoryPlayerStore
+from hash_ring import HashRing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,24 +29,129 @@ class LoadBalancer:
 		self.current = 0
 		self.lock = threading.Lock()
 		self.server_health = {f"{host}:{port}": True for host, port in servers}
+		# player_id -> backend lewat consistent hashing, pemain selalu ke backend yang sama
+		self.ring = HashRing(servers)
+		# Diisi HealthProber dan FrontendProxy
+		self.latency = {f"{host}:{port}": None for host, port in servers}  # EWMA latency /health (detik)
+		self.failures = {f"{host}:{port}": 0 for host, port in servers}    # probe gagal berturut-turut
+		self.outstanding = {f"{host}:{port}": 0 for host, port in servers} # koneksi yang sedang diteruskan
+		self.ewma_alpha = 0.3
+		self.failure_threshold = 2
+		# pemilik ring dilewati jika latency-nya lebih dari slow_factor x backend tercepat
+		# dan lebih dari slow_floor detik (jitter kecil tidak memindahkan pemain)
+		self.slow_factor = 3.0
+		self.slow_floor = 0.05
 	
 	def get_next_server(self):
-		"""Round-robin load balancing"""
+		"""
+		Least-outstanding, latency-weighted: backend sehat dengan skor
+		(koneksi aktif + 1) x EWMA latency terkecil. Backend yang lambat atau
+		sedang pause otomatis berhenti menerima pemain baru. Round-robin hanya
+		sebagai pemecah skor yang sama.
+		"""
 		with self.lock:
-			# Find next healthy server
-			attempts = 0
-			while attempts < len(self.servers):
-				server = self.servers[self.current]
+			known = [l for l in self.latency.values() if l is not None]
+			default_latency = min(known) if known else 0.001
+			best = None
+			best_score = None
+			for i in range(len(self.servers)):
+				server = self.servers[(self.current + i) % len(self.servers)]
 				server_key = f"{server[0]}:{server[1]}"
+				if not self.server_health.get(server_key, True):
+					continue
+				latency = self.latency.get(server_key)
+				score = (self.outstanding.get(server_key, 0) + 1) * (default_latency if latency is None else latency)
+				if best_score is None or score < best_score:
+					best, best_score = server, score
+			if self.servers:
 				self.current = (self.current + 1) % len(self.servers)
-				
-				if self.server_health.get(server_key, True):
-					return server
-				attempts += 1
 			
 			# If no healthy servers, return first one
-			return self.servers[0] if self.servers else None
+			if best is None:
+				return self.servers[0] if self.servers else None
+			return best
+
+	def begin_request(self, server):
+		with self.lock:
+			server_key = f"{server[0]}:{server[1]}"
+			self.outstanding[server_key] = self.outstanding.get(server_key, 0) + 1
+
+	def end_request(self, server):
+		with self.lock:
+			server_key = f"{server[0]}:{server[1]}"
+			if server_key in self.outstanding:
+				# backend bisa sudah dikeluarkan selama koneksinya diteruskan
+				self.outstanding[server_key] = max(0, self.outstanding[server_key] - 1)
+
+	def record_probe(self, host, port, latency):
+		"""Hasil probe /health, latency None berarti gagal atau timeout"""
+		server_key = f"{host}:{port}"
+		with self.lock:
+			if server_key not in self.server_health:
+				return  # backend sudah dikeluarkan selama probe berjalan
+			if latency is None:
+				self.failures[server_key] = self.failures.get(server_key, 0) + 1
+				failed = self.failures[server_key] >= self.failure_threshold
+			else:
+				self.failures[server_key] = 0
+				previous = self.latency.get(server_key)
+				self.latency[server_key] = latency if previous is None else \
+					self.ewma_alpha * latency + (1 - self.ewma_alpha) * previous
+				failed = False
+			healthy = self.server_health.get(server_key, True)
+		if failed and healthy:
+			self.mark_server_unhealthy(host, port)
+		elif latency is not None and not healthy:
+			self.mark_server_healthy(host, port)
 	
+	def get_server_for_player(self, player_id):
+		"""
+		Backend untuk player_id dari hash ring supaya state pemain tetap lokal.
+		Backend yang tidak sehat, atau yang latency-nya jauh di atas backend
+		tercepat (lihat slow_factor dan slow_floor), dilewati dan hanya pemainnya
+		yang pindah ke backend berikutnya di ring. Pemain kembali ke pemilik
+		aslinya setelah backend itu pulih. Request tanpa player_id memakai
+		get_next_server().
+
+		Semua backend memakai tabel pemain yang sama: instance in-process
+		(thread/pool/selectors/asyncio) berbagi HttpServer global `httpserver`,
+		dan instance pre-fork berbagi store bersama. Pemain yang pindah backend
+		tidak kehilangan state apa pun. Ring hanya menjaga pemain tetap ke
+		backend yang sama (koneksi dan cache hangat), bukan memisahkan state.
+		"""
+		if player_id is None:
+			return self.get_next_server()
+		with self.lock:
+			healthy = lambda s: self.server_health.get(f"{s[0]}:{s[1]}", True)
+			known = [self.latency[f"{s[0]}:{s[1]}"] for s in self.servers
+					 if healthy(s) and self.latency.get(f"{s[0]}:{s[1]}") is not None]
+			limit = max(self.slow_floor, self.slow_factor * min(known)) if known else None
+
+			def fast(server):
+				latency = self.latency.get(f"{server[0]}:{server[1]}")
+				return healthy(server) and (limit is None or latency is None or latency <= limit)
+
+			server = self.ring.lookup(player_id, fast)
+			if server is None:
+				server = self.ring.lookup(player_id, healthy)
+			if server is None:
+				# Semua backend tidak sehat, tetap pakai pemilik aslinya
+				server = self.ring.lookup(player_id)
+		return server
+
+	def remove_server(self, host, port):
+		"""
+		Keluarkan backend yang berhenti permanen (dipanggil LoadBalancedServer),
+		pemainnya dibagi ke backend berikutnya di ring dan backend tidak di-probe lagi
+		"""
+		server_key = f"{host}:{port}"
+		with self.lock:
+			self.servers = [s for s in self.servers if s != (host, port)]
+			self.current = 0
+			self.ring.remove((host, port))
+			for table in (self.server_health, self.latency, self.failures, self.outstanding):
+				table.pop(server_key, None)
+
 	def mark_server_unhealthy(self, host, port):
 		"""Mark server as unhealthy"""
 		server_key = f"{host}:{port}"
@@ -49,10 +164,49 @@ class LoadBalancer:
 		self.server_health[server_key] = True
 		logging.info(f"Server {server_key} marked as healthy")
 
+class HealthProber(threading.Thread):
+	"""Probe GET /health setiap backend secara berkala dan laporkan hasilnya ke LoadBalancer"""
+	def __init__(self, balancer, interval=2.0, timeout=1.0):
+		self.balancer = balancer
+		self.interval = interval
+		self.timeout = timeout
+		self.running = True
+		threading.Thread.__init__(self, daemon=True)
+
+	def run(self):
+		while self.running:
+			time.sleep(self.interval)
+			for host, port in self.balancer.servers:
+				self.balancer.record_probe(host, port, self.probe(host, port))
+
+	def stop(self):
+		self.running = False
+
+	def probe(self, host, port):
+		"""Return latency dalam detik, atau None jika gagal / lebih dari timeout"""
+		start = time.perf_counter()
+		try:
+			with socket.create_connection((host, port), timeout=self.timeout) as sock:
+				sock.sendall(b"GET /health HTTP/1.0\r\n\r\n")
+				response = b""
+				while True:
+					data = sock.recv(4096)
+					if not data:
+						break
+					response += data
+		except OSError:
+			return None
+		if response.split(b" ", 2)[1:2] != [b"200"]:
+			return None
+		return time.perf_counter() - start
+
 # Global variables
 httpserver = HttpServer()
 load_balancer = None
-processing_model = "thread"  # thread, process, pool
+processing_model = "thread"  # thread, process, pool, process_pool, selectors, asyncio
+
+# Model pre-fork dan model yang dijalankan di dalam setiap process worker
+PREFORK_MODELS = {"process": "thread", "process_pool": "pool"}
 
 
 class ProcessTheClient(threading.Thread):
@@ -63,41 +217,39 @@ class ProcessTheClient(threading.Thread):
 		threading.Thread.__init__(self)
 
 	def run(self):
-		rcv=""
+		#bytes dari socket dibaca langsung ke buffer parser, request diparse secara inkremental
+		parser = RequestParser()
 		start_time = time.time()
 		try:
 			while True:
 				try:
-					data = self.connection.recv(1024)  # Increased buffer size
-					if data:
-						#merubah input dari socket (berupa bytes) ke dalam string
-						#agar bisa mendeteksi \r\n
-						d = data.decode()
-						rcv=rcv+d
-						if rcv[-2:]=='\r\n':
-							#end of command, proses string
-							logging.info(f"[{self.server_id}] Data from {self.address}: {rcv.strip()}")
-							hasil = httpserver.proses(rcv)
-							
-							#hasil akan berupa bytes
-							#untuk bisa ditambahi dengan string, maka string harus di encode
-							if not rcv.strip().startswith(('GET', 'POST', 'HTTP')):
-								# Game command - no HTTP headers needed
-								self.connection.sendall(hasil)
-							else:
-								# HTTP request - add proper ending
-								hasil=hasil+"\r\n\r\n".encode()
-								self.connection.sendall(hasil)
-							
-							processing_time = time.time() - start_time
-							logging.info(f"[{self.server_id}] Processed in {processing_time:.3f}s")
-							rcv=""
-							break
-					else:
+					if parser.recv_into(self.connection) == 0:
 						break
+					request = parser.next_request()
+					if request is None:
+						continue
+					baris, headers, body = request
+					logging.info(f"[{self.server_id}] Data from {self.address}: {baris}")
+					hasil = httpserver.proses_request(baris, headers, body)
+
+					#hasil berupa bytes, atau list [header, isi file]
+					if not baris.startswith(HTTP_PREFIXES):
+						# Game command - no HTTP headers needed
+						self.connection.sendall(hasil)
+					else:
+						# HTTP request - add proper ending
+						parts = hasil if isinstance(hasil, list) else [hasil]
+						send_parts(self.connection, parts + [b"\r\n\r\n"])
+
+					processing_time = time.time() - start_time
+					logging.info(f"[{self.server_id}] Processed in {processing_time:.3f}s")
+					break
 				except socket.timeout:
 					logging.warning(f"[{self.server_id}] Timeout for {self.address}")
 					break
+				except ValueError as e:
+					logging.warning(f"[{self.server_id}] Bad request from {self.address}: {e}")
+					break
 				except OSError as e:
 					logging.error(f"[{self.server_id}] OSError: {e}")
 					break
@@ -106,8 +258,536 @@ class ProcessTheClient(threading.Thread):
 
 
 
+class SelectorConnection:
+	"""
+	State satu client di model selectors: parser untuk data masuk dan antrian
+	buffer keluar. Perilakunya sama dengan ProcessTheClient (satu request per
+	koneksi), tetapi tanpa thread sendiri dan tanpa operasi yang memblok.
+	"""
+	def __init__(self, connection, address, server_id="main"):
+		self.connection = connection
+		self.address = address
+		self.server_id = server_id
+		self.parser = RequestParser()
+		self.outgoing = deque()  # memoryview yang belum terkirim
+		self.closing = False
+		self.last_activity = time.time()
+
+	def on_readable(self):
+		"""Return False jika koneksi harus ditutup"""
+		if self.parser.recv_into(self.connection) == 0:
+			return False
+		self.last_activity = time.time()
+		request = self.parser.next_request()
+		if request is None:
+			return True
+		baris, headers, body = request
+		logging.info(f"[{self.server_id}] Data from {self.address}: {baris}")
+		hasil = httpserver.proses_request(baris, headers, body)
+
+		#hasil berupa bytes, atau list [header, isi file]
+		if not baris.startswith(HTTP_PREFIXES):
+			# Game command - no HTTP headers needed
+			parts = [hasil]
+		else:
+			# HTTP request - add proper ending
+			parts = (hasil if isinstance(hasil, list) else [hasil]) + [b"\r\n\r\n"]
+		self.outgoing.extend(memoryview(part) for part in parts if part)
+		#koneksi ditutup setelah balasan terkirim, sama seperti model thread
+		self.closing = True
+		return True
+
+	def on_writable(self):
+		"""Kirim sebanyak yang diterima socket, return True jika antrian sudah kosong"""
+		while self.outgoing:
+			sent = self.connection.send(self.outgoing[0])
+			if sent < len(self.outgoing[0]):
+				self.outgoing[0] = self.outgoing[0][sent:]
+				return False
+			self.outgoing.popleft()
+		return True
+
+
+
+# Perintah game yang membawa player_id sebagai argumen pertama
+PLAYER_COMMANDS = ('get_player_state', 'set_player_state', 'remove_player')
+
+
+def routing_key_of(request_line):
+	"""
+	Kunci afinitas dari baris pertama request: player_id untuk room default,
+	room_id untuk "<room_id>/<player_id>" dan "get_players <room_id>" supaya
+	semua pemain satu room dilayani backend yang sama. None untuk request HTTP
+	dan get_players room default.
+	"""
+	parts = request_line.strip().split(' ', 2)
+	if parts[0] == 'get_players' and len(parts) >= 2:
+		return f"room:{parts[1]}"
+	if parts[0] in PLAYER_COMMANDS and len(parts) >= 2:
+		room_id, _, player_id = parts[1].rpartition('/')
+		return f"room:{room_id}" if room_id else player_id
+	return None
+
+
+
+class ProxyConnection:
+	"""Satu client di FrontendProxy beserta koneksi ke backend pilihannya"""
+	def __init__(self, client, address):
+		self.client = client
+		self.address = address
+		self.backend = None
+		self.server = None          # (host, port) backend
+		self.connecting = False
+		self.tried = set()          # backend yang gagal di-connect untuk koneksi ini
+		self.routing_key = None     # player_id atau room dari routing_key_of()
+		self.to_backend = bytearray()
+		self.to_client = bytearray()
+		self.client_eof = False
+		self.backend_eof = False
+		self.backend_shut = False
+		self.client_shut = False
+		self.closed = False
+
+
+
+class FrontendProxy(threading.Thread):
+	"""
+	Front-end untuk --servers N: menerima semua koneksi client di satu port lalu
+	meneruskannya ke backend yang dipilih LoadBalancer, dengan afinitas per player_id
+	dari baris pertama request. Satu thread, socket non-blocking dan data diteruskan
+	dua arah sekaligus (full-duplex) dengan buffer terbatas per arah.
+	"""
+	BUFFER_LIMIT = 256 * 1024
+	MAX_FIRST_LINE = 8192
+
+	def __init__(self, balancer, host='0.0.0.0', port=8888):
+		self.balancer = balancer
+		self.host = host
+		self.port = port
+		self.running = True
+		self.selector = selectors.DefaultSelector()
+		self.registered = {}  # {socket: mask}
+		threading.Thread.__init__(self, daemon=True)
+
+	def run(self):
+		listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		listener.bind((self.host, self.port))
+		listener.listen(1024)
+		listener.setblocking(False)
+		self.selector.register(listener, selectors.EVENT_READ)
+		logging.info(f"[proxy] Front-end listening on {self.host}:{self.port}")
+		try:
+			while self.running:
+				for key, mask in self.selector.select(timeout=1.0):
+					if key.fileobj is listener:
+						self.accept(listener)
+						continue
+					conn, side = key.data
+					if conn.closed:
+						continue
+					try:
+						if side == 'client':
+							self.on_client(conn, mask)
+						else:
+							self.on_backend(conn, mask)
+						self.update(conn)
+					except OSError as e:
+						logging.warning(f"[proxy] Connection {conn.address} closed: {e}")
+						self.close(conn)
+		finally:
+			self.selector.close()
+			listener.close()
+
+	def stop(self):
+		self.running = False
+
+	def accept(self, listener):
+		while True:
+			try:
+				client, address = listener.accept()
+			except (BlockingIOError, InterruptedError):
+				return
+			client.setblocking(False)
+			conn = ProxyConnection(client, address)
+			self.watch(client, selectors.EVENT_READ, (conn, 'client'))
+
+	def watch(self, sock, mask, data):
+		current = self.registered.get(sock)
+		if mask == current:
+			return
+		if not mask:
+			if current is not None:
+				self.selector.unregister(sock)
+				del self.registered[sock]
+		elif current is None:
+			self.selector.register(sock, mask, data)
+			self.registered[sock] = mask
+		else:
+			self.selector.modify(sock, mask, data)
+			self.registered[sock] = mask
+
+	def on_client(self, conn, mask):
+		if mask & selectors.EVENT_READ:
+			data = self.receive(conn.client)
+			if data is not None:
+				if not data:
+					conn.client_eof = True
+				conn.to_backend += data
+				if conn.server is None:
+					self.route(conn)
+		if mask & selectors.EVENT_WRITE and conn.to_client:
+			del conn.to_client[:self.transmit(conn.client, conn.to_client)]
+
+	def on_backend(self, conn, mask):
+		if conn.connecting:
+			if not mask & selectors.EVENT_WRITE:
+				return
+			error = conn.backend.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+			if error:
+				self.backend_failed(conn, os.strerror(error))
+				return
+			conn.connecting = False
+		if mask & selectors.EVENT_READ:
+			data = self.receive(conn.backend)
+			if data is not None:
+				if not data:
+					conn.backend_eof = True
+				conn.to_client += data
+		if mask & selectors.EVENT_WRITE and conn.to_backend:
+			del conn.to_backend[:self.transmit(conn.backend, conn.to_backend)]
+
+	@staticmethod
+	def receive(sock):
+		"""recv non-blocking: None jika belum ada data (coba lagi di select berikutnya), b'' saat EOF"""
+		try:
+			return sock.recv(65536)
+		except (BlockingIOError, InterruptedError):
+			return None
+
+	@staticmethod
+	def transmit(sock, buffer):
+		"""send non-blocking: jumlah byte terkirim, 0 jika buffer kernel sedang penuh"""
+		try:
+			return sock.send(buffer)
+		except (BlockingIOError, InterruptedError):
+			return 0
+
+	def route(self, conn):
+		"""Pilih backend setelah baris pertama request lengkap"""
+		if not conn.to_backend:
+			return
+		line_end = conn.to_backend.find(b"\r\n")
+		if line_end < 0 and not conn.client_eof and len(conn.to_backend) < self.MAX_FIRST_LINE:
+			return
+		first_line = bytes(conn.to_backend[:line_end if line_end >= 0 else self.MAX_FIRST_LINE])
+		conn.routing_key = routing_key_of(first_line.decode(errors='replace'))
+		server = self.balancer.get_server_for_player(conn.routing_key)
+		if server is None:
+			raise OSError("tidak ada backend")
+		self.connect(conn, server)
+
+	def connect(self, conn, server):
+		conn.server = server
+		self.balancer.begin_request(server)
+		conn.backend = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		conn.backend.setblocking(False)
+		conn.connecting = True
+		error = conn.backend.connect_ex(server)
+		if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+			self.backend_failed(conn, os.strerror(error))
+
+	def backend_failed(self, conn, reason):
+		"""Tandai backend tidak sehat lalu coba backend lain untuk koneksi ini"""
+		host, port = conn.server
+		logging.warning(f"[proxy] Backend {host}:{port} failed: {reason}")
+		self.balancer.mark_server_unhealthy(host, port)
+		self.balancer.end_request(conn.server)
+		conn.tried.add(conn.server)
+		self.watch(conn.backend, 0, None)
+		conn.backend.close()
+		conn.backend = None
+		server = self.balancer.get_server_for_player(conn.routing_key)
+		if server is None or server in conn.tried:
+			raise OSError("semua backend gagal")
+		self.connect(conn, server)
+
+	def update(self, conn):
+		"""Atur event yang ditunggu, half-close dan penutupan pasangan koneksi"""
+		if conn.backend is not None and not conn.connecting:
+			if conn.client_eof and not conn.to_backend and not conn.backend_shut:
+				conn.backend.shutdown(socket.SHUT_WR)
+				conn.backend_shut = True
+			if conn.backend_eof and not conn.to_client and not conn.client_shut:
+				conn.client.shutdown(socket.SHUT_WR)
+				conn.client_shut = True
+		if conn.backend_shut and conn.client_shut:
+			self.close(conn)
+			return
+		if conn.client_eof and conn.server is None:
+			# client menutup koneksi sebelum request pertama lengkap
+			self.close(conn)
+			return
+
+		# Backpressure: berhenti membaca dari satu sisi jika buffer ke sisi lain penuh
+		client_mask = 0
+		if not conn.client_eof and len(conn.to_backend) < self.BUFFER_LIMIT:
+			client_mask |= selectors.EVENT_READ
+		if conn.to_client:
+			client_mask |= selectors.EVENT_WRITE
+		self.watch(conn.client, client_mask, (conn, 'client'))
+
+		if conn.backend is not None:
+			backend_mask = 0
+			if conn.connecting or conn.to_backend:
+				backend_mask |= selectors.EVENT_WRITE
+			if not conn.connecting and not conn.backend_eof and len(conn.to_client) < self.BUFFER_LIMIT:
+				backend_mask |= selectors.EVENT_READ
+			self.watch(conn.backend, backend_mask, (conn, 'backend'))
+
+	def close(self, conn):
+		conn.closed = True
+		if conn.backend is not None:
+			self.balancer.end_request(conn.server)
+		for sock in (conn.client, conn.backend):
+			if sock is None:
+				continue
+			if sock in self.registered:
+				self.watch(sock, 0, None)
+			sock.close()
+		conn.backend = None
+
+
+
+def wants_keep_alive(baris, headers):
+	"""HTTP/1.1 persistent kecuali Connection: close, HTTP/1.0 hanya jika meminta keep-alive"""
+	connection = ''
+	for header in headers:
+		key, _, value = header.partition(':')
+		if key.strip().lower() == 'connection':
+			connection = value.strip().lower()
+	version = baris.rsplit(' ', 1)[-1].upper()
+	return connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+
+
+class WorkQueue:
+	"""
+	Antrian kerja terbatas untuk model pool, pengganti antrian ThreadPoolExecutor
+	yang tidak terbatas. Koneksi ditolak dengan 503 dan Retry-After jika antrian
+	sudah berisi max_depth koneksi, atau begitu koneksi menunggu lebih dari
+	max_wait detik di antrian, walaupun semua worker masih sibuk. Saat overload
+	client langsung tahu harus mencoba lagi, bukan menunggu di belakang antrian
+	sampai timeout.
+
+	Koneksi yang ditolak diserahkan ke satu thread shedder (selectors, non-blocking)
+	sehingga thread accept dan worker tidak pernah menunggu client lambat. Shedder
+	juga mengeluarkan koneksi antrian yang melewati max_wait, dan hanya bangun
+	saat ada deadline atau dibangunkan lewat socketpair, tidak pernah polling.
+	Shedder menunggu byte pertama request paling lama shed_timeout detik untuk
+	memilih format balasan: HTTP 503 untuk request HTTP, atau balasan JSON
+	perintah game.
+	"""
+	def __init__(self, handler, server_id, workers=10, max_depth=64, max_wait=2.0, ewma_alpha=0.2, shed_timeout=1.0):
+		self.handler = handler
+		self.server_id = server_id
+		self.max_depth = max_depth
+		self.max_wait = max_wait
+		self.retry_after = max(1, math.ceil(max_wait))
+		self.ewma_alpha = ewma_alpha
+		self.pending = deque()  # (waktu masuk, connection, address), urut FIFO
+		self.lock = threading.Lock()
+		self.available = threading.Condition(self.lock)
+		self.running = True
+		self.busy = 0
+		self.admitted = 0
+		self.rejected_full = 0
+		self.rejected_wait = 0
+		self.wait_total = 0.0
+		self.wait_max = 0.0
+		self.wait_ewma = 0.0
+		self.shed_timeout = shed_timeout
+		self.shedding = queue.SimpleQueue()  # koneksi yang ditolak, diambil thread shedder
+		self.wakeup, self.wakeup_signal = socket.socketpair()
+		self.wakeup.setblocking(False)
+		self.wakeup_signal.setblocking(False)
+		self.workers = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+		for worker in self.workers:
+			worker.start()
+		threading.Thread(target=self.shedder, daemon=True).start()
+
+	def submit(self, connection, address):
+		"""Return False jika antrian penuh, koneksi diserahkan ke shedder"""
+		with self.lock:
+			full = len(self.pending) >= self.max_depth
+			if full:
+				self.rejected_full += 1
+			else:
+				self.pending.append((time.monotonic(), connection, address))
+				self.available.notify()
+				first = len(self.pending) == 1
+		if full:
+			self.reject(connection, address, "queue full")
+			return False
+		if first:
+			# deadline antrian yang baru, shedder menghitung ulang waktu tidurnya
+			self.wake()
+		return True
+
+	def worker(self):
+		while True:
+			with self.available:
+				while self.running and not self.pending:
+					self.available.wait()
+				if not self.running:
+					return
+				enqueued, connection, address = self.pending.popleft()
+				wait = time.monotonic() - enqueued
+				self._record_wait(wait)
+				late = wait > self.max_wait
+				if late:
+					self.rejected_wait += 1
+				else:
+					self.admitted += 1
+					self.busy += 1
+			if late:
+				self.reject(connection, address, f"waited {wait:.2f}s")
+				continue
+			try:
+				self.handler(connection, address)
+			except Exception as e:
+				logging.error(f"[{self.server_id}] Worker error: {e}")
+			finally:
+				with self.lock:
+					self.busy -= 1
+
+	def _record_wait(self, wait):
+		# dipanggil dengan self.lock dipegang
+		self.wait_total += wait
+		self.wait_max = max(self.wait_max, wait)
+		self.wait_ewma += self.ewma_alpha * (wait - self.wait_ewma)
+
+	def expire(self):
+		"""Keluarkan koneksi antrian yang menunggu lebih dari max_wait, return deadline berikutnya"""
+		now = time.monotonic()
+		late = []
+		with self.lock:
+			while self.pending and now - self.pending[0][0] > self.max_wait:
+				enqueued, connection, address = self.pending.popleft()
+				self._record_wait(now - enqueued)
+				self.rejected_wait += 1
+				late.append((connection, address, now - enqueued))
+			deadline = self.pending[0][0] + self.max_wait if self.pending else None
+		for connection, address, wait in late:
+			logging.warning(f"[{self.server_id}] Shedding {address}: waited {wait:.2f}s")
+			self.shedding.put(connection)
+		return deadline
+
+	def reject(self, connection, address, reason):
+		"""Serahkan koneksi ke thread shedder, tidak memblok pemanggil"""
+		logging.warning(f"[{self.server_id}] Shedding {address}: {reason}")
+		self.shedding.put(connection)
+		self.wake()
+
+	def wake(self):
+		try:
+			self.wakeup_signal.send(b"\0")
+		except (BlockingIOError, InterruptedError):
+			pass  # buffer penuh, shedder pasti sudah akan bangun
+		except OSError:
+			pass  # sudah shutdown
+
+	def shedder(self):
+		selector = selectors.DefaultSelector()
+		selector.register(self.wakeup, selectors.EVENT_READ)
+		deadlines = {}  # {connection: batas waktu menunggu byte pertama}
+		while self.running:
+			queue_deadline = self.expire()
+			try:
+				while True:
+					connection = self.shedding.get_nowait()
+					try:
+						connection.setblocking(False)
+						selector.register(connection, selectors.EVENT_READ)
+						deadlines[connection] = time.monotonic() + self.shed_timeout
+					except (OSError, ValueError):
+						connection.close()
+			except queue.Empty:
+				pass
+			# tidur sampai deadline terdekat, tanpa deadline tunggu sampai dibangunkan
+			upcoming = list(deadlines.values()) + ([queue_deadline] if queue_deadline is not None else [])
+			timeout = max(0.0, min(upcoming) - time.monotonic()) if upcoming else None
+			ready = []
+			for key, _ in selector.select(timeout):
+				if key.fileobj is self.wakeup:
+					try:
+						while self.wakeup.recv(4096):
+							pass
+					except (BlockingIOError, InterruptedError):
+						pass
+				else:
+					ready.append(key.fileobj)
+			now = time.monotonic()
+			for connection in ready + [c for c, deadline in deadlines.items() if deadline <= now and c not in ready]:
+				selector.unregister(connection)
+				del deadlines[connection]
+				self.send_busy(connection)
+		for connection in deadlines:
+			connection.close()
+		selector.close()
+		self.wakeup.close()
+		self.wakeup_signal.close()
+
+	def send_busy(self, connection):
+		"""Balas 'server busy' sesuai protokol request lalu tutup, tanpa memblok"""
+		body = json.dumps({"status": "ERROR", "message": "Server busy", "retry_after": self.retry_after})
+		try:
+			first = connection.recv(4, socket.MSG_PEEK)
+			if first:
+				if any(first[:len(prefix)] == prefix.encode()[:len(first)] for prefix in HTTP_PREFIXES):
+					reply = httpserver.response(503, 'Service Unavailable', body,
+								{'Content-Type': 'application/json', 'Retry-After': self.retry_after})
+				else:
+					# perintah game: client menunggu satu balasan JSON, bukan response HTTP
+					reply = body.encode()
+				# balasan kecil muat di buffer kirim socket, send() non-blocking cukup sekali
+				connection.send(reply)
+				# request yang belum dibaca dibuang dulu, close dengan data tersisa mengirim RST
+				connection.shutdown(socket.SHUT_WR)
+				connection.recv(65536)
+		except OSError:
+			pass
+		finally:
+			connection.close()
+
+	def metrics(self):
+		with self.lock:
+			served = self.admitted + self.rejected_wait
+			return {
+				"queue_depth": len(self.pending),
+				"queue_capacity": self.max_depth,
+				"queue_max_wait_ms": round(self.max_wait * 1000),
+				"workers": len(self.workers),
+				"busy_workers": self.busy,
+				"admitted": self.admitted,
+				"rejected_queue_full": self.rejected_full,
+				"rejected_queue_wait": self.rejected_wait,
+				"wait_ms_avg": round(self.wait_total / served * 1000, 3) if served else 0.0,
+				"wait_ms_ewma": round(self.wait_ewma * 1000, 3),
+				"wait_ms_max": round(self.wait_max * 1000, 3)
+			}
+
+	def shutdown(self):
+		with self.available:
+			self.running = False
+			self.available.notify_all()
+		self.wake()
+
+
+
 class Server(threading.Thread):
-	def __init__(self, host='0.0.0.0', port=8889, server_id="main", max_workers=10):
+	def __init__(self, host='0.0.0.0', port=8889, server_id="main", max_workers=10, reuse_port=False,
+				 queue_depth=64, queue_wait=2.0):
 		self.host = host
 		self.port = port
 		self.server_id = server_id
@@ -115,29 +795,39 @@ class Server(threading.Thread):
 		self.the_clients = []
 		self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 		self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		if reuse_port:
+			# Beberapa process worker bind port yang sama, kernel membagi koneksi masuk
+			self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 		self.my_socket.settimeout(1.0)  # Allow graceful shutdown
 		self.running = True
 		
-		# Thread pool for pool processing model
+		# Thread pool dengan antrian terbatas untuk model pool, statistiknya di GET /metrics
 		if processing_model == "pool":
-			self.executor = ThreadPoolExecutor(max_workers=max_workers)
-		elif processing_model == "process_pool":
-			self.executor = ProcessPoolExecutor(max_workers=max_workers)
+			self.work_queue = WorkQueue(self.handle_client_pool, server_id, max_workers, queue_depth, queue_wait)
+			httpserver.metrics[server_id] = self.work_queue.metrics
 		else:
-			self.executor = None
+			self.work_queue = None
 			
 		threading.Thread.__init__(self)
 
 	def handle_client_pool(self, connection, address):
-		"""Handle client using thread/process pool"""
+		"""Handle client using thread pool"""
 		client_handler = ProcessTheClient(connection, address, self.server_id)
 		client_handler.run()
 
 	def run(self):
 		try:
 			self.my_socket.bind((self.host, self.port))
-			self.my_socket.listen(20)  # Increased backlog
+			# Model selectors menerima ribuan koneksi, backlog harus cukup untuk lonjakan connect
+			self.my_socket.listen(1024 if processing_model == "selectors" else 20)  # Increased backlog
 			logging.info(f"[{self.server_id}] Server started on {self.host}:{self.port} using {processing_model} model")
+
+			if processing_model == "selectors":
+				self.run_selectors()
+				return
+			if processing_model == "asyncio":
+				asyncio.run(self.run_asyncio())
+				return
 			
 			while self.running:
 				try:
@@ -151,19 +841,13 @@ class Server(threading.Thread):
 						clt.start()
 						self.the_clients.append(clt)
 						
-					elif processing_model in ["pool", "process_pool"]:
-						# Pool-based model
-						if self.executor:
-							future = self.executor.submit(self.handle_client_pool, connection, client_address)
+					elif processing_model == "pool":
+						# Pool-based model, saat overload koneksi langsung dibalas 503
+						if self.work_queue:
+							self.work_queue.submit(connection, client_address)
 						else:
 							# Fallback to direct handling
 							self.handle_client_pool(connection, client_address)
-							
-					elif processing_model == "process":
-						# Process-based model (simplified)
-						clt = ProcessTheClient(connection, client_address, self.server_id)
-						clt.start()
-						self.the_clients.append(clt)
 					
 					# Clean up finished threads periodically
 					if len(self.the_clients) > 50:
@@ -181,45 +865,258 @@ class Server(threading.Thread):
 		finally:
 			self.cleanup()
 
+	def run_selectors(self, client_timeout=30.0):
+		"""
+		Satu thread melayani semua client lewat selectors.DefaultSelector
+		(epoll/kqueue/select), socket client non-blocking dengan buffer per koneksi.
+		"""
+		selector = selectors.DefaultSelector()
+		self.my_socket.setblocking(False)
+		selector.register(self.my_socket, selectors.EVENT_READ)
+		clients = {}
+		last_sweep = time.time()
+
+		def close_client(client):
+			selector.unregister(client.connection)
+			clients.pop(client.connection, None)
+			client.connection.close()
+
+		try:
+			while self.running:
+				for key, mask in selector.select(timeout=1.0):
+					if key.fileobj is self.my_socket:
+						# Terima semua koneksi yang sedang antri
+						while True:
+							try:
+								connection, client_address = self.my_socket.accept()
+							except (BlockingIOError, InterruptedError):
+								break
+							connection.setblocking(False)
+							client = SelectorConnection(connection, client_address, self.server_id)
+							clients[connection] = client
+							selector.register(connection, selectors.EVENT_READ, client)
+						continue
+
+					client = key.data
+					try:
+						if mask & selectors.EVENT_READ and not client.closing:
+							if not client.on_readable():
+								close_client(client)
+								continue
+							if client.outgoing:
+								selector.modify(client.connection, selectors.EVENT_WRITE, client)
+						if mask & selectors.EVENT_WRITE or (client.closing and client.outgoing):
+							if client.on_writable() and client.closing:
+								close_client(client)
+					except (BlockingIOError, InterruptedError):
+						pass
+					except (OSError, ValueError) as e:
+						logging.warning(f"[{self.server_id}] Connection {client.address} closed: {e}")
+						close_client(client)
+
+				# Tutup client yang diam terlalu lama, sama dengan timeout model thread
+				now = time.time()
+				if now - last_sweep >= 1.0:
+					last_sweep = now
+					for client in [c for c in clients.values() if now - c.last_activity > client_timeout]:
+						logging.warning(f"[{self.server_id}] Timeout for {client.address}")
+						close_client(client)
+		finally:
+			for client in list(clients.values()):
+				close_client(client)
+			selector.close()
+
+	async def run_asyncio(self):
+		"""Stream server asyncio di atas socket yang sudah di-bind, koneksi persistent"""
+		self.my_socket.setblocking(False)
+		server = await asyncio.start_server(self.handle_asyncio_client, sock=self.my_socket)
+		async with server:
+			while self.running:
+				await asyncio.sleep(1.0)
+
+	async def handle_asyncio_client(self, reader, writer, client_timeout=30.0):
+		"""
+		- Koneksi tetap terbuka untuk request berikutnya (keep-alive), perintah game
+		  dibalas satu baris JSON per perintah
+		- Semua request yang sudah lengkap diproses berurutan (pipelining), lalu
+		  drain() menahan pembacaan sampai buffer tulis turun di bawah batas
+		"""
+		address = writer.get_extra_info('peername')
+		loop = asyncio.get_running_loop()
+		parser = RequestParser()
+		writer.transport.set_write_buffer_limits(high=64 * 1024)
+		try:
+			keep_alive = True
+			while keep_alive:
+				try:
+					data = await asyncio.wait_for(reader.read(65536), client_timeout)
+				except asyncio.TimeoutError:
+					logging.warning(f"[{self.server_id}] Timeout for {address}")
+					break
+				if not data:
+					break
+				parser.feed(data)
+				request = parser.next_request()
+				while request is not None:
+					baris, headers, body = request
+					logging.info(f"[{self.server_id}] Data from {address}: {baris}")
+					if not baris.startswith(HTTP_PREFIXES):
+						# Game command: hanya operasi singkat pada store pemain,
+						# aman dijalankan langsung di event loop
+						writer.write(httpserver.proses_request(baris, headers, body) + b"\r\n")
+					else:
+						# HTTP bisa membaca file dari disk, jalankan di thread pool
+						# supaya event loop tidak terblok
+						hasil = await loop.run_in_executor(None, httpserver.proses_request, baris, headers, body)
+						parts = hasil if isinstance(hasil, list) else [hasil]
+						if wants_keep_alive(baris, headers):
+							parts[0] = parts[0].replace(b"Connection: close\r\n", b"Connection: keep-alive\r\n", 1)
+						else:
+							keep_alive = False
+							parts = parts + [b"\r\n\r\n"]
+						writer.writelines(parts)
+						if not keep_alive:
+							break
+					request = parser.next_request()
+				# Backpressure: tunggu client membaca jika buffer tulis penuh
+				await writer.drain()
+		except (OSError, ValueError) as e:
+			logging.warning(f"[{self.server_id}] Connection {address} closed: {e}")
+		finally:
+			writer.close()
+			try:
+				await writer.wait_closed()
+			except OSError:
+				pass
+
 	def stop(self):
 		"""Gracefully stop the server"""
 		logging.info(f"[{self.server_id}] Stopping server...")
 		self.running = False
-		if self.executor:
-			self.executor.shutdown(wait=True)
+		if self.work_queue:
+			self.work_queue.shutdown()
 
 	def cleanup(self):
 		"""Clean up resources"""
 		try:
 			self.my_socket.close()
-			if self.executor:
-				self.executor.shutdown(wait=False)
+			if self.work_queue:
+				self.work_queue.shutdown()
 			logging.info(f"[{self.server_id}] Server cleanup completed")
 		except:
 			pass
 
 
 
+def run_prefork_worker(host, port, server_id, store, model, max_workers, cleanup, queue_depth=64, queue_wait=2.0):
+	"""Entry point process worker: HttpServer di atas store bersama, socket dengan SO_REUSEPORT"""
+	global httpserver, processing_model
+	processing_model = model
+	httpserver = HttpServer(store=store, cleanup=cleanup)
+	server = Server(host=host, port=port, server_id=server_id, max_workers=max_workers,
+					reuse_port=hasattr(socket, 'SO_REUSEPORT'), queue_depth=queue_depth, queue_wait=queue_wait)
+	try:
+		server.run()
+	except KeyboardInterrupt:
+		pass
+
+
+
+class PreforkServer:
+	"""
+	Model process/process_pool: N process worker bind port yang sama dengan
+	SO_REUSEPORT sehingga kernel membagi koneksi ke semua core. Semua worker
+	memakai satu tabel pemain bersama (player_store.shared_player_store).
+	Interface-nya sama dengan Server (start, stop, join, is_alive).
+	"""
+	def __init__(self, host, port, server_id, store, processes, max_workers=10, queue_depth=64, queue_wait=2.0):
+		if not hasattr(socket, 'SO_REUSEPORT'):
+			logging.warning(f"[{server_id}] SO_REUSEPORT tidak didukung, hanya 1 process worker")
+			processes = 1
+		self.server_id = server_id
+		self.processes = []
+		for i in range(processes):
+			process = multiprocessing.Process(
+				target=run_prefork_worker,
+				args=(host, port, f"{server_id}/w{i+1}", store, PREFORK_MODELS[processing_model], max_workers, i == 0,
+					  queue_depth, queue_wait),
+				daemon=True)
+			self.processes.append(process)
+
+	def start(self):
+		for process in self.processes:
+			process.start()
+		logging.info(f"[{self.server_id}] Started {len(self.processes)} worker process(es)")
+
+	def is_alive(self):
+		return any(process.is_alive() for process in self.processes)
+
+	def stop(self):
+		for process in self.processes:
+			if process.is_alive():
+				process.terminate()
+
+	def join(self, timeout=None):
+		for process in self.processes:
+			process.join(timeout)
+
+
+
 class LoadBalancedServer:
 	"""Main server that can run multiple backend servers with load balancing"""
-	def __init__(self, configs):
+	def __init__(self, configs, store_backend="manager", capacity=1024, lb_port=8888):
 		self.servers = []
 		self.configs = configs
+		self.proxy = None
+		self.prober = None
+		self.endpoints = []  # (host, port) setiap instance di load balancer
 		global load_balancer
 		
-		# Create load balancer if multiple servers
+		# Create load balancer if multiple servers, client cukup connect ke front-end proxy
 		if len(configs) > 1:
-			server_endpoints = [(cfg['host'], cfg['port']) for cfg in configs]
+			server_endpoints = [('127.0.0.1' if cfg['host'] == '0.0.0.0' else cfg['host'], cfg['port']) for cfg in configs]
 			load_balancer = LoadBalancer(server_endpoints)
+			self.endpoints = server_endpoints
+			self.proxy = FrontendProxy(load_balancer, port=lb_port)
+			self.prober = HealthProber(load_balancer)
+		
+		# Model pre-fork: semua process di semua instance memakai satu tabel pemain
+		self.manager = None
+		self.shared_store = None
+		# Referensi ke store bersama dipegang selama server hidup: Process.start()
+		# membuang args-nya, dan proxy Manager yang tidak direferensikan lagi di
+		# process induk membuat dict dan Lock-nya dihapus sebelum worker memakainya
+		self.store = store = None
+		if processing_model in PREFORK_MODELS:
+			if store_backend == "shared_memory":
+				# record tetap di shared memory, dibaca worker tanpa IPC
+				self.shared_store = self.store = store = SharedMemoryPlayerStore(capacity)
+			else:
+				self.manager = multiprocessing.Manager()
+				self.store = store = shared_player_store(self.manager)
 		
 		# Create and start servers
 		for i, config in enumerate(configs):
-			server = Server(
-				host=config['host'], 
-				port=config['port'], 
-				server_id=f"server-{i+1}",
-				max_workers=config.get('max_workers', 10)
-			)
+			if processing_model in PREFORK_MODELS:
+				server = PreforkServer(
+					host=config['host'],
+					port=config['port'],
+					server_id=f"server-{i+1}",
+					store=store,
+					processes=config.get('processes', 1),
+					max_workers=config.get('max_workers', 10),
+					queue_depth=config.get('queue_depth', 64),
+					queue_wait=config.get('queue_wait', 2.0)
+				)
+			else:
+				server = Server(
+					host=config['host'], 
+					port=config['port'], 
+					server_id=f"server-{i+1}",
+					max_workers=config.get('max_workers', 10),
+					queue_depth=config.get('queue_depth', 64),
+					queue_wait=config.get('queue_wait', 2.0)
+				)
 			self.servers.append(server)
 	
 	def start_all(self):
@@ -227,6 +1124,9 @@ class LoadBalancedServer:
 		logging.info(f"Starting {len(self.servers)} server(s) with {processing_model} processing model")
 		for server in self.servers:
 			server.start()
+		if self.proxy:
+			self.proxy.start()
+			self.prober.start()
 		
 		# Monitor servers
 		try:
@@ -234,6 +1134,11 @@ class LoadBalancedServer:
 				time.sleep(10)
 				active_servers = sum(1 for s in self.servers if s.is_alive())
 				logging.info(f"Active servers: {active_servers}/{len(self.servers)}")
+				# instance yang mati tidak dijalankan ulang, keluarkan dari ring
+				for server, endpoint in zip(self.servers, self.endpoints):
+					if not server.is_alive() and endpoint in load_balancer.servers:
+						logging.error(f"Server {endpoint[0]}:{endpoint[1]} stopped, removed from load balancer")
+						load_balancer.remove_server(*endpoint)
 				
 				if active_servers == 0:
 					logging.error("All servers have stopped!")
@@ -245,18 +1150,28 @@ class LoadBalancedServer:
 	
 	def stop_all(self):
 		"""Stop all servers"""
+		if self.proxy:
+			self.proxy.stop()
+			self.prober.stop()
 		for server in self.servers:
 			server.stop()
 		
 		# Wait for servers to stop
 		for server in self.servers:
 			server.join(timeout=5)
+		
+		self.store = None
+		if self.manager:
+			self.manager.shutdown()
+		if self.shared_store:
+			self.shared_store.close()
+			self.shared_store = None
 
 def main():
 	global processing_model
 	
 	parser = argparse.ArgumentParser(description='Knight Game Multiplayer Server')
-	parser.add_argument('--model', choices=['thread', 'process', 'pool', 'process_pool'], 
+	parser.add_argument('--model', choices=['thread', 'process', 'pool', 'process_pool', 'selectors', 'asyncio'], 
 					   default='thread', help='Processing model (default: thread)')
 	parser.add_argument('--servers', type=int, default=1, 
 					   help='Number of server instances (default: 1)')
@@ -264,6 +1179,18 @@ def main():
 					   help='Starting port number (default: 8889)')
 	parser.add_argument('--workers', type=int, default=10, 
 					   help='Max workers for pool models (default: 10)')
+	parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+					   help='Worker processes per instance for process/process_pool models (default: CPU count)')
+	parser.add_argument('--store', choices=['manager', 'shared_memory'], default='manager',
+					   help='Shared player table for process/process_pool models (default: manager)')
+	parser.add_argument('--lb-port', type=int, default=8888,
+					   help='Front-end proxy port when --servers > 1 (default: 8888)')
+	parser.add_argument('--capacity', type=int, default=1024,
+					   help='Max players for --store shared_memory (default: 1024)')
+	parser.add_argument('--queue-depth', type=int, default=64,
+					   help='Max queued connections per pool before answering 503 (default: 64)')
+	parser.add_argument('--queue-wait', type=float, default=2.0,
+					   help='Max seconds a connection may wait in the pool queue (default: 2.0)')
 	
 	args = parser.parse_args()
 	processing_model = args.model
@@ -274,12 +1201,15 @@ def main():
 		config = {
 			'host': '0.0.0.0',
 			'port': args.port + i,
-			'max_workers': args.workers
+			'max_workers': args.workers,
+			'processes': args.processes,
+			'queue_depth': args.queue_depth,
+			'queue_wait': args.queue_wait
 		}
 		server_configs.append(config)
 	
 	# Start load balanced server
-	lb_server = LoadBalancedServer(server_configs)
+	lb_server = LoadBalancedServer(server_configs, args.store, args.capacity, args.lb_port)
 	
 	try:
 		lb_server.start_all()
@@ -4,56 +4,461 @@ import threading
 import time
 import sys
 import logging
+import errno
+import os
+import selectors
+import re
+from collections import deque
 
 
 
-class ProcessTheClient(threading.Thread):
-	def __init__(self, connection, address, destination_sock_address):
-		self.destination_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-		self.destination_sock.connect(destination_sock_address)
-		self.connection = connection
-		self.address = address
-		threading.Thread.__init__(self)
+class RelayBuffer:
+	"""
+	Buffer berukuran tetap untuk satu arah relay. Data dibaca langsung ke
+	bytearray dengan recv_into dan dikirim dari memoryview tanpa salinan, jadi
+	memori per koneksi tetap walaupun trafiknya besar atau pipelined.
+	"""
+	def __init__(self, size):
+		self.data = bytearray(size)
+		self.view = memoryview(self.data)
+		self.start = 0
+		self.end = 0
 
-	def run(self):
-		rcv=""
-		while True:
-			try:
-				data = self.connection.recv(8192)
-				if data:
-					self.destination_sock.sendall(data)
-					data_balasan = self.destination_sock.recv(8192)
-					self.connection.sendall(data_balasan)
-					logging.warning(data)
-					logging.warning(data_balasan)
+	def __len__(self):
+		return self.end - self.start
+
+	def space(self):
+		return len(self.data) - len(self)
+
+	def recv_from(self, sock):
+		"""Return jumlah byte yang dibaca, 0 berarti EOF"""
+		if self.end == len(self.data):
+			# geser sisa data ke depan supaya ada ruang di belakang
+			pending = len(self)
+			self.data[:pending] = self.view[self.start:self.end]
+			self.start, self.end = 0, pending
+		count = sock.recv_into(self.view[self.end:])
+		self.end += count
+		return count
+
+	def send_to(self, sock):
+		sent = sock.send(self.view[self.start:self.end])
+		self.start += sent
+		if self.start == self.end:
+			self.start = self.end = 0
+		return sent
+
+	def tail(self, count):
+		"""count byte terakhir yang baru dibaca recv_from"""
+		return self.view[self.end - count:self.end]
+
+
+
+class MessageCounter:
+	"""
+	Menghitung pesan yang sudah lengkap di satu arah relay, dipakai untuk
+	memastikan backend sudah selesai membalas semua request sebelum koneksinya
+	dikembalikan ke pool. Pesan yang dikenali:
+
+	- request dan response HTTP: header sampai \\r\\n\\r\\n lalu Content-Length byte body
+	- perintah game (arah request): satu baris yang diakhiri \\r\\n
+	- balasan perintah game (arah response): satu nilai JSON, selesai saat kurung
+	  kembali seimbang, \\r\\n sesudahnya (jika ada) diabaikan
+
+	Jika batas pesan tidak bisa ditentukan (response tanpa Content-Length,
+	Connection: close, data yang tidak dikenal) counter ditandai unframed dan
+	koneksi backend tidak pernah dipakai ulang.
+	"""
+	IDLE = 0  # di antara dua pesan
+	HEAD = 1  # menunggu akhir baris pertama / header
+	BODY = 2  # melewati Content-Length byte body
+	JSON = 3  # balasan JSON perintah game
 
+	SPECIAL = re.compile(rb'[][{}"\\]')
+	REQUEST_PREFIXES = (b'GET', b'POST', b'HTTP')
+
+	def __init__(self, response, max_header=65536):
+		self.response = response
+		self.max_header = max_header
+		self.completed = 0
+		self.unframed = False
+		self.state = self.IDLE
+		self.head = bytearray()  # header pesan yang sedang dibaca
+		self.remaining = 0
+		self.depth = 0
+		self.in_string = False
+		self.escape = False
+
+	def idle(self):
+		"""True jika tidak ada pesan yang baru sebagian terbaca"""
+		return self.state == self.IDLE and not self.unframed
+
+	def feed(self, data):
+		position = 0
+		while position < len(data) and not self.unframed:
+			if self.state == self.IDLE:
+				# \r\n di antara pesan (misal penutup setelah body) bukan pesan baru
+				while position < len(data) and data[position] in b"\r\n":
+					position += 1
+				if position == len(data):
+					return
+				if self.response and data[position] in b"{[":
+					self.state = self.JSON
+					self.depth = 0
 				else:
-					break
+					self.state = self.HEAD
+					self.head.clear()
+			if self.state == self.HEAD:
+				position = self._feed_head(data, position)
+			elif self.state == self.BODY:
+				taken = min(self.remaining, len(data) - position)
+				position += taken
+				self.remaining -= taken
+				if not self.remaining:
+					self._complete()
+			else:
+				position = self._feed_json(data, position)
+
+	def _complete(self):
+		self.completed += 1
+		self.state = self.IDLE
+
+	def _feed_head(self, data, position):
+		before = len(self.head)
+		self.head += data[position:]
+		line_end = self.head.find(b"\r\n", max(0, before - 1))
+		if line_end >= 0 and not self.head.startswith(b'HTTP' if self.response else self.REQUEST_PREFIXES):
+			if self.response:
+				self.unframed = True  # response yang tidak dikenal
+			else:
+				self._complete()  # perintah game satu baris
+			return position + line_end + 2 - before
+		header_end = self.head.find(b"\r\n\r\n", max(0, before - 3))
+		if header_end < 0:
+			if len(self.head) > self.max_header:
+				self.unframed = True
+			return len(data)
+		length = None
+		for line in bytes(self.head[:header_end]).split(b"\r\n")[1:]:
+			key, _, value = line.partition(b':')
+			key = key.strip().lower()
+			if key == b'content-length':
+				length = int(value.strip()) if value.strip().isdigit() else None
+			elif key == b'connection' and value.strip().lower() == b'close':
+				self.unframed = True  # backend akan menutup koneksi ini
+		if length is None:
+			if self.response:
+				self.unframed = True  # body dibatasi penutupan koneksi
+			length = 0
+		position += header_end + 4 - before
+		self.remaining = length
+		self.state = self.BODY
+		if not length:
+			self._complete()
+		return position
+
+	def _feed_json(self, data, position):
+		skip = position if self.escape else -1
+		self.escape = False
+		for match in self.SPECIAL.finditer(data, position):
+			index = match.start()
+			if index == skip:
+				continue
+			char = data[index]
+			if self.in_string:
+				if char == 0x5C:  # backslash, byte sesudahnya bagian dari string
+					skip = index + 1
+					self.escape = skip == len(data)
+				elif char == 0x22:
+					self.in_string = False
+			elif char == 0x22:
+				self.in_string = True
+			elif char in b"{[":
+				self.depth += 1
+			elif char in b"}]":
+				self.depth -= 1
+				if self.depth <= 0:
+					self._complete()
+					return index + 1
+		return len(data)
+
+
+
+class BackendPool:
+	"""
+	Koneksi warm ke backend. Koneksi yang idle tetap didaftarkan di selector
+	supaya langsung dibuang jika backend menutupnya, dan dicek sekali lagi
+	dengan MSG_PEEK sebelum dipakai ulang.
+	"""
+	def __init__(self, address, size=8):
+		self.address = address
+		self.size = size
+		self.idle = deque()
+
+	def connect(self):
+		"""Socket non-blocking baru, return (socket, masih_connecting)"""
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		sock.setblocking(False)
+		error = sock.connect_ex(self.address)
+		if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+			sock.close()
+			raise OSError(error, os.strerror(error))
+		return sock, error != 0
+
+	def warm(self):
+		"""Isi pool sampai penuh dengan koneksi blocking sebelum proxy mulai menerima client"""
+		while len(self.idle) < self.size:
+			try:
+				sock = socket.create_connection(self.address, timeout=1.0)
 			except OSError as e:
-				pass
-		self.connection.close()
+				logging.warning(f"Warm connection to {self.address} failed: {e}")
+				return
+			sock.setblocking(False)
+			self.idle.append(sock)
+
+	def acquire(self):
+		while self.idle:
+			sock = self.idle.popleft()
+			if is_idle(sock):
+				return sock, False
+			sock.close()
+		return self.connect()
+
+	def release(self, sock):
+		"""Return False jika pool penuh atau koneksi tidak bersih, pemanggil menutupnya"""
+		if len(self.idle) >= self.size or not is_idle(sock):
+			return False
+		self.idle.append(sock)
+		return True
+
+	def discard(self, sock):
+		if sock in self.idle:
+			self.idle.remove(sock)
+
+	def close(self):
+		while self.idle:
+			self.idle.popleft().close()
+
+
+
+def is_idle(sock):
+	"""True jika koneksi masih terbuka dan tidak ada data yang belum dibaca"""
+	try:
+		# b'' berarti sudah ditutup backend, data berarti sisa response yang tidak diminta
+		sock.recv(1, socket.MSG_PEEK)
+		return False
+	except (BlockingIOError, InterruptedError):
+		return True
+	except OSError:
+		return False
+
+
+
+class RelayConnection:
+	"""Satu client dan koneksi backend pasangannya"""
+	def __init__(self, client, address, buffer_size):
+		self.client = client
+		self.address = address
+		self.backend = None
+		self.connecting = False
+		self.to_backend = RelayBuffer(buffer_size)
+		self.to_client = RelayBuffer(buffer_size)
+		self.client_eof = False
+		self.backend_eof = False
+		self.backend_shut = False
+		self.client_shut = False
+		self.requests = MessageCounter(response=False)
+		self.responses = MessageCounter(response=True)
+		self.closed = False
+
+	def awaiting(self):
+		"""True jika masih ada request yang belum dibalas lengkap oleh backend"""
+		return self.responses.completed < self.requests.completed or not self.responses.idle()
+
+	def reusable(self):
+		"""Backend sudah membalas semua request dengan lengkap dan tidak ada data tersisa"""
+		return (self.requests.idle() and self.responses.idle()
+				and self.requests.completed == self.responses.completed
+				and not self.to_backend and not self.to_client
+				and not self.backend_eof and not self.backend_shut)
 
 
 
 class Server(threading.Thread):
-	def __init__(self):
-		self.the_clients = []
-		self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-		self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	"""
+	Proxy TCP event-driven: satu thread dan satu selector untuk semua client.
+	Kedua arah dipompa terpisah (full-duplex) sehingga response besar, request
+	pipelined dan data yang dikirim backend tanpa diminta tetap mengalir.
+	Setiap arah memakai RelayBuffer berukuran tetap sebagai backpressure: sisi
+	pengirim berhenti dibaca selama buffer ke sisi lain penuh.
 
-		self.destination_sock_address = ('localhost',8889)
+	Koneksi backend diambil dari BackendPool. Setelah client menutup koneksi,
+	koneksi backend dikembalikan ke pool jika tidak ada request yang belum
+	dibalas lengkap dan tidak ada data tersisa di kedua arah. Request dan
+	response dihitung dengan MessageCounter, jadi response yang baru terkirim
+	sebagian atau balasan request pipelined yang belum datang tidak pernah
+	bocor ke client berikutnya.
+	"""
+	def __init__(self, host='0.0.0.0', port=18000, destination=('localhost', 8889), pool_size=8, buffer_size=65536):
+		self.host = host
+		self.port = port
+		self.pool = BackendPool(destination, pool_size)
+		self.buffer_size = buffer_size
+		self.running = True
+		self.selector = selectors.DefaultSelector()
+		self.registered = {}  # {socket: mask}
 		threading.Thread.__init__(self)
 
 	def run(self):
-		self.my_socket.bind(('0.0.0.0', 18000))
-		self.my_socket.listen(1)
+		listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		listener.bind((self.host, self.port))
+		listener.listen(1024)
+		listener.setblocking(False)
+		self.selector.register(listener, selectors.EVENT_READ)
+		self.pool.warm()
+		for sock in self.pool.idle:
+			self.watch(sock, selectors.EVENT_READ, None)
+		logging.warning(f"proxy {self.host}:{self.port} -> {self.pool.address}")
+		try:
+			while self.running:
+				for key, mask in self.selector.select(timeout=1.0):
+					if key.fileobj is listener:
+						self.accept(listener)
+						continue
+					if key.data is None:
+						# koneksi idle di pool ditutup backend (atau mengirim data tak terduga)
+						self.drop_idle(key.fileobj)
+						continue
+					conn, side = key.data
+					if conn.closed:
+						continue
+					try:
+						if side == 'client':
+							self.on_client(conn, mask)
+						else:
+							self.on_backend(conn, mask)
+						self.update(conn)
+					except OSError as e:
+						logging.warning(f"connection {conn.address} closed: {e}")
+						self.close(conn)
+		finally:
+			for sock in list(self.registered):
+				sock.close()
+			self.pool.close()
+			self.selector.close()
+			listener.close()
+
+	def stop(self):
+		self.running = False
+
+	def accept(self, listener):
 		while True:
-			self.connection, self.client_address = self.my_socket.accept()
-			logging.warning("connection from {}".format(self.client_address))
+			try:
+				client, address = listener.accept()
+			except (BlockingIOError, InterruptedError):
+				return
+			logging.warning("connection from {}".format(address))
+			client.setblocking(False)
+			conn = RelayConnection(client, address, self.buffer_size)
+			try:
+				conn.backend, conn.connecting = self.pool.acquire()
+			except OSError as e:
+				logging.warning(f"backend {self.pool.address} unavailable: {e}")
+				client.close()
+				continue
+			self.update(conn)
+
+	def watch(self, sock, mask, data):
+		current = self.registered.get(sock)
+		if not mask:
+			if current is not None:
+				self.selector.unregister(sock)
+				del self.registered[sock]
+		elif current is None:
+			self.selector.register(sock, mask, data)
+			self.registered[sock] = mask
+		elif mask != current or self.selector.get_key(sock).data != data:
+			self.selector.modify(sock, mask, data)
+			self.registered[sock] = mask
+
+	def drop_idle(self, sock):
+		self.pool.discard(sock)
+		self.watch(sock, 0, None)
+		sock.close()
 
-			clt = ProcessTheClient(self.connection, self.client_address,self.destination_sock_address)
-			clt.start()
-			self.the_clients.append(clt)
+	def on_client(self, conn, mask):
+		if mask & selectors.EVENT_READ:
+			count = conn.to_backend.recv_from(conn.client)
+			if count == 0:
+				conn.client_eof = True
+			else:
+				conn.requests.feed(conn.to_backend.tail(count))
+		if mask & selectors.EVENT_WRITE and conn.to_client:
+			conn.to_client.send_to(conn.client)
+
+	def on_backend(self, conn, mask):
+		if conn.connecting:
+			if not mask & selectors.EVENT_WRITE:
+				return
+			error = conn.backend.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+			if error:
+				raise OSError(error, os.strerror(error))
+			conn.connecting = False
+		if mask & selectors.EVENT_READ:
+			count = conn.to_client.recv_from(conn.backend)
+			if count == 0:
+				conn.backend_eof = True
+			else:
+				conn.responses.feed(conn.to_client.tail(count))
+		if mask & selectors.EVENT_WRITE and conn.to_backend:
+			conn.to_backend.send_to(conn.backend)
+
+	def update(self, conn):
+		"""Atur event yang ditunggu, half-close, pengembalian ke pool dan penutupan"""
+		if not conn.connecting:
+			upstream_done = conn.client_eof and not conn.to_backend
+			downstream_done = conn.backend_eof and not conn.to_client
+			if upstream_done and conn.reusable():
+				# client selesai dan backend sudah membalas semuanya: koneksi backend bisa dipakai ulang
+				self.close(conn, reuse_backend=True)
+				return
+			if upstream_done and not conn.backend_shut:
+				# request terakhir belum dibalas, teruskan EOF ke backend
+				conn.backend.shutdown(socket.SHUT_WR)
+				conn.backend_shut = True
+			if downstream_done and not conn.client_shut:
+				conn.client.shutdown(socket.SHUT_WR)
+				conn.client_shut = True
+			if upstream_done and downstream_done:
+				self.close(conn)
+				return
+
+		client_mask = 0
+		if not conn.client_eof and conn.to_backend.space():
+			client_mask |= selectors.EVENT_READ
+		if conn.to_client:
+			client_mask |= selectors.EVENT_WRITE
+		self.watch(conn.client, client_mask, (conn, 'client'))
+
+		backend_mask = 0
+		if conn.connecting or conn.to_backend:
+			backend_mask |= selectors.EVENT_WRITE
+		if not conn.connecting and not conn.backend_eof and conn.to_client.space():
+			backend_mask |= selectors.EVENT_READ
+		self.watch(conn.backend, backend_mask, (conn, 'backend'))
+
+	def close(self, conn, reuse_backend=False):
+		conn.closed = True
+		self.watch(conn.client, 0, None)
+		conn.client.close()
+		self.watch(conn.backend, 0, None)
+		if reuse_backend and self.pool.release(conn.backend):
+			# tetap dipantau selama idle supaya penutupan dari backend terdeteksi
+			self.watch(conn.backend, selectors.EVENT_READ, None)
+		else:
+			conn.backend.close()
+		conn.backend = None
 
 
 
@@ -63,4 +468,3 @@ def main():
 
 if __name__=="__main__":
 	main()
-
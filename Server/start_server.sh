@@ -48,7 +48,7 @@ custom_config() {
     echo "Custom Configuration"
     echo "===================="
     
-    read -p "Processing model (thread/process/pool/process_pool) [thread]: " model
+    read -p "Processing model (thread/process/pool/process_pool/selectors/asyncio) [thread]: " model
     read -p "Number of server instances (1-5) [1]: " servers
     read -p "Workers per instance (5-50) [10]: " workers
     read -p "Starting port [8889]: " port
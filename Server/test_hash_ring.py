@@ -0,0 +1,71 @@
+"""
+Test HashRing: pemetaan stabil dan hanya sebagian kecil pemain yang pindah
+saat backend ditambah atau dihapus.
+
+    python -m unittest test_hash_ring
+"""
+
+import unittest
+
+from hash_ring import HashRing
+
+SERVERS = [('127.0.0.1', 9000 + i) for i in range(4)]
+KEYS = [str(player_id) for player_id in range(4000)]
+
+
+def assignment(ring):
+	return {key: ring.lookup(key) for key in KEYS}
+
+
+class HashRingTest(unittest.TestCase):
+	def test_lookup_is_deterministic(self):
+		self.assertEqual(assignment(HashRing(SERVERS)), assignment(HashRing(reversed(SERVERS))))
+
+	def test_load_is_spread(self):
+		counts = {}
+		for server in assignment(HashRing(SERVERS)).values():
+			counts[server] = counts.get(server, 0) + 1
+		self.assertEqual(set(counts), set(SERVERS))
+		for count in counts.values():
+			self.assertLess(abs(count - len(KEYS) / len(SERVERS)), len(KEYS) / len(SERVERS) * 0.35)
+
+	def test_adding_server_moves_about_one_nth(self):
+		ring = HashRing(SERVERS)
+		before = assignment(ring)
+		added = ('127.0.0.1', 9100)
+		ring.add(added)
+		after = assignment(ring)
+		moved = [key for key in KEYS if before[key] != after[key]]
+		# pemain yang pindah hanya pindah ke backend baru
+		self.assertTrue(all(after[key] == added for key in moved))
+		self.assertLess(len(moved), len(KEYS) / (len(SERVERS) + 1) * 1.5)
+
+	def test_removing_server_only_moves_its_players(self):
+		ring = HashRing(SERVERS)
+		before = assignment(ring)
+		ring.remove(SERVERS[0])
+		after = assignment(ring)
+		for key in KEYS:
+			if before[key] != SERVERS[0]:
+				self.assertEqual(after[key], before[key])
+			else:
+				self.assertNotEqual(after[key], SERVERS[0])
+		self.assertNotIn(SERVERS[0], ring.owners)
+
+	def test_rejected_server_is_skipped(self):
+		ring = HashRing(SERVERS)
+		before = assignment(ring)
+		down = SERVERS[1]
+		for key in KEYS:
+			server = ring.lookup(key, accept=lambda server: server != down)
+			self.assertNotEqual(server, down)
+			if before[key] != down:
+				self.assertEqual(server, before[key])
+		self.assertIsNone(ring.lookup('1', accept=lambda server: False))
+
+	def test_empty_ring(self):
+		self.assertIsNone(HashRing().lookup('1'))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,154 @@
+"""
+Test PlayerStore (copy-on-write, expiry lewat heap), SharedMemoryPlayerStore
+dan siklus hidup room di HttpServer.
+
+    python -m unittest test_player_store
+"""
+
+import multiprocessing
+import time
+import unittest
+
+from http import HttpServer, DEFAULT_ROOM
+from player_store import PlayerStore, SharedMemoryPlayerStore, _home, _key
+
+
+def set_from_child(store, player_id, x):
+	store.set(player_id, {'x': x, 'y': 2, 'health': 50})
+
+
+class PlayerStoreTest(unittest.TestCase):
+	def test_snapshot_is_copy_on_write(self):
+		store = PlayerStore()
+		store.set('a', {'x': 1})
+		snapshot = store.snapshot()
+		store.set('b', {'x': 2})
+		store.remove('a')
+		self.assertEqual(list(snapshot), ['a'])
+		self.assertEqual(store.ids(), ['b'])
+
+	def test_expire_removes_inactive_players(self):
+		store = PlayerStore()
+		store.set('idle', {})
+		store.set('active', {})
+		time.sleep(0.15)
+		store.set('active', {})
+		self.assertEqual(store.expire(0.1), ['idle'])
+		self.assertEqual(store.ids(), ['active'])
+		# entri 'active' yang jatuh tempo dijadwalkan ulang, bukan dihapus
+		self.assertEqual(len(store.deadlines), 1)
+		self.assertEqual(store.expire(0.1), [])
+		time.sleep(0.15)
+		self.assertEqual(store.expire(0.1), ['active'])
+		self.assertEqual((store.deadlines, store.scheduled), ([], set()))
+
+	def test_removed_player_leaves_heap_on_expiry(self):
+		store = PlayerStore()
+		store.set('a', {})
+		store.remove('a')
+		time.sleep(0.15)
+		self.assertEqual(store.expire(0.1), [])
+		self.assertEqual(store.deadlines, [])
+
+	def test_retired_store_rejects_writes(self):
+		store = PlayerStore()
+		store.set('a', {})
+		self.assertFalse(store.retire())
+		store.remove('a')
+		self.assertTrue(store.retire())
+		self.assertIsNone(store.set('a', {}))
+
+
+class SharedMemoryPlayerStoreTest(unittest.TestCase):
+	def setUp(self):
+		self.store = SharedMemoryPlayerStore(capacity=8)
+
+	def tearDown(self):
+		self.store.close()
+
+	def test_set_get_remove(self):
+		self.assertTrue(self.store.set('p1', {'x': 10, 'y': -5, 'health': 80, 'is_attacking': True}))
+		self.assertEqual(self.store.get('p1'), {
+			'x': 10, 'y': -5, 'facing_right': True, 'is_attacking': True, 'health': 80, 'is_hit': False})
+		self.store.set('p1', {'x': 11, 'y': -5, 'health': 80})
+		self.assertEqual(self.store.get('p1')['x'], 11)
+		self.assertEqual(self.store.count(), 1)
+		self.store.remove('p1')
+		self.assertIsNone(self.store.get('p1'))
+		self.assertEqual(self.store.ids(), [])
+
+	def test_capacity_and_key_length(self):
+		for i in range(8):
+			self.assertTrue(self.store.set(f'p{i}', {}))
+		self.assertFalse(self.store.set('overflow', {}))
+		self.assertFalse(self.store.set('x' * 33, {}))
+		self.assertEqual(sorted(self.store.ids()), sorted(f'p{i}' for i in range(8)))
+
+	def test_remove_keeps_probe_chain(self):
+		# pemain dengan slot awal yang sama, yang dihapus di tengah rantai probing
+		colliding = [p for p in (f'c{i}' for i in range(200)) if _home(_key(p), 8) == 3][:3]
+		for player_id in colliding:
+			self.store.set(player_id, {'x': 1})
+		self.store.remove(colliding[0])
+		for player_id in colliding[1:]:
+			self.assertIsNotNone(self.store.get(player_id))
+		self.store.set(colliding[0], {'x': 2})
+		self.assertEqual(self.store.count(), 3)
+
+	def test_expire(self):
+		self.store.set('old', {})
+		time.sleep(0.15)
+		self.store.set('new', {})
+		self.assertEqual(self.store.expire(0.1), ['old'])
+		self.assertEqual(self.store.ids(), ['new'])
+
+	def test_visible_from_another_process(self):
+		child = multiprocessing.Process(target=set_from_child, args=(self.store, 'remote', 7))
+		child.start()
+		child.join(30)
+		self.assertEqual(child.exitcode, 0)
+		self.assertEqual(self.store.get('remote')['x'], 7)
+
+
+class RoomLifecycleTest(unittest.TestCase):
+	def test_reads_do_not_create_rooms(self):
+		server = HttpServer(cleanup=False)
+		self.assertEqual(server.get_all_players('ghost'), [])
+		self.assertIsNone(server.get_player_state('p', 'ghost'))
+		server.remove_player('p', 'ghost')
+		self.assertNotIn('ghost', server.rooms)
+
+	def test_empty_room_is_retired(self):
+		server = HttpServer()
+		server.player_timeout = 0.1
+		server.expiry_tick = 0.02
+		server.set_player_state('p', {'x': 1}, 'arena')
+		store = server.rooms['arena']
+		self.assertEqual(server.get_player_state('p', 'arena'), {'x': 1})
+		deadline = time.monotonic() + 5
+		while 'arena' in server.rooms and time.monotonic() < deadline:
+			time.sleep(0.02)
+		self.assertNotIn('arena', server.rooms)
+		self.assertIn(DEFAULT_ROOM, server.rooms)
+		# penulis yang masih memegang store lama pindah ke room yang dibuat ulang
+		self.assertIsNone(store.set('p', {}))
+		server.set_player_state('p', {'x': 2}, 'arena')
+		self.assertIsNot(server.rooms['arena'], store)
+		self.assertEqual(server.get_player_state('p', 'arena'), {'x': 2})
+
+	def test_shared_store_counts_are_the_same_in_every_worker(self):
+		shared = SharedMemoryPlayerStore(capacity=16)
+		try:
+			workers = [HttpServer(store=shared, cleanup=False) for _ in range(2)]
+			workers[0].set_player_state('1', {'x': 1}, 'arena')
+			workers[0].set_player_state('2', {'x': 1}, 'arena')
+			workers[1].set_player_state('3', {'x': 1})
+			for worker in workers:
+				self.assertEqual(worker.room_counts(), {DEFAULT_ROOM: 1, 'arena': 2})
+				self.assertEqual(sorted(worker.get_all_players('arena')), ['1', '2'])
+		finally:
+			shared.close()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,146 @@
+"""
+Test socket_proxy: MessageCounter mengenali batas pesan, dan koneksi backend
+hanya dikembalikan ke pool setelah semua response lengkap sehingga sisa
+response tidak pernah sampai ke client berikutnya.
+
+    python -m unittest test_socket_proxy
+"""
+
+import logging
+import socket
+import threading
+import time
+import unittest
+
+import socket_proxy
+from socket_proxy import MessageCounter
+
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+
+class MessageCounterTest(unittest.TestCase):
+	def feed_bytes(self, counter, data):
+		# satu byte per feed, batas pesan bisa jatuh di mana saja
+		for i in range(len(data)):
+			counter.feed(data[i:i + 1])
+
+	def test_pipelined_http_responses(self):
+		counter = MessageCounter(response=True)
+		data = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello" * 2 + b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhe"
+		self.feed_bytes(counter, data)
+		self.assertEqual(counter.completed, 2)
+		self.assertFalse(counter.idle())
+		counter.feed(b"llo")
+		self.assertEqual(counter.completed, 3)
+		self.assertTrue(counter.idle())
+
+	def test_game_commands_and_json_replies(self):
+		requests = MessageCounter(response=False)
+		requests.feed(b"get_all_players\r\nset_player_state 1 {\"x\": 1}\r\nGET / HTTP/1.1\r\n\r\n")
+		self.assertEqual(requests.completed, 3)
+		replies = MessageCounter(response=True)
+		self.feed_bytes(replies, b'{"a": "}\\"{", "b": [1, {"c": 2}]}\r\n[1, 2]')
+		self.assertEqual(replies.completed, 2)
+		self.assertTrue(replies.idle())
+
+	def test_unframed_responses(self):
+		for data in (b"HTTP/1.1 200 OK\r\n\r\nbody", b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 1\r\n\r\nx", b"garbage\r\n"):
+			counter = MessageCounter(response=True)
+			counter.feed(data)
+			self.assertTrue(counter.unframed, data)
+			self.assertFalse(counter.idle())
+
+
+class PoolingTest(unittest.TestCase):
+	"""Backend membalas setiap baris dengan JSON dalam dua potong, potongan kedua terlambat"""
+	def setUp(self):
+		logging.disable(logging.WARNING)
+		self.backend = socket.socket()
+		self.backend.bind(('127.0.0.1', 0))
+		self.backend.listen(16)
+		threading.Thread(target=self.accept, daemon=True).start()
+		self.proxy = socket_proxy.Server(host='127.0.0.1', port=free_port(),
+										 destination=self.backend.getsockname(), pool_size=1)
+		self.proxy.daemon = True
+		self.proxy.start()
+		deadline = time.monotonic() + 5
+		while not self.proxy.pool.idle and time.monotonic() < deadline:
+			time.sleep(0.01)
+
+	def tearDown(self):
+		self.proxy.stop()
+		self.proxy.join(5)
+		self.backend.close()
+		logging.disable(logging.NOTSET)
+
+	def accept(self):
+		while True:
+			try:
+				connection, _ = self.backend.accept()
+			except OSError:
+				return
+			threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+	def serve(self, connection):
+		buffer = b''
+		with connection:
+			while True:
+				data = connection.recv(4096)
+				if not data:
+					return
+				buffer += data
+				while b"\r\n" in buffer:
+					line, buffer = buffer.split(b"\r\n", 1)
+					connection.sendall(b'{"reply": "' + line + b'", ')
+					time.sleep(0.2)
+					connection.sendall(b'"end": 1}\r\n')
+
+	def connect(self):
+		sock = socket.create_connection(('127.0.0.1', self.proxy.port), timeout=5)
+		self.addCleanup(sock.close)
+		return sock
+
+	def read_replies(self, sock, count):
+		data = b''
+		while data.count(b"}") < count:
+			chunk = sock.recv(4096)
+			if not chunk:
+				break
+			data += chunk
+		return data
+
+	def wait_for_idle(self, count):
+		deadline = time.monotonic() + 5
+		while len(self.proxy.pool.idle) != count and time.monotonic() < deadline:
+			time.sleep(0.01)
+		return len(self.proxy.pool.idle)
+
+	def test_partial_response_does_not_leak(self):
+		first = self.connect()
+		first.sendall(b"first\r\n")
+		self.assertIn(b'"first"', first.recv(4096))
+		first.close()  # sebelum potongan kedua response datang
+		second = self.connect()
+		second.sendall(b"second\r\n")
+		reply = self.read_replies(second, 1)
+		self.assertNotIn(b"first", reply)
+		self.assertEqual(reply, b'{"reply": "second", "end": 1}\r\n')
+
+	def test_complete_exchange_returns_backend_to_pool(self):
+		client = self.connect()
+		client.sendall(b"a\r\nb\r\n")
+		self.assertEqual(self.read_replies(client, 2).count(b'"end": 1'), 2)
+		client.shutdown(socket.SHUT_WR)
+		self.assertEqual(client.recv(4096), b'')
+		self.assertEqual(self.wait_for_idle(1), 1)
+		reused = self.connect()
+		reused.sendall(b"c\r\n")
+		self.assertEqual(self.read_replies(reused, 1), b'{"reply": "c", "end": 1}\r\n')
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,102 @@
+"""
+Test WorkQueue: koneksi ditolak dengan 503 saat antrian penuh atau terlalu
+lama menunggu, juga saat semua worker masih sibuk.
+
+    python -m unittest test_work_queue
+"""
+
+import json
+import socket
+import threading
+import time
+import unittest
+
+from server_thread_http import WorkQueue
+
+
+class WorkQueueTest(unittest.TestCase):
+	def setUp(self):
+		self.release = threading.Event()
+		self.handled = []
+		self.sockets = []
+		self.queue = WorkQueue(self.handle, 'test', workers=1, max_depth=2, max_wait=0.3, shed_timeout=0.5)
+
+	def tearDown(self):
+		self.release.set()
+		self.queue.shutdown()
+		for sock in self.sockets:
+			sock.close()
+
+	def handle(self, connection, address):
+		self.handled.append(address)
+		self.release.wait(5)
+		connection.close()
+
+	def submit(self, address, request=b"GET / HTTP/1.1\r\n\r\n"):
+		server_side, client_side = socket.socketpair()
+		client_side.settimeout(5)
+		client_side.sendall(request)
+		self.sockets.append(client_side)
+		return self.queue.submit(server_side, address), client_side
+
+	def reply(self, client_side):
+		data = b''
+		while True:
+			chunk = client_side.recv(4096)
+			if not chunk:
+				return data
+			data += chunk
+
+	def wait_until(self, condition):
+		deadline = time.monotonic() + 5
+		while not condition() and time.monotonic() < deadline:
+			time.sleep(0.01)
+		self.assertTrue(condition())
+
+	def test_full_queue_answers_503(self):
+		self.submit('busy')
+		self.wait_until(lambda: self.handled == ['busy'])
+		self.submit('queued 1')
+		self.submit('queued 2')
+		admitted, client_side = self.submit('rejected')
+		self.assertFalse(admitted)
+		reply = self.reply(client_side)
+		self.assertEqual(reply.split(b" ", 2)[1], b"503")
+		self.assertIn(b"Retry-After:1\r\n", reply)
+		self.assertEqual(self.queue.metrics()['rejected_queue_full'], 1)
+
+	def test_game_command_gets_json_reply(self):
+		self.submit('busy')
+		self.wait_until(lambda: self.handled == ['busy'])
+		self.submit('queued 1')
+		self.submit('queued 2')
+		_, client_side = self.submit('rejected', b"get_all_players\r\n")
+		reply = json.loads(self.reply(client_side))
+		self.assertEqual(reply['message'], 'Server busy')
+
+	def test_wait_expires_while_workers_busy(self):
+		self.submit('busy')
+		self.wait_until(lambda: self.handled == ['busy'])
+		started = time.monotonic()
+		admitted, client_side = self.submit('queued')
+		self.assertTrue(admitted)
+		reply = self.reply(client_side)
+		waited = time.monotonic() - started
+		self.assertEqual(reply.split(b" ", 2)[1], b"503")
+		self.assertGreaterEqual(waited, 0.3)
+		self.assertLess(waited, 2)
+		self.assertEqual(self.handled, ['busy'])
+		metrics = self.queue.metrics()
+		self.assertEqual((metrics['queue_depth'], metrics['rejected_queue_wait']), (0, 1))
+
+	def test_queued_connection_is_served_in_time(self):
+		self.submit('first')
+		self.wait_until(lambda: self.handled == ['first'])
+		self.submit('second')
+		self.release.set()
+		self.wait_until(lambda: self.handled == ['first', 'second'])
+		self.assertEqual(self.queue.metrics()['admitted'], 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
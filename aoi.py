@@ -0,0 +1,122 @@
+"""
+Area of interest (AOI) untuk PlayerStateStore.
+
+SpatialGrid membagi arena menjadi cell persegi berukuran seragam dan mencatat
+pemain di setiap cell, sehingga pemain di sekitar satu titik cukup dicari di
+cell yang bersinggungan dengan radius, bukan di semua pemain. Pemain di luar
+radius hanya diringkas berupa jumlah pemain per region (far field), satu region
+berisi FAR_SCALE x FAR_SCALE cell sehingga ringkasannya tetap kecil.
+
+Visibility mencatat pemain yang terlihat oleh satu viewer beserta seq saat
+masuk dan keluar AOI-nya, dengan cara yang sama seperti joined_seq dan
+left_seq di store, sehingga delta per viewer tetap bisa dihitung dari `since`.
+"""
+
+DEFAULT_CELL_SIZE = 256
+FAR_SCALE = 8
+
+
+class SpatialGrid:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}      # {(cx, cy): set player_id}
+        self.positions = {}  # {player_id: (x, y)}
+        self.regions = {}    # {(rx, ry): jumlah pemain}, untuk far field
+
+    def __len__(self):
+        return len(self.positions)
+
+    def cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    @staticmethod
+    def region(cell):
+        return cell[0] // FAR_SCALE, cell[1] // FAR_SCALE
+
+    def move(self, player_id, x, y):
+        """Catat posisi baru, pemain baru otomatis ditambahkan"""
+        old = self.positions.get(player_id)
+        self.positions[player_id] = (x, y)
+        cell = self.cell(x, y)
+        if old is not None:
+            previous = self.cell(*old)
+            if previous == cell:
+                return
+            self._discard(previous, player_id)
+        self.cells.setdefault(cell, set()).add(player_id)
+        region = self.region(cell)
+        self.regions[region] = self.regions.get(region, 0) + 1
+
+    def remove(self, player_id):
+        old = self.positions.pop(player_id, None)
+        if old is not None:
+            self._discard(self.cell(*old), player_id)
+
+    def query(self, x, y, radius):
+        """
+        Return (near, far): near berisi player_id yang berjarak <= radius dari
+        (x, y), far berisi [x, y, jumlah] per region untuk pemain di luar radius
+        dengan (x, y) titik tengah region.
+        """
+        left, top = self.cell(x - radius, y - radius)
+        right, bottom = self.cell(x + radius, y + radius)
+        if (right - left + 1) * (bottom - top + 1) > len(self.cells):
+            # radius jauh lebih besar dari cell, lebih murah memeriksa cell yang terisi saja
+            window = [cell for cell in self.cells if left <= cell[0] <= right and top <= cell[1] <= bottom]
+        else:
+            window = [(cx, cy) for cx in range(left, right + 1) for cy in range(top, bottom + 1)]
+
+        limit = radius * radius
+        near = set()
+        near_regions = {}  # {region: jumlah pemain near}, dikurangkan dari far field
+        for cell in window:
+            for player_id in self.cells.get(cell, ()):
+                px, py = self.positions[player_id]
+                if (px - x) * (px - x) + (py - y) * (py - y) <= limit:
+                    near.add(player_id)
+                    region = self.region(cell)
+                    near_regions[region] = near_regions.get(region, 0) + 1
+
+        size = self.cell_size * FAR_SCALE
+        far = []
+        for region, count in self.regions.items():
+            count -= near_regions.get(region, 0)
+            if count:
+                far.append([region[0] * size + size // 2, region[1] * size + size // 2, count])
+        return near, far
+
+    def _discard(self, cell, player_id):
+        players = self.cells[cell]
+        players.discard(player_id)
+        if not players:
+            del self.cells[cell]
+        region = self.region(cell)
+        self.regions[region] -= 1
+        if not self.regions[region]:
+            del self.regions[region]
+
+
+class Visibility:
+    """Pemain yang sedang terlihat oleh satu viewer"""
+    def __init__(self, seq, max_tombstones=256):
+        self.entered = {}  # {player_id: seq saat masuk AOI}
+        self.exited = {}   # {player_id: seq saat keluar AOI}, tombstone untuk delta
+        self.max_tombstones = max_tombstones
+        # viewer baru belum pernah menerima apa pun: since <= seq selalu dijawab full snapshot
+        self.horizon = seq + 1
+
+    def synced(self, seq):
+        """Full snapshot AOI pada seq sudah dikirim, delta sejak seq itu bisa dilayani"""
+        self.horizon = min(self.horizon, seq)
+
+    def update(self, near, seq):
+        for player_id in near:
+            if player_id not in self.entered:
+                self.entered[player_id] = seq
+                self.exited.pop(player_id, None)
+        for player_id in [p for p in self.entered if p not in near]:
+            del self.entered[player_id]
+            self.exited[player_id] = seq
+        while len(self.exited) > self.max_tombstones:
+            oldest = min(self.exited, key=self.exited.get)
+            self.horizon = max(self.horizon, self.exited.pop(oldest))
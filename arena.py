@@ -0,0 +1,72 @@
+"""
+Data map arena yang dipakai bersama oleh client (main_multiplayer.py) dan
+server (simulasi authoritative), tanpa bergantung pada pygame.
+"""
+
+WIDTH, HEIGHT = 600, 600
+
+# Ukuran sprite knight (16x28) yang di-scale 2x di Player.load_animation_frames
+PLAYER_WIDTH, PLAYER_HEIGHT = 32, 56
+PLAYER_SPEED = 200
+SPAWN_POSITION = (100, 100)
+
+# Pedang (sword.png 10x21 di-scale 2x lalu diputar 90 derajat saat menyerang),
+# offset dari tengah knight sama dengan Player.sword_offset_x/y
+SWORD_WIDTH, SWORD_HEIGHT = 42, 20
+SWORD_OFFSET_X, SWORD_OFFSET_Y = 40, 10
+
+SCALING_FACTOR = 2.307
+
+
+def _scaled(x, y, w, h):
+    return (int(x * SCALING_FACTOR), int(y * SCALING_FACTOR), int(w * SCALING_FACTOR), int(h * SCALING_FACTOR))
+
+
+# Semua wall dalam bentuk (x, y, width, height)
+WALLS = [
+    # 4 Corner Walls
+    (0, 0, 10, HEIGHT),
+    (WIDTH - 10, 0, 10, HEIGHT),
+    (0, 0, WIDTH, 10),
+    (0, HEIGHT - 10, WIDTH, 10),
+    # Extra Walls
+    _scaled(130, 0, 5, 45),
+    _scaled(130, 45, 98, 5),
+    _scaled(145, 103, 115, 5),
+    _scaled(0, 210, 160, 5),
+]
+
+
+def _overlaps(x, y, wall):
+    wx, wy, ww, wh = wall
+    return x < wx + ww and wx < x + PLAYER_WIDTH and y < wy + wh and wy < y + PLAYER_HEIGHT
+
+
+def sword_rect(x, y, facing_right):
+    """Hitbox pedang (x, y, width, height) pemain di (x, y), sama seperti Player.get_sword_rect"""
+    center_x = x + PLAYER_WIDTH // 2 + (SWORD_OFFSET_X if facing_right else -SWORD_OFFSET_X)
+    center_y = y + PLAYER_HEIGHT // 2 + SWORD_OFFSET_Y
+    return (center_x - SWORD_WIDTH // 2, center_y - SWORD_HEIGHT // 2, SWORD_WIDTH, SWORD_HEIGHT)
+
+
+def player_overlaps(x, y, rect):
+    """True jika hitbox pemain di (x, y) bersinggungan dengan rect (x, y, width, height)"""
+    return _overlaps(x, y, rect)
+
+
+def move_player(x, y, vx, vy, dt):
+    """
+    Gerakkan hitbox pemain dengan velocity (vx, vy) selama dt detik dan
+    selesaikan tabrakan dengan wall per sumbu, sama seperti Player.handle_collision.
+    """
+    x = int(x + vx * dt)
+    for wall in WALLS:
+        if _overlaps(x, y, wall):
+            if vx > 0: x = wall[0] - PLAYER_WIDTH
+            if vx < 0: x = wall[0] + wall[2]
+    y = int(y + vy * dt)
+    for wall in WALLS:
+        if _overlaps(x, y, wall):
+            if vy > 0: y = wall[1] - PLAYER_HEIGHT
+            if vy < 0: y = wall[1] + wall[3]
+    return x, y
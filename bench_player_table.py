@@ -0,0 +1,85 @@
+"""
+Benchmark representasi state pemain di PlayerStateStore.
+
+Membandingkan representasi lama (dict state, dict field_seq dan joined_seq per
+pemain, full snapshot di-encode per pemain dengan encode_delta) dengan
+PlayerTable (record 7 byte berurutan di satu buffer, seq per kolom di
+array). Mengukur memori per pemain dan waktu encode full snapshot biner.
+
+    python bench_player_table.py [--players 1000 5000 10000] [--repeat 50]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import binary_protocol
+import http as game_http
+
+
+def legacy_store(count):
+    # PlayerStateStore sebelum PlayerTable
+    states = {}
+    field_seq = {}
+    joined_seq = {}
+    for player_id in range(1, count + 1):
+        states[player_id] = {
+            'position': [player_id % 800, player_id % 600],
+            'health': 100,
+            'facing_right': True,
+            'is_attacking': False,
+            'is_hit': False,
+        }
+        field_seq[player_id] = {f: player_id for f in game_http.DEFAULT_STATE}
+        joined_seq[player_id] = player_id
+    return states, field_seq, joined_seq
+
+
+def table_store(count):
+    store = game_http.PlayerStateStore()
+    for player_id in range(1, count + 1):
+        store.join(player_id, {'position': [player_id % 800, player_id % 600], 'health': 100})
+    return store
+
+
+def memory_per_player(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return (after - before) / count
+
+
+def encode_time(encode, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark representasi state pemain')
+    parser.add_argument('--players', type=int, nargs='+', default=[1000, 5000, 10000], help='Jumlah pemain (default: 1000 5000 10000)')
+    parser.add_argument('--repeat', type=int, default=50, help='Jumlah encode per kasus (default: 50)')
+    args = parser.parse_args()
+
+    print(f"{'pemain':>7} {'':<8} {'byte/pemain':>12} {'encode snapshot':>16}")
+    for count in args.players:
+        states, _, _ = legacy_store(count)
+        store = table_store(count)
+        # payload harus sama persis, hanya cara encode yang berbeda
+        assert store.binary_delta(None) == binary_protocol.encode_delta(store.seq, True, states, [])
+        cases = (
+            ('dict', legacy_store, lambda: binary_protocol.encode_delta(store.seq, True, states, [])),
+            ('table', table_store, lambda: store.binary_delta(None)),
+        )
+        for name, build, encode in cases:
+            memory = memory_per_player(build, count)
+            elapsed = encode_time(encode, args.repeat)
+            print(f"{count:>7} {name:<8} {memory:>12,.0f} {elapsed * 1e3:>13.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark serialisasi response HttpServer.
+
+Membandingkan cara lama (header disusun ulang dengan str.format, strftime per
+request, penggabungan string kuadratik lalu header + body disalin) dengan
+ResponseBuilder (blok header statis di-cache, Date diperbarui sekali per detik).
+
+    python bench_response.py [--seconds 2] [--body-size 64]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import http as game_http
+
+
+def legacy_response(kode=404, message='Not Found', messagebody=bytes(), headers={}):
+    # HttpServer.response sebelum ResponseBuilder
+    tanggal = datetime.now().strftime('%c')
+    if (type(messagebody) is not bytes):
+        messagebody = messagebody.encode()
+    resp = []
+    resp.append("HTTP/1.1 {} {}\r\n" . format(kode, message))
+    resp.append("Date: {}\r\n" . format(tanggal))
+    if 'Connection' not in headers:
+        resp.append("Connection: keep-alive\r\n")
+    resp.append("Server: myserver/1.0\r\n")
+    resp.append("Content-Length: {}\r\n" . format(len(messagebody)))
+    for kk in headers:
+        resp.append("{}:{}\r\n" . format(kk, headers[kk]))
+    resp.append("\r\n")
+
+    response_headers = ''
+    for i in resp:
+        response_headers = "{}{}" . format(response_headers, i)
+    return response_headers.encode() + messagebody
+
+
+def measure(name, build, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            build()
+        count += 1000
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {count / elapsed:>12,.0f} responses/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serialisasi response')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Durasi setiap kasus (default: 2)')
+    parser.add_argument('--body-size', type=int, default=64, help='Ukuran body dalam byte (default: 64)')
+    args = parser.parse_args()
+
+    server = game_http.HttpServer()
+    body = b'x' * args.body_size
+    headers = {'Content-Type': 'application/json'}
+
+    print(f"body {args.body_size} byte, {args.seconds:g} detik per kasus")
+    measure('legacy response()', lambda: legacy_response(200, 'OK', body, headers), args.seconds)
+    measure('response()', lambda: server.response(200, 'OK', body, headers), args.seconds)
+    measure('response_parts() (sendmsg)', lambda: server.response_parts(200, 'OK', body, headers), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
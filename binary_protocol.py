@@ -0,0 +1,297 @@
+"""
+Protokol biner untuk state pemain, dipakai setelah client dan server
+menyepakati upgrade lewat `GET /binary` dengan header `Upgrade: knight-binary`.
+
+Setiap message diawali panjang payload (uint32, network order), lalu payload
+yang byte pertamanya adalah tipe message. uint16 tidak cukup untuk full
+snapshot, 7 byte per pemain sudah melewati 65535 byte di sekitar 9.300 pemain.
+
+Channel UDP tidak memakai prefix panjang karena satu datagram adalah satu
+message. Client mengirim MSG_UDP_STATE, server membalas MSG_DELTA sejak seq
+yang di-ack client, sehingga paket yang hilang tertutup oleh balasan berikutnya.
+Balasan yang lebih besar dari MAX_DATAGRAM diganti MSG_DELTA kosong dengan flag
+DELTA_RESYNC, dan client mengambil delta tersebut lewat koneksi TCP.
+
+Record state pemain (7 byte):
+    player_id  uint16
+    x, y       int16
+    health     uint8
+    flags      uint8  (bit 0 facing_right, bit 1 is_attacking, bit 2 is_hit)
+
+MSG_DELTA boleh diakhiri daftar hit event dari server: jumlah (uint16) lalu
+per event seq (uint32), penyerang dan yang kena (uint16). Decoder lama
+berhenti setelah daftar leave sehingga bagian ini diabaikan.
+
+Record input pemain (6 byte), dipakai jika server menjalankan simulasi:
+    player_id  uint16
+    dx, dy     int8   (-1, 0 atau 1)
+    health     uint8
+    flags      uint8  (sama dengan record state)
+"""
+
+import struct
+
+PROTOCOL_NAME = 'knight-binary'
+
+MSG_SET_STATE = 1     # client -> server, record state, tanpa balasan
+MSG_DELTA_REQUEST = 2 # client -> server, seq terakhir yang sudah diterapkan
+MSG_DELTA = 3         # server -> client, record yang berubah + ID yang leave
+MSG_LEAVE = 4         # client -> server, player_id
+MSG_ACK = 5           # server -> client, status (1 = OK, 0 = Error)
+MSG_UDP_STATE = 6     # client -> server lewat UDP, nomor paket + ack seq + record state
+MSG_SET_INPUT = 7     # client -> server, record input (mode server-authoritative), tanpa balasan
+MSG_UDP_INPUT = 8     # client -> server lewat UDP, nomor paket + ack seq + record input
+
+FLAG_FACING_RIGHT = 0x01
+FLAG_ATTACKING = 0x02
+FLAG_HIT = 0x04
+
+# byte `full` di header MSG_DELTA
+DELTA_FULL = 0x01    # snapshot lengkap, client mengganti seluruh world
+DELTA_RESYNC = 0x02  # (UDP) delta terlalu besar untuk satu datagram, minta lewat TCP
+
+NO_SEQ = 0xFFFFFFFF
+MAX_PAYLOAD = 16 * 1024 * 1024  # batas message TCP, prefix yang lebih besar dianggap rusak
+MAX_DATAGRAM = 1200             # di bawah MTU umum, datagram tidak terfragmentasi
+
+LENGTH = struct.Struct('!I')
+RECORD = struct.Struct('!HhhBB')
+SET_STATE = struct.Struct('!B' + RECORD.format[1:])
+DELTA_REQUEST = struct.Struct('!BI')
+DELTA_HEADER = struct.Struct('!BIBHH')
+PLAYER_ID = struct.Struct('!H')
+HIT_COUNT = struct.Struct('!H')
+HIT = struct.Struct('!IHH')
+LEAVE = struct.Struct('!BH')
+ACK = struct.Struct('!BB')
+UDP_STATE = struct.Struct('!BII' + RECORD.format[1:])
+INPUT_RECORD = struct.Struct('!HbbBB')
+SET_INPUT = struct.Struct('!B' + INPUT_RECORD.format[1:])
+UDP_INPUT = struct.Struct('!BII' + INPUT_RECORD.format[1:])
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, int(value)))
+
+
+def state_to_record(player_id, state):
+    """Ubah state dict menjadi tuple field record"""
+    x, y = state.get('position', (0, 0))
+    return (
+        int(player_id),
+        _clamp(x, -32768, 32767),
+        _clamp(y, -32768, 32767),
+        _clamp(state.get('health', 0), 0, 255),
+        _flags(state)
+    )
+
+
+def _flags(state):
+    flags = 0
+    if state.get('facing_right', True):
+        flags |= FLAG_FACING_RIGHT
+    if state.get('is_attacking', False):
+        flags |= FLAG_ATTACKING
+    if state.get('is_hit', False):
+        flags |= FLAG_HIT
+    return flags
+
+
+def record_to_state(x, y, health, flags):
+    """Ubah field record menjadi state dict yang sama dengan versi JSON"""
+    return {
+        'position': [x, y],
+        'health': health,
+        'facing_right': bool(flags & FLAG_FACING_RIGHT),
+        'is_attacking': bool(flags & FLAG_ATTACKING),
+        'is_hit': bool(flags & FLAG_HIT)
+    }
+
+
+def frame(payload):
+    """Tambahkan prefix panjang ke payload"""
+    return LENGTH.pack(len(payload)) + payload
+
+
+def read_frame(buffer):
+    """
+    Ambil satu message dari awal buffer (bytearray).
+    Return payload dan menghapusnya dari buffer, atau None jika belum lengkap.
+    ValueError jika panjangnya melebihi MAX_PAYLOAD.
+    """
+    if len(buffer) < LENGTH.size:
+        return None
+    (length,) = LENGTH.unpack_from(buffer)
+    if length > MAX_PAYLOAD:
+        raise ValueError("message biner terlalu besar: {} byte" . format(length))
+    end = LENGTH.size + length
+    if len(buffer) < end:
+        return None
+    payload = bytes(buffer[LENGTH.size:end])
+    del buffer[:end]
+    return payload
+
+
+def message_type(payload):
+    return payload[0] if payload else None
+
+
+def encode_set_state(player_id, state):
+    return SET_STATE.pack(MSG_SET_STATE, *state_to_record(player_id, state))
+
+
+def decode_set_state(payload):
+    _, player_id, x, y, health, flags = SET_STATE.unpack(payload)
+    return player_id, record_to_state(x, y, health, flags)
+
+
+def encode_delta_request(since):
+    return DELTA_REQUEST.pack(MSG_DELTA_REQUEST, NO_SEQ if since is None else since)
+
+
+def decode_delta_request(payload):
+    _, since = DELTA_REQUEST.unpack(payload)
+    return None if since == NO_SEQ else since
+
+
+def encode_delta(seq, full, states, left, hits=()):
+    """
+    states: {player_id: state} berisi state lengkap pemain yang join/berubah
+    left: daftar player_id yang keluar
+    hits: daftar (seq, penyerang, yang kena), kosong berarti tanpa bagian hit
+    """
+    parts = [DELTA_HEADER.pack(MSG_DELTA, seq, DELTA_FULL if full else 0, len(states), len(left))]
+    for player_id, state in states.items():
+        parts.append(RECORD.pack(*state_to_record(player_id, state)))
+    for player_id in left:
+        parts.append(PLAYER_ID.pack(int(player_id)))
+    parts.append(_encode_hits(hits))
+    return b''.join(parts)
+
+
+def encode_delta_records(seq, full, records, left, hits=()):
+    """
+    Seperti encode_delta, tetapi record state sudah di-encode berurutan
+    (misalnya buffer PlayerTable), sehingga hanya disalin satu kali
+    """
+    header = DELTA_HEADER.pack(MSG_DELTA, seq, DELTA_FULL if full else 0, len(records) // RECORD.size, len(left))
+    return b''.join((header, records, b''.join(PLAYER_ID.pack(int(player_id)) for player_id in left), _encode_hits(hits)))
+
+
+def encode_resync(seq):
+    """Pengganti balasan UDP yang tidak muat di satu datagram"""
+    return DELTA_HEADER.pack(MSG_DELTA, seq, DELTA_RESYNC, 0, 0)
+
+
+def fit_datagram(delta):
+    """delta jika muat di satu datagram, selain itu encode_resync untuk seq yang sama"""
+    if len(delta) <= MAX_DATAGRAM:
+        return delta
+    return encode_resync(DELTA_HEADER.unpack_from(delta)[1])
+
+
+def _encode_hits(hits):
+    if not hits:
+        return b''
+    return HIT_COUNT.pack(len(hits)) + b''.join(HIT.pack(*hit) for hit in hits)
+
+
+def decode_delta(payload):
+    """Return delta dict dengan bentuk yang sama seperti response /world_delta"""
+    _, seq, full, n_states, n_left = DELTA_HEADER.unpack_from(payload)
+    offset = DELTA_HEADER.size
+    changed = {}
+    for _ in range(n_states):
+        player_id, x, y, health, flags = RECORD.unpack_from(payload, offset)
+        changed[str(player_id)] = record_to_state(x, y, health, flags)
+        offset += RECORD.size
+    left = []
+    for _ in range(n_left):
+        left.append(PLAYER_ID.unpack_from(payload, offset)[0])
+        offset += PLAYER_ID.size
+    hits = []
+    if offset < len(payload):
+        (n_hits,) = HIT_COUNT.unpack_from(payload, offset)
+        offset += HIT_COUNT.size
+        for _ in range(n_hits):
+            hits.append(list(HIT.unpack_from(payload, offset)))
+            offset += HIT.size
+    return {
+        'seq': seq,
+        'full': bool(full & DELTA_FULL),
+        'resync': bool(full & DELTA_RESYNC),
+        'joined': [],
+        'left': left,
+        'changed': changed,
+        'hits': hits
+    }
+
+
+def encode_leave(player_id):
+    return LEAVE.pack(MSG_LEAVE, int(player_id))
+
+
+def decode_leave(payload):
+    return LEAVE.unpack(payload)[1]
+
+
+def encode_ack(ok):
+    return ACK.pack(MSG_ACK, 1 if ok else 0)
+
+
+def decode_ack(payload):
+    return ACK.unpack(payload)[1] == 1
+
+
+def encode_udp_state(packet_seq, ack, player_id, state):
+    ack = NO_SEQ if ack is None else ack
+    return UDP_STATE.pack(MSG_UDP_STATE, packet_seq, ack, *state_to_record(player_id, state))
+
+
+def decode_udp_state(payload):
+    """Return (packet_seq, ack, player_id, state)"""
+    _, packet_seq, ack, player_id, x, y, health, flags = UDP_STATE.unpack(payload)
+    ack = None if ack == NO_SEQ else ack
+    return packet_seq, ack, player_id, record_to_state(x, y, health, flags)
+
+
+def input_to_record(player_id, player_input):
+    dx, dy = player_input.get('move', (0, 0))
+    return (
+        int(player_id),
+        _clamp(dx, -1, 1),
+        _clamp(dy, -1, 1),
+        _clamp(player_input.get('health', 0), 0, 255),
+        _flags(player_input)
+    )
+
+
+def record_to_input(dx, dy, health, flags):
+    return {
+        'move': [dx, dy],
+        'health': health,
+        'facing_right': bool(flags & FLAG_FACING_RIGHT),
+        'is_attacking': bool(flags & FLAG_ATTACKING),
+        'is_hit': bool(flags & FLAG_HIT)
+    }
+
+
+def encode_set_input(player_id, player_input):
+    return SET_INPUT.pack(MSG_SET_INPUT, *input_to_record(player_id, player_input))
+
+
+def decode_set_input(payload):
+    _, player_id, dx, dy, health, flags = SET_INPUT.unpack(payload)
+    return player_id, record_to_input(dx, dy, health, flags)
+
+
+def encode_udp_input(packet_seq, ack, player_id, player_input):
+    ack = NO_SEQ if ack is None else ack
+    return UDP_INPUT.pack(MSG_UDP_INPUT, packet_seq, ack, *input_to_record(player_id, player_input))
+
+
+def decode_udp_input(payload):
+    """Return (packet_seq, ack, player_id, input)"""
+    _, packet_seq, ack, player_id, dx, dy, health, flags = UDP_INPUT.unpack(payload)
+    ack = None if ack == NO_SEQ else ack
+    return packet_seq, ack, player_id, record_to_input(dx, dy, health, flags)
@@ -1,43 +1,122 @@
 import socket
 import logging
 import json
+import struct
+import threading
 from time import sleep
+from urllib.parse import quote
+
+import binary_protocol
+import websocket_protocol
 
 class ClientInterface:
-    def __init__(self, server_address=('127.0.0.1', 8885)):
+    def __init__(self, server_address=('127.0.0.1', 8885), binary=False, udp=False, subscribe=False, websocket=False, room='default'):
         self.server_address = server_address
         self.sock = None
         self.player_id = None
+        # Room yang dimasuki saat join, semua snapshot/delta hanya berisi pemain di room ini
+        self.room = room
+        # binary=True: setelah join, coba upgrade koneksi ke binary_protocol
+        self.prefer_binary = binary
+        self.binary = False
+        self.recv_buffer = bytearray()
+        # websocket=True: message binary_protocol dikirim dalam frame WebSocket
+        self.prefer_websocket = websocket
+        self.websocket = False
+        # udp=True: setelah join, state pergerakan dikirim lewat UDP
+        self.prefer_udp = udp
+        self.udp_sock = None
+        self.udp_seq = 0
+        # tick_rate > 0 dari response join: server authoritative, kirim input bukan state
+        self.tick_rate = 0
+        self.last_input = None
+        # State semua pemain dari world snapshot terakhir, {str(player_id): state}
+        self.world_states = {}
+        # Seq terakhir dari server yang sudah diterapkan ke world_states
+        self.world_seq = None
+        # Ringkasan pemain di luar area of interest, [[x, y, jumlah], ...] (kosong jika server tanpa AOI)
+        self.far_field = []
+        # Hit event dari server yang belum diterapkan, (penyerang, yang kena)
+        self.hits = []
+        self.hit_seq = None
+        self.world_lock = threading.Lock()
+        # subscribe=True: setelah join, server mendorong delta lewat GET /subscribe
+        self.prefer_subscribe = subscribe
+        self.subscribe_sock = None
+        # Request yang tidak butuh balasan segera (set state/input), dikirim
+        # bersama request berikutnya dalam satu write
+        self.pending = []
+
+    def build_request(self, method, path, body=None):
+        """Request HTTP/1.1 lengkap dengan framing Content-Length"""
+        request = f"{method} {path} HTTP/1.1\r\nHost: {self.server_address[0]}\r\n"
+        if body is None:
+            return request + "\r\n"
+        return request + f"Content-Length: {len(body.encode())}\r\n\r\n{body}"
 
     def send_command(self, command_str):
-        # sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            # sock.connect(self.server_address)
-            logging.warning(f"Connecting to {self.server_address} to send: {command_str}")
-            self.sock.sendall(command_str.encode() + "\r\n\r\n".encode())
-            data_received = b""
-            while True:
-                data = self.sock.recv(1024)
-                if data:
-                    data_received += data
-                    if b"\r\n\r\n" in data_received:
-                        break
-                else:
-                    break
+        """Kirim satu request (beserta request yang tertunda), return body JSON balasannya"""
+        results = self.pipeline([command_str])
+        return results[-1] if results else None
 
-            parts = data_received.split(b"\r\n\r\n", 1)
-            if len(parts) > 1:
-              body_data = parts[1].decode()
-              return json.loads(body_data)
-            else:
-              logging.error("Incomplete response received from server.")
-              return None
-            # cleaned_data = data_received.split("\r\n\r\n", 1)[0]
-            # return json.loads(cleaned_data)
+    def pipeline(self, commands):
+        """
+        - Kirim semua request tertunda dan `commands` dalam satu write
+        - Baca semua response berurutan berdasarkan Content-Length
+        - Return body JSON untuk setiap command
+        """
+        requests = self.pending + list(commands)
+        self.pending = []
+        if not requests:
+            return []
+        try:
+            logging.warning(f"Sending {len(requests)} request(s) to {self.server_address}")
+            self.sock.sendall("".join(requests).encode())
+            results = []
+            for _ in requests:
+                status, body = self.read_response()
+                if status is None:
+                    logging.error("Incomplete response received from server.")
+                    return None
+                try:
+                    results.append(json.loads(body) if body else None)
+                except ValueError:
+                    results.append(None)
+            return results[len(results) - len(commands):]
         except Exception as e:
             logging.error(f"Error during command execution: {e}")
             return None
 
+    def flush(self):
+        """Kirim request yang tertunda tanpa menunggu request lain"""
+        if self.pending and self.sock:
+            self.pipeline([])
+
+    def read_response(self):
+        """Baca satu response dari recv_buffer/socket, return (status, body)"""
+        while b"\r\n\r\n" not in self.recv_buffer:
+            data = self.sock.recv(4096)
+            if not data:
+                return None, b""
+            self.recv_buffer += data
+        header_end = self.recv_buffer.index(b"\r\n\r\n")
+        lines = bytes(self.recv_buffer[:header_end]).decode().split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        content_length = 0
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "content-length":
+                content_length = int(value.strip())
+        end = header_end + 4 + content_length
+        while len(self.recv_buffer) < end:
+            data = self.sock.recv(4096)
+            if not data:
+                return None, b""
+            self.recv_buffer += data
+        body = bytes(self.recv_buffer[header_end + 4:end])
+        del self.recv_buffer[:end]
+        return status, body
+
     def join_game(self, player_id):
       """
       - Open socket connection
@@ -51,11 +130,21 @@ class ClientInterface:
         self.sock.connect(self.server_address)
         self.player_id = player_id
 
-        body = json.dumps({'player_id': player_id})
-        command = f"POST /join_game HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}"
+        body = json.dumps({'player_id': player_id, 'room': self.room})
+        command = self.build_request("POST", "/join_game", body)
         result = self.send_command(command)
         if result and result.get('status') == 'OK':
           logging.info(f"Player {player_id} joined the game successfully.")
+          self.tick_rate = result.get('tick_rate', 0)
+          self.last_input = None
+          if self.prefer_websocket:
+            self.enable_websocket()
+          elif self.prefer_binary:
+            self.enable_binary()
+          if self.prefer_udp:
+            self.enable_udp()
+          if self.prefer_subscribe:
+            self.subscribe()
           return True
         elif result and result.get('status') == 'Error':
           logging.error(f"Failed to join game: {result.get('message', 'Unknown error')}")
@@ -74,38 +163,376 @@ class ClientInterface:
       - Close socket connection
       """
       try:
+        if self.binary:
+          self.send_message(binary_protocol.encode_leave(self.player_id))
+          reply = self.recv_message()
+          if reply and binary_protocol.decode_ack(reply):
+            logging.info(f"Player {self.player_id} left the game successfully.")
+            self.sock.close()
+            self.sock = None
+            self.binary = False
+            self.websocket = False
+            self.disable_udp()
+            self.unsubscribe()
+            return True
+          return False
         body = json.dumps({'player_id': self.player_id})
-        command = f"POST /leave_game HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}"
+        command = self.build_request("POST", "/leave_game", body)
         result = self.send_command(command)
         if result and result.get('status') == 'OK':
           logging.info(f"Player {self.player_id} left the game successfully.")
           self.sock.close()
           self.sock = None
+          self.disable_udp()
+          self.unsubscribe()
           return True
         return False
       except Exception as e:
         logging.error(f"Error leaving game: {e}")
       return False
 
+    def enable_binary(self):
+        """
+        - Negosiasi upgrade koneksi ke binary_protocol
+        - Jika server menolak, tetap memakai HTTP + JSON
+        """
+        command = (f"GET /binary?room={quote(self.room)} HTTP/1.1\r\nConnection: Upgrade\r\n"
+                   f"Upgrade: {binary_protocol.PROTOCOL_NAME}\r\n\r\n")
+        self.flush()
+        try:
+            self.sock.sendall(command.encode())
+            data_received = b""
+            while b"\r\n\r\n" not in data_received:
+                data = self.sock.recv(1024)
+                if not data:
+                    break
+                data_received += data
+            headers, _, rest = data_received.partition(b"\r\n\r\n")
+            if headers.startswith(b"HTTP/1.1 101"):
+                self.binary = True
+                self.recv_buffer = bytearray(rest)
+                logging.info("Connection upgraded to binary protocol.")
+            else:
+                logging.warning("Server does not support binary protocol, using JSON.")
+        except Exception as e:
+            logging.error(f"Error negotiating binary protocol: {e}")
+        return self.binary
+
+    def enable_websocket(self):
+        """
+        - Upgrade koneksi ke WebSocket
+        - Message binary_protocol dikirim sebagai frame binary, overhead 6 byte per message
+        """
+        key = websocket_protocol.new_key()
+        command = (f"GET /ws?room={quote(self.room)} HTTP/1.1\r\nHost: {self.server_address[0]}\r\n"
+                   f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                   f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n")
+        self.flush()
+        try:
+            self.sock.sendall(command.encode())
+            data_received = b""
+            while b"\r\n\r\n" not in data_received:
+                data = self.sock.recv(1024)
+                if not data:
+                    break
+                data_received += data
+            headers, _, rest = data_received.partition(b"\r\n\r\n")
+            expected = websocket_protocol.accept_key(key).encode()
+            if headers.startswith(b"HTTP/1.1 101") and expected in headers:
+                self.binary = True
+                self.websocket = True
+                self.recv_buffer = bytearray(rest)
+                logging.info("Connection upgraded to WebSocket.")
+            else:
+                logging.warning("Server does not support WebSocket, using JSON.")
+        except Exception as e:
+            logging.error(f"Error negotiating WebSocket: {e}")
+        return self.websocket
+
+    def enable_udp(self):
+        """
+        - Buka socket UDP ke server untuk state pergerakan
+        - Join, leave dan event lain tetap lewat koneksi TCP
+        """
+        try:
+            self.udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.udp_sock.connect(self.server_address)
+            self.udp_sock.setblocking(False)
+            self.udp_seq = 0
+            logging.info("UDP state channel enabled.")
+        except OSError as e:
+            logging.error(f"Error opening UDP channel: {e}")
+            self.udp_sock = None
+        return self.udp_sock is not None
+
+    def disable_udp(self):
+        if self.udp_sock:
+            self.udp_sock.close()
+            self.udp_sock = None
+
+    def subscribe(self):
+        """
+        - Buka koneksi kedua ke GET /subscribe
+        - Thread background membaca event delta yang didorong server ke world_states
+        """
+        try:
+            self.subscribe_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.subscribe_sock.connect(self.server_address)
+            since = '' if self.world_seq is None else self.world_seq
+            self.subscribe_sock.sendall(f"GET /subscribe?{self.world_query()}&since={since} HTTP/1.1\r\n\r\n".encode())
+            thread = threading.Thread(target=self.read_subscription, args=(self.subscribe_sock,), daemon=True)
+            thread.start()
+            logging.info("Subscribed to world updates.")
+        except OSError as e:
+            logging.error(f"Error subscribing: {e}")
+            self.subscribe_sock = None
+        return self.subscribe_sock is not None
+
+    def unsubscribe(self):
+        if self.subscribe_sock:
+            sock = self.subscribe_sock
+            self.subscribe_sock = None
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def read_subscription(self, sock):
+        buffer = b""
+        headers_done = False
+        try:
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                if not headers_done:
+                    if b"\r\n\r\n" not in buffer:
+                        continue
+                    headers, buffer = buffer.split(b"\r\n\r\n", 1)
+                    if not headers.startswith(b"HTTP/1.1 200"):
+                        logging.error("Server refused subscription.")
+                        break
+                    headers_done = True
+                # Setiap event server-sent events diakhiri baris kosong
+                while b"\n\n" in buffer:
+                    event, buffer = buffer.split(b"\n\n", 1)
+                    for line in event.decode().split("\n"):
+                        if line.startswith("data:"):
+                            self.apply_world_delta(json.loads(line[5:]))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Subscription closed: {e}")
+        if self.subscribe_sock is sock:
+            self.subscribe_sock = None
+
+    def send_message(self, payload):
+        if self.websocket:
+            self.sock.sendall(websocket_protocol.encode_frame(payload, websocket_protocol.OP_BINARY, mask=True))
+        else:
+            self.sock.sendall(binary_protocol.frame(payload))
+
+    def recv_message(self):
+        if self.websocket:
+            return self.recv_websocket_message()
+        payload = binary_protocol.read_frame(self.recv_buffer)
+        while payload is None:
+            data = self.sock.recv(1024)
+            if not data:
+                return None
+            self.recv_buffer += data
+            payload = binary_protocol.read_frame(self.recv_buffer)
+        return payload
+
+    def recv_websocket_message(self):
+        while True:
+            frame = websocket_protocol.read_frame(self.recv_buffer)
+            if frame is None:
+                data = self.sock.recv(1024)
+                if not data:
+                    return None
+                self.recv_buffer += data
+                continue
+            fin, opcode, payload = frame
+            if opcode == websocket_protocol.OP_BINARY:
+                return payload
+            if opcode == websocket_protocol.OP_PING:
+                self.sock.sendall(websocket_protocol.encode_frame(payload, websocket_protocol.OP_PONG, mask=True))
+            elif opcode == websocket_protocol.OP_CLOSE:
+                return None
+
     def get_all_player_ids(self):
-        command = "GET /get_player_ids HTTP/1.1\r\nHost: {self.server_address[0]}"
+        if self.binary:
+            return self.sync_world()
+        command = self.build_request("GET", f"/get_player_ids?room={quote(self.room)}")
         result = self.send_command(command)
         if result and result.get('status') == 'OK':
             return result.get('players', [])
         return []
 
     def get_player_state(self, player_id):
-        command = f"GET /get_player_state?id={player_id} HTTP/1.1"
+        if self.binary:
+            self.sync_world()
+            return self.get_cached_player_state(player_id)
+        command = self.build_request("GET", f"/get_player_state?room={quote(self.room)}&id={player_id}")
         return self.send_command(command)
 
+    def sync_world(self):
+        """
+        - Kirim seq terakhir yang sudah diterapkan, terima perubahan sejak seq tersebut
+        - Terapkan join, leave dan field yang berubah ke world_states
+        - Return daftar ID semua pemain
+        """
+        if self.udp_sock:
+            if self.drain_udp():
+                # delta terlalu besar untuk satu datagram, ambil lewat TCP
+                self.sync_tcp()
+            return self.world_ids()
+        if self.subscribe_sock:
+            # Delta sudah didorong server, cukup kirim state/input yang tertunda
+            self.flush()
+            return self.world_ids()
+        self.sync_tcp()
+        return self.world_ids()
+
+    def sync_tcp(self):
+        """Minta delta sejak world_seq lewat koneksi TCP (biner atau HTTP) lalu terapkan"""
+        if self.binary:
+            try:
+                self.send_message(binary_protocol.encode_delta_request(self.world_seq))
+                reply = self.recv_message()
+                result = binary_protocol.decode_delta(reply) if reply else None
+                if result:
+                    result['status'] = 'OK'
+            except Exception as e:
+                logging.error(f"Error during binary sync: {e}")
+                result = None
+        else:
+            since = '' if self.world_seq is None else self.world_seq
+            command = self.build_request("GET", f"/world_delta?{self.world_query()}&since={since}")
+            result = self.send_command(command)
+        if result and result.get('status') == 'OK':
+            self.apply_world_delta(result)
+
+    def world_query(self):
+        # room dan pemain yang meminta, server memfilter snapshot sesuai area of interest pemain ini
+        query = f"room={quote(self.room)}"
+        if self.player_id is not None:
+            query += f"&player_id={self.player_id}"
+        return query
+
+    def world_ids(self):
+        with self.world_lock:
+            return [int(p_id) for p_id in self.world_states]
+
+    def drain_udp(self):
+        """
+        Terapkan semua balasan delta UDP yang sudah datang, buang yang basi.
+        Return True jika server meminta resync lewat TCP.
+        """
+        resync = False
+        while True:
+            try:
+                payload = self.udp_sock.recv(binary_protocol.MAX_DATAGRAM)
+            except BlockingIOError:
+                return resync
+            except OSError as e:
+                logging.warning(f"UDP receive error: {e}")
+                return resync
+            try:
+                delta = binary_protocol.decode_delta(payload)
+            except struct.error:
+                continue
+            if delta['resync']:
+                resync = True
+            else:
+                self.apply_world_delta(delta)
+
+    def apply_world_delta(self, delta):
+        """Terapkan delta ke world_states, delta yang lebih tua dari world_seq dibuang"""
+        with self.world_lock:
+            if not delta.get('full') and self.world_seq is not None and delta.get('seq', 0) <= self.world_seq:
+                return
+            if delta.get('full'):
+                self.world_states = {}
+            for p_id in delta.get('left', []):
+                self.world_states.pop(str(p_id), None)
+            for p_id in delta.get('joined', []):
+                self.world_states[str(p_id)] = {}
+            for p_id, fields in delta.get('changed', {}).items():
+                self.world_states.setdefault(p_id, {}).update(fields)
+            self.world_seq = delta.get('seq', self.world_seq)
+            if 'far' in delta:
+                self.far_field = delta['far']
+            # hit yang sama bisa datang lewat UDP dan /subscribe, cukup diterapkan sekali
+            for seq, attacker_id, target_id in delta.get('hits', []):
+                if self.hit_seq is None or seq > self.hit_seq:
+                    self.hits.append((attacker_id, target_id))
+            if delta.get('hits'):
+                self.hit_seq = max([self.hit_seq or 0] + [hit[0] for hit in delta['hits']])
+
+    def take_hits(self, player_id):
+        """ID penyerang dari hit event server yang mengenai player_id, sejak pemanggilan terakhir"""
+        with self.world_lock:
+            attackers = [attacker_id for attacker_id, target_id in self.hits if target_id == player_id]
+            self.hits = []
+            return attackers
+
+    def get_cached_player_state(self, player_id):
+        """State pemain dari world snapshot terakhir, tanpa round trip ke server."""
+        return self.world_states.get(str(player_id))
+
+    @property
+    def server_authoritative(self):
+        return self.tick_rate > 0
+
+    def set_player_input(self, player_id, player_input):
+        """
+        Kirim input pemain ke server-authoritative.
+        Lewat TCP hanya dikirim jika berubah, lewat UDP dikirim setiap frame
+        karena paket bisa hilang dan balasannya membawa delta world.
+        """
+        if self.udp_sock:
+            self.udp_seq += 1
+            try:
+                self.udp_sock.send(binary_protocol.encode_udp_input(self.udp_seq, self.world_seq, player_id, player_input))
+            except OSError as e:
+                logging.warning(f"Error sending UDP input: {e}")
+            return
+        if player_input == self.last_input:
+            return
+        self.last_input = player_input
+        if self.binary:
+            try:
+                self.send_message(binary_protocol.encode_set_input(player_id, player_input))
+            except Exception as e:
+                logging.error(f"Error sending binary input: {e}")
+            return
+        body = json.dumps({'id': player_id, 'input': player_input})
+        # Tidak menunggu balasan, dikirim bersama request berikutnya (pipelining)
+        self.pending.append(self.build_request("POST", "/set_player_input", body))
+
     def set_player_state(self, player_id, state):
+        if self.udp_sock:
+            self.udp_seq += 1
+            try:
+                self.udp_sock.send(binary_protocol.encode_udp_state(self.udp_seq, self.world_seq, player_id, state))
+            except OSError as e:
+                logging.warning(f"Error sending UDP state: {e}")
+            return
+        if self.binary:
+            try:
+                self.send_message(binary_protocol.encode_set_state(player_id, state))
+            except Exception as e:
+                logging.error(f"Error sending binary state: {e}")
+            return
         body = {
             'id': player_id,
             'state': state
         }
         body = json.dumps(body)
-        command = f"POST /set_player_state HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}"
-        self.send_command(command)
+        # Tidak menunggu balasan, dikirim bersama request berikutnya (pipelining)
+        self.pending.append(self.build_request("POST", "/set_player_state", body))
 
 if __name__ == "__main__":
   client = ClientInterface()
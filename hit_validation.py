@@ -0,0 +1,96 @@
+"""
+Validasi hit di server dengan lag compensation.
+
+Setiap pemain punya ring buffer pendek berisi posisi dan status serangan
+bertimestamp. Saat penyerang mengirim state dengan is_attacking, pemain lain
+diputar mundur ke waktu yang dilihat penyerang, yaitu saat server mengirim
+seq yang terakhir di-ack penyerang, lalu pedang penyerang dicek terhadap
+hitbox mereka di waktu tersebut. Setiap serangan hanya bisa mengenai satu
+pemain sekali, dan pemain yang baru kena tidak bisa kena lagi selama
+cooldown, sehingga dua client tidak bisa menghitung hit yang sama dua kali.
+"""
+
+import time
+
+import arena
+
+HISTORY = 1.0       # detik sample yang disimpan per pemain
+MAX_REWIND = 0.25   # batas putar mundur, ping lebih tinggi tidak ikut dikompensasi
+HIT_COOLDOWN = 0.2  # sama dengan Player.hit_duration
+
+
+class HitValidator:
+    def __init__(self, history=HISTORY, max_rewind=MAX_REWIND, cooldown=HIT_COOLDOWN, samples=64, clock=time.monotonic):
+        self.history = history
+        self.max_rewind = max_rewind
+        self.cooldown = cooldown
+        self.max_samples = samples
+        self.clock = clock
+        # list biasa, bukan deque: sebagian besar pemain hanya punya beberapa sample
+        self.samples = {}      # {player_id: [(waktu, x, y, facing_right, is_attacking)]}
+        self.swings = {}       # {penyerang: set player_id yang sudah kena di serangan ini}
+        self.last_hit = {}     # {player_id: waktu terakhir kena}
+        self.served = {}       # {player_id: [(seq, waktu dikirim)]}
+        self.view_time = {}    # {player_id: waktu world yang sedang dilihat client}
+
+    def acknowledge(self, player_id, since, seq):
+        """
+        Client player_id sudah menerapkan `since` dan sekarang dikirimi `seq`.
+        Waktu saat `since` dikirim menjadi waktu yang dilihat client tersebut.
+        """
+        now = self.clock()
+        served = self.served.setdefault(player_id, [])
+        if since is not None:
+            for sent_seq, sent_at in reversed(served):
+                if sent_seq <= since:
+                    self.view_time[player_id] = sent_at
+                    break
+        if not served or served[-1][0] != seq:
+            served.append((seq, now))
+            if len(served) > self.max_samples:
+                del served[0]
+
+    def record(self, player_id, x, y, facing_right, is_attacking):
+        """Simpan sample baru, return player_id yang kena jika pemain ini sedang menyerang"""
+        now = self.clock()
+        samples = self.samples.setdefault(player_id, [])
+        if not samples or samples[-1][1:] != (x, y, facing_right, is_attacking):
+            samples.append((now, x, y, facing_right, is_attacking))
+        expired = 0
+        while expired < len(samples) - 1 and (samples[expired][0] < now - self.history or len(samples) - expired > self.max_samples):
+            expired += 1
+        if expired:
+            del samples[:expired]
+
+        if not is_attacking:
+            self.swings.pop(player_id, None)
+            return []
+        hit_already = self.swings.setdefault(player_id, set())
+        view = max(self.view_time.get(player_id, now), now - self.max_rewind)
+        sword = arena.sword_rect(x, y, facing_right)
+        hits = []
+        for target in self.samples:
+            if target == player_id or target in hit_already:
+                continue
+            if now - self.last_hit.get(target, float('-inf')) < self.cooldown:
+                continue
+            target_x, target_y = self.position_at(target, view)
+            if arena.player_overlaps(target_x, target_y, sword):
+                hit_already.add(target)
+                self.last_hit[target] = now
+                hits.append(target)
+        return hits
+
+    def position_at(self, player_id, when):
+        """Posisi pemain pada waktu `when`: sample terakhir sebelum waktu itu (atau yang tertua)"""
+        samples = self.samples[player_id]
+        for sample in reversed(samples):
+            if sample[0] <= when:
+                return sample[1], sample[2]
+        return samples[0][1], samples[0][2]
+
+    def remove(self, player_id):
+        for table in (self.samples, self.swings, self.last_hit, self.served, self.view_time):
+            table.pop(player_id, None)
+        for hit_already in self.swings.values():
+            hit_already.discard(player_id)
@@ -2,12 +2,668 @@ import sys
 import os.path
 import uuid
 from glob import glob
+from collections import deque
 from datetime import datetime
 from urllib.parse import parse_qs, urlparse
 import json
+import struct
+import threading
+import time
+import arena
+import binary_protocol
+import websocket_protocol
+from simulation import Simulation
+from player_table import PlayerTable, valid_id
+from aoi import DEFAULT_CELL_SIZE, SpatialGrid, Visibility
+from hit_validation import HitValidator
 
-# Dictionary to store player states
-player_states = {}
+DEFAULT_STATE = {
+	'position': [0, 0],
+	'health': 100,
+	'facing_right': True,
+	'is_attacking': False,
+	'is_hit': False
+}
+
+class PlayerStateStore:
+	"""
+	State semua pemain dengan nomor urut (sequence) global.
+	Setiap join, leave dan perubahan field menaikkan seq, sehingga client cukup
+	mengirim seq terakhir yang sudah diterapkan dan hanya menerima perubahannya.
+
+	State disimpan di PlayerTable (record 7 byte per pemain di satu buffer,
+	lihat player_table.py). State dict hanya dibuat saat dibaca, dan full
+	snapshot biner langsung memakai buffer tersebut.
+
+	Posisi pemain juga dicatat di SpatialGrid. Jika aoi_radius > 0, snapshot
+	dan delta yang diminta oleh pemain di room ini (viewer) hanya berisi
+	pemain dalam radius tersebut ditambah ringkasan kasar pemain lain (far),
+	lihat aoi.py.
+
+	Hit pedang ditentukan di sini dengan HitValidator (hit_validation.py) dan
+	dikirim di setiap delta sebagai hits [seq, penyerang, yang kena].
+	"""
+	def __init__(self, max_tombstones=256, aoi_radius=0):
+		self.lock = threading.Lock()
+		# Dibangunkan setiap seq naik, dipakai subscriber /subscribe
+		self.changed = threading.Condition(self.lock)
+		self.seq = 0
+		self.table = PlayerTable()
+		self.left_seq = {}  # {player_id: seq saat leave}, tombstone untuk delta
+		self.packet_seq = {}  # {player_id: nomor paket UDP terakhir yang diterapkan}
+		self.max_tombstones = max_tombstones
+		# seq tertua yang masih bisa dilayani dengan delta, di bawahnya kirim full snapshot
+		self.horizon = 0
+		self.aoi_radius = aoi_radius
+		self.grid = SpatialGrid(aoi_radius or DEFAULT_CELL_SIZE)
+		self.viewers = {}  # {player_id: Visibility}
+		self.validator = HitValidator()
+		# (seq, penyerang, yang kena). Event yang terbuang menaikkan horizon, seperti
+		# tombstone leave, sehingga `since` yang lebih tua dijawab full snapshot
+		self.hit_events = deque(maxlen=max_tombstones)
+
+	def __contains__(self, player_id):
+		return player_id in self.table
+
+	def ids(self):
+		return list(self.table.ids)
+
+	def get(self, player_id):
+		with self.lock:
+			return self.table.state(player_id)
+
+	def join(self, player_id, state=None):
+		"""Daftarkan pemain baru, False jika player_id sudah dipakai atau di luar range record"""
+		with self.lock:
+			if player_id in self.table:
+				return False
+			return self._insert(player_id, state or DEFAULT_STATE)
+
+	def leave(self, player_id):
+		"""Hapus pemain, False jika player_id tidak ada"""
+		with self.lock:
+			if player_id not in self.table:
+				return False
+			self.seq += 1
+			self.table.remove(player_id)
+			self.grid.remove(player_id)
+			self.viewers.pop(player_id, None)
+			self.validator.remove(player_id)
+			self.packet_seq.pop(player_id, None)
+			self.left_seq[player_id] = self.seq
+			if len(self.left_seq) > self.max_tombstones:
+				oldest = min(self.left_seq, key=self.left_seq.get)
+				self.horizon = max(self.horizon, self.left_seq.pop(oldest))
+			self.changed.notify_all()
+			return True
+
+	def set_state(self, player_id, state):
+		"""Terapkan state baru, hanya field yang berubah yang menaikkan seq"""
+		with self.lock:
+			if player_id not in self.table:
+				self._insert(player_id, state)
+				return
+			if self._update(player_id, state, self.seq + 1):
+				self.seq += 1
+				self.changed.notify_all()
+
+	def set_state_sequenced(self, player_id, packet_seq, state):
+		"""
+		Seperti set_state untuk paket yang bisa hilang atau tertukar urutannya (UDP).
+		Paket yang lebih tua dari paket terakhir dibuang, dan pemain harus sudah
+		join lewat TCP. Return False jika paket dibuang.
+		"""
+		with self.lock:
+			if not self._accept_packet(player_id, packet_seq):
+				return False
+			if self._update(player_id, state, self.seq + 1):
+				self.seq += 1
+				self.changed.notify_all()
+			return True
+
+	def accept_packet(self, player_id, packet_seq):
+		"""Catat nomor paket UDP, False jika paket basi atau pemain belum join"""
+		with self.lock:
+			return self._accept_packet(player_id, packet_seq)
+
+	def apply_tick(self, updates):
+		"""
+		Terapkan hasil satu tick simulasi {player_id: state}.
+		Semua perubahan dalam satu tick memakai satu seq yang sama.
+		"""
+		with self.lock:
+			tick_seq = self.seq + 1
+			changed = False
+			for player_id, state in updates.items():
+				if player_id in self.table:
+					changed = self._update(player_id, state, tick_seq) or changed
+			if changed:
+				self.seq = tick_seq
+				self.changed.notify_all()
+
+	def wait_for_change(self, seq, timeout=None):
+		"""Tunggu sampai seq berbeda dari `seq`, return seq terbaru"""
+		with self.lock:
+			self.changed.wait_for(lambda: self.seq != seq, timeout)
+			return self.seq
+
+	def configure_aoi(self, radius):
+		"""Ganti radius AOI, grid dibangun ulang dengan ukuran cell sama dengan radius"""
+		with self.lock:
+			self.aoi_radius = radius
+			self.grid = SpatialGrid(radius or DEFAULT_CELL_SIZE)
+			for player_id in self.table.ids:
+				self.grid.move(player_id, *self.table.position(player_id))
+			self.viewers = {}
+
+	def _update(self, player_id, state, seq):
+		changed = self.table.update(player_id, state, seq)
+		if changed and self.table.field_seq['position'][self.table.slots[player_id]] == seq:
+			self.grid.move(player_id, *self.table.position(player_id))
+		# Setiap update (termasuk yang tidak mengubah apa pun) bisa mengenai pemain yang bergerak ke pedang
+		hits = self._record(player_id, state)
+		self._add_hits(seq, player_id, hits)
+		return changed or bool(hits)
+
+	def _record(self, player_id, state):
+		x, y = self.table.position(player_id)
+		return self.validator.record(player_id, x, y, bool(state.get('facing_right', True)), bool(state.get('is_attacking', False)))
+
+	def _add_hits(self, seq, attacker, targets):
+		for target in targets:
+			if len(self.hit_events) == self.hit_events.maxlen:
+				# event tertua terbuang, client yang belum melihatnya dikirimi full snapshot
+				self.horizon = max(self.horizon, self.hit_events[0][0])
+			self.hit_events.append((seq, attacker, target))
+
+	def _hits_since(self, since):
+		if since is None:
+			return []
+		return [list(hit) for hit in self.hit_events if hit[0] > since]
+
+	def _acknowledge(self, viewer, since):
+		# waktu world yang sedang dilihat viewer, dipakai untuk rewind saat viewer menyerang
+		if viewer in self.table:
+			self.validator.acknowledge(viewer, since, self.seq)
+
+	def _accept_packet(self, player_id, packet_seq):
+		if player_id not in self.table:
+			return False
+		if packet_seq <= self.packet_seq.get(player_id, -1):
+			return False
+		self.packet_seq[player_id] = packet_seq
+		return True
+
+	def _insert(self, player_id, state):
+		if not valid_id(player_id):
+			return False
+		self.seq += 1
+		self.table.insert(player_id, {f: state.get(f, DEFAULT_STATE[f]) for f in DEFAULT_STATE}, self.seq)
+		self.grid.move(player_id, *self.table.position(player_id))
+		# pemain yang join sambil menyerang bisa langsung mengenai pemain lain
+		self._add_hits(self.seq, player_id, self._record(player_id, state))
+		self.left_seq.pop(player_id, None)
+		self.packet_seq.pop(player_id, None)
+		self.changed.notify_all()
+		return True
+
+	def snapshot(self):
+		"""Full snapshot: (seq, {player_id: state})"""
+		with self.lock:
+			return self.seq, self.table.states()
+
+	def visible_snapshot(self, viewer):
+		"""
+		Full snapshot untuk viewer: (seq, {player_id: state} dalam radius AOI, far).
+		None jika AOI tidak aktif atau viewer bukan pemain di room ini.
+		"""
+		with self.lock:
+			visibility, near, far = self._view(viewer)
+			if visibility is None:
+				return None
+			visibility.synced(self.seq)
+			self._acknowledge(viewer, None)
+			return self.seq, {player_id: self.table.state(player_id) for player_id in near}, far
+
+	def delta(self, since, viewer=None):
+		"""
+		Perubahan setelah seq `since`: pemain yang join, leave dan field yang berubah.
+		Jika `since` sudah lebih tua dari tombstone atau hit event yang disimpan,
+		kirim full snapshot. Untuk viewer (jika AOI aktif) lihat _visible_delta.
+		hits berisi hit event setelah `since`.
+		"""
+		with self.lock:
+			self._acknowledge(viewer, since)
+			visibility, near, far = self._view(viewer)
+			if visibility is not None:
+				return self._visible_delta(since, visibility, near, far)
+			if self._needs_full(since):
+				states = self.table.states()
+				return {
+					'seq': self.seq,
+					'full': True,
+					'joined': list(states.keys()),
+					'left': [],
+					'changed': states,
+					'hits': self._hits_since(since)
+				}
+			table = self.table
+			joined = []
+			changed = {}
+			for slot, player_id in enumerate(table.ids):
+				if table.joined_seq[slot] > since:
+					joined.append(player_id)
+					changed[player_id] = table.state(player_id)
+					continue
+				fields = [f for f, column in table.field_seq.items() if column[slot] > since]
+				if fields:
+					state = table.state(player_id)
+					changed[player_id] = {f: state[f] for f in fields}
+			left = [p for p, s in self.left_seq.items() if s > since]
+			return {
+				'seq': self.seq,
+				'full': False,
+				'joined': joined,
+				'left': left,
+				'changed': changed,
+				'hits': self._hits_since(since)
+			}
+
+	def binary_delta(self, since, viewer=None):
+		"""
+		delta() dalam bentuk message MSG_DELTA. Full snapshot menyalin buffer
+		record sekaligus, delta biasa menyalin record pemain yang berubah.
+		Untuk viewer hanya record pemain dalam radius AOI (format biner tidak membawa far field).
+		"""
+		with self.lock:
+			table = self.table
+			self._acknowledge(viewer, since)
+			hits = self._hits_since(since)
+			visibility, near, _ = self._view(viewer)
+			if visibility is not None:
+				full = self._needs_full(since) or since < visibility.horizon
+				if full:
+					visibility.synced(self.seq)
+				records = b''.join(table.record_bytes(p) for p in near if full or self._visible_changed(p, since, visibility))
+				left = [] if full else [p for p, s in visibility.exited.items() if s > since]
+				hits = [hit for hit in hits if hit[1] in near or hit[2] in near]
+				return binary_protocol.encode_delta_records(self.seq, full, records, left, hits)
+			if self._needs_full(since):
+				return binary_protocol.encode_delta_records(self.seq, True, bytes(table.records), [], hits)
+			records = bytearray()
+			for slot, player_id in enumerate(table.ids):
+				if table.joined_seq[slot] > since or any(column[slot] > since for column in table.field_seq.values()):
+					records += table.record_bytes(player_id)
+			left = [p for p, s in self.left_seq.items() if s > since]
+			return binary_protocol.encode_delta_records(self.seq, False, bytes(records), left, hits)
+
+	def _view(self, viewer):
+		# (Visibility, near, far) untuk viewer, semua None jika respons tidak difilter
+		if not self.aoi_radius or viewer not in self.table:
+			return None, None, None
+		visibility = self.viewers.get(viewer)
+		if visibility is None:
+			visibility = self.viewers[viewer] = Visibility(self.seq, self.max_tombstones)
+		near, far = self.grid.query(*self.table.position(viewer), self.aoi_radius)
+		visibility.update(near, self.seq)
+		return visibility, near, far
+
+	def _visible_delta(self, since, visibility, near, far):
+		"""
+		Delta untuk viewer: pemain yang baru join atau baru masuk radius dikirim
+		sebagai joined dengan state lengkap, yang keluar radius (atau keluar room)
+		sebagai left, ditambah far field terbaru. Hanya hit yang melibatkan pemain
+		dalam radius yang dikirim.
+		"""
+		table = self.table
+		hits = [hit for hit in self._hits_since(since) if hit[1] in near or hit[2] in near]
+		if self._needs_full(since) or since < visibility.horizon:
+			visibility.synced(self.seq)
+			states = {player_id: table.state(player_id) for player_id in near}
+			return {
+				'seq': self.seq,
+				'full': True,
+				'joined': list(states.keys()),
+				'left': [],
+				'changed': states,
+				'far': far,
+				'hits': hits
+			}
+		joined = []
+		changed = {}
+		for player_id in near:
+			slot = table.slots[player_id]
+			if table.joined_seq[slot] > since or visibility.entered[player_id] > since:
+				joined.append(player_id)
+				changed[player_id] = table.state(player_id)
+				continue
+			fields = [f for f, column in table.field_seq.items() if column[slot] > since]
+			if fields:
+				state = table.state(player_id)
+				changed[player_id] = {f: state[f] for f in fields}
+		return {
+			'seq': self.seq,
+			'full': False,
+			'joined': joined,
+			'left': [p for p, s in visibility.exited.items() if s > since],
+			'changed': changed,
+			'far': far,
+			'hits': hits
+		}
+
+	def _visible_changed(self, player_id, since, visibility):
+		slot = self.table.slots[player_id]
+		if self.table.joined_seq[slot] > since or visibility.entered[player_id] > since:
+			return True
+		return any(column[slot] > since for column in self.table.field_seq.values())
+
+	def _needs_full(self, since):
+		return since is None or since < self.horizon or since > self.seq
+
+# Room untuk client yang tidak menyebut room, tidak pernah dihapus
+DEFAULT_ROOM = 'default'
+
+class Room:
+	"""
+	Satu partisi game dengan state pemain (dan lock-nya) sendiri, simulasi
+	sendiri dan cache world snapshot sendiri. Update di room berbeda tidak
+	pernah menunggu lock yang sama.
+	"""
+	def __init__(self, room_id, tick_rate=0, aoi_radius=0):
+		self.room_id = room_id
+		self.states = PlayerStateStore(aoi_radius=aoi_radius)
+		# Simulasi server-authoritative, None berarti client yang authoritative
+		self.simulation = None
+		# (seq, body) world snapshot terakhir, di-encode sekali per seq
+		self.snapshot_cache = (None, None)
+		if tick_rate > 0:
+			self.start_simulation(tick_rate)
+
+	def start_simulation(self, tick_rate):
+		self.simulation = Simulation(self.states, tick_rate)
+		self.simulation.start()
+
+	def close(self):
+		if self.simulation:
+			self.simulation.stop()
+
+class RoomRegistry:
+	"""
+	Semua room dan room tempat setiap pemain berada. Lock registry hanya dipakai
+	untuk join, leave dan membuat/menghapus room, update state memakai lock room.
+	player_id unik di semua room, jadi message biner dan UDP yang hanya membawa
+	player_id tetap sampai ke room yang benar.
+	"""
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.tick_rate = 0
+		self.aoi_radius = 0
+		self.rooms = {DEFAULT_ROOM: Room(DEFAULT_ROOM)}  # {room_id: Room}
+		self.player_rooms = {}  # {player_id: Room}
+
+	def get(self, room_id):
+		"""Room dengan room_id, None jika belum ada pemain yang join"""
+		return self.rooms.get(room_id)
+
+	def room_of(self, player_id):
+		return self.player_rooms.get(player_id)
+
+	def join(self, room_id, player_id, state=None):
+		"""Masukkan pemain ke room (dibuat jika belum ada), None jika player_id sudah dipakai"""
+		with self.lock:
+			if player_id in self.player_rooms:
+				return None
+			return self._join(room_id, player_id, state)
+
+	def ensure(self, player_id, room_id=DEFAULT_ROOM, state=None):
+		"""Room pemain, pemain yang belum join dimasukkan ke room_id seperti join (None jika player_id tidak valid)"""
+		room = self.player_rooms.get(player_id)
+		if room is None:
+			with self.lock:
+				room = self.player_rooms.get(player_id) or self._join(room_id, player_id, state)
+		return room
+
+	def leave(self, player_id):
+		"""Keluarkan pemain, room selain default dihapus saat pemain terakhir keluar"""
+		with self.lock:
+			room = self.player_rooms.pop(player_id, None)
+			if room is None or not room.states.leave(player_id):
+				return False
+			if room.room_id != DEFAULT_ROOM and not room.states.ids():
+				del self.rooms[room.room_id]
+				room.close()
+			return True
+
+	def start_simulation(self, tick_rate):
+		"""Jalankan simulasi di semua room, termasuk room yang dibuat nanti"""
+		with self.lock:
+			self.tick_rate = tick_rate
+			for room in self.rooms.values():
+				if room.simulation is None:
+					room.start_simulation(tick_rate)
+
+	def configure_aoi(self, radius):
+		"""Radius AOI di semua room, termasuk room yang dibuat nanti (0 = tanpa filter)"""
+		with self.lock:
+			self.aoi_radius = radius
+			for room in self.rooms.values():
+				room.states.configure_aoi(radius)
+
+	def _join(self, room_id, player_id, state):
+		if not valid_id(player_id):
+			return None
+		room = self.rooms.get(room_id)
+		if room is None:
+			room = self.rooms[room_id] = Room(room_id, self.tick_rate, self.aoi_radius)
+		room.states.join(player_id, state)
+		self.player_rooms[player_id] = room
+		return room
+
+# Semua room game
+rooms = RoomRegistry()
+
+def request_room(baris):
+	"""room_id dari query ?room= di baris request, DEFAULT_ROOM jika tidak ada"""
+	parts = baris.split(" ")
+	if len(parts) < 2:
+		return DEFAULT_ROOM
+	return parse_qs(urlparse(parts[1]).query).get('room', [DEFAULT_ROOM])[0]
+
+
+class RequestParser:
+	"""
+	Parser request HTTP inkremental untuk satu koneksi.
+	Data dibaca dengan recv_into ke satu bytearray yang dipakai ulang, posisi
+	pencarian akhir header disimpan antar recv sehingga byte yang sudah diperiksa
+	tidak discan ulang, dan header setiap request hanya diparse sekali.
+	"""
+	HEAD = 0  # menunggu \r\n\r\n akhir header
+	BODY = 1  # header sudah diparse, menunggu Content-Length byte body
+
+	def __init__(self, size=4096, max_header=65536, max_body=1 << 20):
+		self.buffer = bytearray(size)
+		self.view = memoryview(self.buffer)
+		self.max_header = max_header
+		self.max_body = max_body
+		self.start = 0  # awal request yang sedang diparse
+		self.end = 0    # akhir data valid di buffer
+		self.scan = 0   # posisi lanjutan pencarian \r\n\r\n
+		self.state = self.HEAD
+		self.request = None
+		self.body_start = 0
+		self.content_length = 0
+
+	def recv_into(self, sock):
+		"""Baca dari socket langsung ke buffer, return jumlah byte (0 jika koneksi ditutup)"""
+		if self.end == len(self.buffer):
+			self._make_room()
+		n = sock.recv_into(self.view[self.end:])
+		self.end += n
+		return n
+
+	def feed(self, data):
+		"""Tambahkan data yang sudah diterima di luar recv_into"""
+		if len(self.buffer) - self.end < len(data):
+			self._make_room(len(data))
+		self.view[self.end:self.end + len(data)] = data
+		self.end += len(data)
+
+	def remaining(self):
+		"""Byte yang belum menjadi request, misalnya frame setelah upgrade 101"""
+		return bytes(self.view[self.start:self.end])
+
+	def _make_room(self, needed=1):
+		# geser data yang belum diproses ke awal buffer, perbesar jika tetap kurang dari needed byte
+		pending = self.end - self.start
+		if self.start > 0:
+			self.view[:pending] = self.view[self.start:self.end]
+			self.scan -= self.start
+			self.body_start -= self.start
+			self.start = 0
+			self.end = pending
+		if len(self.buffer) - self.end < needed:
+			self.view.release()
+			self.buffer.extend(bytes(max(len(self.buffer), needed)))
+			self.view = memoryview(self.buffer)
+
+	def next_request(self):
+		"""
+		Return (request_line, headers, body) untuk request berikutnya yang sudah
+		lengkap, atau None jika masih perlu data. body berupa bytes.
+		"""
+		if self.state == self.HEAD:
+			#baris kosong sebelum request line diabaikan (RFC 7230 3.5)
+			while self.start < self.end and self.buffer[self.start] in b"\r\n":
+				self.start += 1
+			self.scan = max(self.scan, self.start)
+			header_end = self.buffer.find(b"\r\n\r\n", self.scan, self.end)
+			if header_end < 0:
+				if self.end - self.start > self.max_header:
+					raise ValueError("header terlalu besar")
+				#\r\n\r\n bisa terpotong di antara dua recv
+				self.scan = max(self.start, self.end - 3)
+				return None
+			lines = self.view[self.start:header_end].tobytes().decode('latin-1').split("\r\n")
+			headers = [n for n in lines[1:] if n != '']
+			content_length = 0
+			for header in headers:
+				key, _, value = header.partition(':')
+				if key.strip().lower() == 'content-length':
+					content_length = int(value.strip())
+					break
+			if content_length < 0 or content_length > self.max_body:
+				raise ValueError("Content-Length tidak valid")
+			self.request = (lines[0], headers)
+			self.body_start = header_end + 4
+			self.content_length = content_length
+			self.state = self.BODY
+
+		body_end = self.body_start + self.content_length
+		if self.end < body_end:
+			return None
+		body = self.view[self.body_start:body_end].tobytes()
+		request_line, headers = self.request
+		self.start = self.scan = body_end
+		self.state = self.HEAD
+		self.request = None
+		if self.start == self.end:
+			self.start = self.end = self.scan = 0
+		return request_line, headers, body
+
+
+def json_body(body):
+	"""Body JSON request POST, ValueError jika bukan object JSON"""
+	body_data = json.loads(body)
+	if not isinstance(body_data, dict):
+		raise ValueError("body harus berupa object JSON")
+	return body_data
+
+def player_state(state_data):
+	"""
+	State lengkap dari state client, field yang tidak ada memakai DEFAULT_STATE.
+	ValueError jika state tidak bisa disimpan sebagai record (misal position bukan
+	[x, y]), dipanggil sebelum rooms.ensure supaya state rusak tidak meninggalkan
+	pemain di room.
+	"""
+	if not isinstance(state_data, dict):
+		raise ValueError("state harus berupa object JSON")
+	state = {f: state_data.get(f, DEFAULT_STATE[f]) for f in DEFAULT_STATE}
+	try:
+		_, x, y, health, _ = binary_protocol.state_to_record(0, state)
+	except (TypeError, ValueError) as e:
+		raise ValueError(str(e))
+	state['position'] = [x, y]
+	state['health'] = health
+	return state
+
+def is_keep_alive(response):
+	"""True jika header response tidak meminta koneksi ditutup"""
+	header_end = response.find(b"\r\n\r\n")
+	return b"\r\nConnection: close\r\n" not in response[:header_end + 2]
+
+def send_parts(sock, parts):
+	"""
+	Kirim beberapa buffer (header, body, response berikutnya) dengan satu
+	sendmsg (scatter/gather) tanpa menggabungkannya dulu. Fallback ke sendall
+	jika platform tidak punya sendmsg (Windows).
+	"""
+	if not hasattr(sock, 'sendmsg'):
+		sock.sendall(b"".join(parts))
+		return
+	views = [memoryview(part) for part in parts if part]
+	while views:
+		sent = sock.sendmsg(views)
+		#sendmsg bisa mengirim sebagian, lanjutkan dari byte yang belum terkirim
+		while views and sent >= len(views[0]):
+			sent -= len(views[0])
+			views.pop(0)
+		if views and sent:
+			views[0] = views[0][sent:]
+
+class ResponseBuilder:
+	"""
+	Header response yang statis (status line, Connection, Server dan header
+	tambahan seperti Content-Type) disusun sekali per kombinasi lalu di-cache,
+	header Date diperbarui paling banyak sekali per detik.
+	"""
+	def __init__(self, server='myserver/1.0', max_cache=256):
+		self.server = server
+		self.max_cache = max_cache
+		self.blocks = {}
+		self.date = (None, b'')
+
+	def date_header(self):
+		now = int(time.time())
+		second, header = self.date
+		if second != now:
+			header = "Date: {}\r\n" . format(datetime.now().strftime('%c')).encode()
+			#tuple diganti sekaligus, aman dibaca thread lain tanpa lock
+			self.date = (now, header)
+		return header
+
+	def block(self, kode, message, headers):
+		key = (kode, message, tuple(headers.items()))
+		cached = self.blocks.get(key)
+		if cached is None:
+			status = "HTTP/1.1 {} {}\r\n" . format(kode, message).encode()
+			middle = ''
+			if 'Connection' not in headers:
+				#default HTTP/1.1 persistent, proses() menggantinya dengan close jika diminta client
+				middle += "Connection: keep-alive\r\n"
+			middle += "Server: {}\r\nContent-Length: " . format(self.server)
+			tail = "\r\n" + "".join("{}:{}\r\n" . format(kk, headers[kk]) for kk in headers) + "\r\n"
+			cached = (status, middle.encode(), tail.encode())
+			if len(self.blocks) >= self.max_cache:
+				#header dinamis (misal Location) jangan sampai membuat cache tumbuh terus
+				self.blocks.clear()
+			self.blocks[key] = cached
+		return cached
+
+	def build(self, kode, message, messagebody, headers):
+		"""Return [header, body], body tidak disalin"""
+		status, middle, tail = self.block(kode, message, headers)
+		head = b"".join((status, self.date_header(), middle, str(len(messagebody)).encode(), tail))
+		return [head, messagebody]
 
 class HttpServer:
 	def __init__(self):
@@ -16,66 +672,101 @@ class HttpServer:
 		self.types['.jpg']='image/jpeg'
 		self.types['.txt']='text/plain'
 		self.types['.html']='text/html'
+		# tick_rate simulasi server-authoritative di setiap room, 0 berarti client yang authoritative
+		self.tick_rate = 0
+		# radius area of interest, 0 berarti setiap pemain menerima semua pemain
+		self.aoi_radius = 0
+		self.responses = ResponseBuilder()
+
+	def start_simulation(self, tick_rate):
+		"""Jalankan loop simulasi dengan tick tetap (Hz), satu loop per room"""
+		self.tick_rate = tick_rate
+		rooms.start_simulation(tick_rate)
+
+	def configure_aoi(self, radius):
+		"""Snapshot dan delta untuk pemain (?player_id=) hanya berisi pemain dalam radius"""
+		self.aoi_radius = radius
+		rooms.configure_aoi(radius)
 
 	# response(kode, message, messagebody, headers)
 	def response(self, kode=404, message='Not Found', messagebody=bytes(), headers={}):
-		tanggal = datetime.now().strftime('%c')
-		resp=[]
-		resp.append("HTTP/1.1 {} {}\r\n" . format(kode,message))
-		resp.append("Date: {}\r\n" . format(tanggal))
-		resp.append("Connection: close\r\n")
-		resp.append("Server: myserver/1.0\r\n")
-		resp.append("Content-Length: {}\r\n" . format(len(messagebody)))
-		for kk in headers:
-			resp.append("{}:{}\r\n" . format(kk,headers[kk]))
-		resp.append("\r\n")
-
-		response_headers=''
-		for i in resp:
-			response_headers="{}{}" . format(response_headers,i)
-		#menggabungkan resp menjadi satu string dan menggabungkan dengan messagebody yang berupa bytes
-		#response harus berupa bytes
-		#message body harus diubah dulu menjadi bytes
+		#response adalah bytes
+		return b"".join(self.response_parts(kode, message, messagebody, headers))
+
+	def response_parts(self, kode=404, message='Not Found', messagebody=bytes(), headers={}):
+		#sama dengan response(), tapi return [header, body] untuk send_parts
+		#message body di-encode dulu supaya Content-Length dihitung dalam byte, bukan karakter
 		if (type(messagebody) is not bytes):
 			messagebody = messagebody.encode()
+		return self.responses.build(kode, message, messagebody, headers)
 
-		response = response_headers.encode() + messagebody
-		#response adalah bytes
-		return response
+	def stream_headers(self, kode=200, message='OK', headers={}):
+		# header untuk response streaming, tanpa Content-Length, body dikirim sampai koneksi ditutup
+		tanggal = self.responses.date_header().decode()
+		resp = "HTTP/1.1 {} {}\r\n{}Connection: close\r\nServer: myserver/1.0\r\n" . format(kode, message, tanggal)
+		for kk in headers:
+			resp += "{}:{}\r\n" . format(kk, headers[kk])
+		return (resp + "\r\n").encode()
+
+	def subscribe(self, room, since, viewer=None, heartbeat=15):
+		"""
+		Generator untuk GET /subscribe (server-sent events).
+		Setiap kali seq berubah (termasuk setiap tick simulasi) kirim delta sejak
+		event terakhir, tanpa client perlu polling.
+		"""
+		yield self.stream_headers(200, 'OK', {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+		for delta in self.world_updates(room, since, viewer, heartbeat):
+			if delta is None:
+				# komentar SSE supaya koneksi idle tidak dianggap mati
+				yield b": keep-alive\n\n"
+			else:
+				yield "id: {}\ndata: {}\n\n" . format(delta['seq'], json.dumps(delta)).encode()
+
+	def world_updates(self, room, since, viewer=None, heartbeat=15):
+		# generator delta setiap seq room berubah, None jika tidak ada perubahan selama heartbeat detik
+		while True:
+			delta = room.states.delta(since, viewer)
+			if delta['full'] or delta['seq'] != since:
+				since = delta['seq']
+				# dengan AOI, perubahan di luar radius viewer tidak perlu dikirim
+				if delta['full'] or delta['joined'] or delta['left'] or delta['changed'] or delta['hits']:
+					yield delta
+			if room.states.wait_for_change(since, heartbeat) == since:
+				yield None
 
 	def proses(self,data):
-		requests = data.split("\r\n")
+		#data berupa satu request lengkap dalam bentuk string
+		head, _, body = data.partition("\r\n\r\n")
+		requests = head.split("\r\n")
 		#print(requests)
 		baris = requests[0]
 		#print(baris)
 
 		all_headers = [n for n in requests[1:] if n!='']
-		content_length = 0
-		for header in all_headers:
-			if header.lower().startswith('content-length:'):
-				try:
-					content_length = int(header.split(':')[1].strip())
-					break
-				except (ValueError, IndexError):
-					pass
-		
-		body = ''
-		if content_length > 0:
-			# Find the start of the body
-			body_start = data.find('\r\n\r\n') + len('\r\n\r\n')
-			if body_start > 3:
-				# The body is after the headers
-				# The data received by the server is a string representation of bytes, so we need to handle the escaped characters
-				body_raw = data[body_start:]
-				# We need to decode the escaped string
-				body = bytes(body_raw, "utf-8").decode("unicode_escape")
-
+		return self.proses_request(baris, all_headers, body.encode())
 
+	def proses_request(self, baris, all_headers, body):
+		#request yang sudah diparse RequestParser, body berupa bytes
 		j = baris.split(" ")
+		hasil = self.route(j, all_headers, body)
+
+		#HTTP/1.1 persistent kecuali client mengirim Connection: close,
+		#HTTP/1.0 hanya persistent jika client meminta keep-alive
+		connection = (self.header_value(all_headers, 'connection') or '').lower()
+		version = j[2].strip().upper() if len(j) > 2 else 'HTTP/1.0'
+		keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+		if not keep_alive and isinstance(hasil, bytes):
+			hasil = hasil.replace(b"Connection: keep-alive\r\n", b"Connection: close\r\n", 1)
+		return hasil
+
+	def route(self, j, all_headers, body):
 		try:
 			method=j[0].upper().strip()
 			if (method=='GET'):
 				object_address = j[1].strip()
+				upgrade = self.header_value(all_headers, 'upgrade')
+				if upgrade and upgrade.lower() == 'websocket':
+					return self.websocket_handshake(all_headers)
 				return self.http_get(object_address, all_headers)
 			elif (method=='POST'):
 				object_address = j[1].strip()
@@ -85,7 +776,38 @@ class HttpServer:
 				return self.response(400,'Bad Request','',{})
 		except IndexError:
 			return self.response(400,'Bad Request','',{})
+		except (ValueError, TypeError) as e:
+			#body JSON rusak atau field dengan tipe yang salah, framing request tetap utuh
+			return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid request body: {}' . format(e)}), {'Content-Type': 'application/json'})
 
+	def bad_request(self, reason):
+		"""400 untuk request yang framing-nya rusak, koneksi ditutup setelah response ini"""
+		hasil = self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': reason}), {'Content-Type': 'application/json'})
+		return hasil.replace(b"Connection: keep-alive\r\n", b"Connection: close\r\n", 1)
+
+
+	def header_value(self, headers, name):
+		# headers berupa list baris "Nama: nilai", nama tidak case-sensitive
+		for header in headers:
+			key, _, value = header.partition(':')
+			if key.strip().lower() == name:
+				return value.strip()
+		return None
+
+	def websocket_handshake(self, headers):
+		"""
+		Handshake WebSocket, setelah 101 handler koneksi berpindah ke frame
+		WebSocket dua arah (lihat websocket_protocol.py)
+		"""
+		key = self.header_value(headers, 'sec-websocket-key')
+		version = self.header_value(headers, 'sec-websocket-version')
+		if not key or version != '13':
+			return self.response(400, 'Bad Request', 'WebSocket handshake tidak valid', {'Sec-WebSocket-Version': '13'})
+		return self.response(101, 'Switching Protocols', bytes(), {
+			'Upgrade': 'websocket',
+			'Connection': 'Upgrade',
+			'Sec-WebSocket-Accept': websocket_protocol.accept_key(key)
+		})
 
 	def http_get(self,object_address,headers):
 		
@@ -97,16 +819,74 @@ class HttpServer:
 		if (path == '/'):
 			return self.response(200,'OK','Ini Adalah web Server percobaan',dict())
 
-		elif (path == '/get_player_ids'):
-			ids = list(player_states.keys())
+		elif (path == '/binary'):
+			# Negosiasi protokol biner, setelah 101 koneksi memakai message
+			# length-prefixed dari binary_protocol
+			if self.header_value(headers, 'upgrade') == binary_protocol.PROTOCOL_NAME:
+				return self.response(101, 'Switching Protocols', bytes(), {'Upgrade': binary_protocol.PROTOCOL_NAME, 'Connection': 'Upgrade'})
+			return self.response(426, 'Upgrade Required', 'Upgrade ke {} diperlukan' . format(binary_protocol.PROTOCOL_NAME), {'Upgrade': binary_protocol.PROTOCOL_NAME})
+
+		# Route state di bawah ini selalu untuk satu room, ?room=<room_id> (default: DEFAULT_ROOM)
+		params = parse_qs(query)
+		room = rooms.get(params.get('room', [DEFAULT_ROOM])[0])
+		if room is None:
+			return self.response(404, 'Not Found', json.dumps({'status': 'Error', 'message': 'Room not found'}), {'Content-Type': 'application/json'})
+		# Pemain yang meminta snapshot/delta, dipakai untuk filter area of interest
+		viewer = params.get('player_id', [''])[0]
+		viewer = int(viewer) if viewer.isdigit() else None
+
+		if (path == '/get_player_ids'):
+			ids = room.states.ids()
 			return self.response(200, 'OK', json.dumps({'status': 'OK', 'players': ids}), {'Content-Type': 'application/json'})
 
+		elif (path == '/world_snapshot'):
+			# Satu response berisi roster dan state semua pemain,
+			# menggantikan get_player_ids + get_player_state per pemain
+			visible = room.states.visible_snapshot(viewer) if viewer else None
+			if visible is not None:
+				# snapshot AOI berbeda per viewer, tidak di-cache
+				seq, states, far = visible
+				body = json.dumps({'status': 'OK', 'seq': seq, 'players': list(states.keys()), 'states': states, 'far': far})
+				return self.response(200, 'OK', body, {'Content-Type': 'application/json'})
+			seq, body = room.snapshot_cache
+			if seq != room.states.seq:
+				seq, states = room.states.snapshot()
+				snapshot = {
+					'status': 'OK',
+					'seq': seq,
+					'players': list(states.keys()),
+					'states': states
+				}
+				body = json.dumps(snapshot).encode()
+				room.snapshot_cache = (seq, body)
+			return self.response(200, 'OK', body, {'Content-Type': 'application/json'})
+
+		elif (path == '/world_delta'):
+			# Client mengirim seq terakhir yang sudah diterapkan (ack),
+			# server hanya membalas join, leave dan field yang berubah sejak seq tersebut
+			since = params.get('since', [None])[0]
+			try:
+				since = int(since) if since is not None else None
+			except ValueError:
+				since = None
+			delta = room.states.delta(since, viewer)
+			delta['status'] = 'OK'
+			return self.response(200, 'OK', json.dumps(delta), {'Content-Type': 'application/json'})
+
+		elif (path == '/subscribe'):
+			# Response berupa generator, handler koneksi mengirim setiap event sampai client menutup koneksi
+			since = params.get('since', [None])[0]
+			try:
+				since = int(since) if since is not None else None
+			except ValueError:
+				since = None
+			return self.subscribe(room, since, viewer)
+
 		elif (path == '/get_player_state'):
-			params = parse_qs(query)
 			player_id = params.get('id', [None])[0]
 			player_id = int(player_id) if player_id is not None else None
-			if player_id and player_id in player_states:
-				return self.response(200, 'OK', json.dumps(player_states[player_id]), {'Content-Type': 'application/json'})
+			if player_id and player_id in room.states:
+				return self.response(200, 'OK', json.dumps(room.states.get(player_id)), {'Content-Type': 'application/json'})
 			return self.response(404, 'Not Found', json.dumps({'status': 'Error', 'message': 'Player not found'}), {'Content-Type': 'application/json'})
 
 		return self.response(404, 'Not Found', 'Endpoint not found', {})
@@ -120,31 +900,28 @@ class HttpServer:
 		Untuk registrasi player_id beserta statenya di server
 		"""
 		if path == '/join_game':
-			body_data = json.loads(body)
+			body_data = json_body(body)
 			player_id = body_data.get('player_id')
 			player_id = int(player_id) if player_id is not None else None
-			if player_id and player_id not in player_states:
-				player_states[player_id] = {
-					'position': [0, 0],
-					'health': 100,
-					'facing_right': True,
-					'is_attacking': False,
-					'is_hit': False
-				}
-				print(f"Player {player_id} joined. State: {player_states[player_id]}")
-				return self.response(200, 'OK', json.dumps({'status': 'OK'}), {'Content-Type': 'application/json'})
-			elif player_id and player_id in player_states:
+			room_id = str(body_data.get('room') or DEFAULT_ROOM)
+			# Dengan simulasi, posisi awal ditentukan server
+			initial_state = {'position': list(arena.SPAWN_POSITION)} if self.tick_rate else None
+			room = rooms.join(room_id, player_id, initial_state) if player_id else None
+			if room:
+				print(f"Player {player_id} joined room {room_id}. State: {room.states.get(player_id)}")
+				# tick_rate > 0 artinya client cukup mengirim input, bukan state
+				return self.response(200, 'OK', json.dumps({'status': 'OK', 'room': room_id, 'tick_rate': self.tick_rate}), {'Content-Type': 'application/json'})
+			elif player_id and rooms.room_of(player_id):
 				print(f"Player {player_id} already exists!")
 				return self.response(409, 'Conflict', json.dumps({'status': 'Error', 'message': 'Player ID already in use'}), {'Content-Type': 'application/json'})
 			return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid player ID'}), {'Content-Type': 'application/json'})
 
 		elif path == '/leave_game':
-			body_data = json.loads(body)
+			body_data = json_body(body)
 			player_id = body_data.get('player_id')
 			player_id = int(player_id) if player_id is not None else None
-			if player_id and player_id in player_states:
-				del player_states[player_id]
-				return self.response(204, 'OK', json.dumps({'status': 'OK'}), {'Content-Type': 'application/json'})
+			if player_id and rooms.leave(player_id):
+				return self.response(200, 'OK', json.dumps({'status': 'OK'}), {'Content-Type': 'application/json'})
 			return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid player ID'}), {'Content-Type': 'application/json'})
 
 
@@ -153,23 +930,175 @@ class HttpServer:
 		Manajemen state dari masing-masing pemain
 		"""
 		if path == '/set_player_state':
-			body_data = json.loads(body)
+			body_data = json_body(body)
 			player_id = body_data.get('id')
 			player_id = int(player_id) if player_id is not None else None
-			state_data = body_data.get('state')
-			if player_id:
-				player_states[player_id] = {
-					'position': state_data.get('position', [0, 0]),
-					'health': state_data.get('health', 100),
-					'facing_right': state_data.get('facing_right', True),
-					'is_attacking': state_data.get('is_attacking', False),
-					'is_hit': state_data.get('is_hit', False)
-				}
+			try:
+				# divalidasi sebelum ensure supaya state rusak tidak meninggalkan pemain di room
+				state = player_state(body_data.get('state'))
+			except ValueError as e:
+				return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid state: {}' . format(e)}), {'Content-Type': 'application/json'})
+			# pemain yang belum join otomatis masuk ke room di body (default: DEFAULT_ROOM)
+			room = rooms.ensure(player_id, str(body_data.get('room') or DEFAULT_ROOM)) if player_id else None
+			if room:
+				room.states.set_state(player_id, state)
+				return self.response(200, 'OK', json.dumps({'status': 'OK'}), {'Content-Type': 'application/json'})
+			return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid player ID'}), {'Content-Type': 'application/json'})
+
+		if path == '/set_player_input':
+			if not self.tick_rate:
+				return self.response(409, 'Conflict', json.dumps({'status': 'Error', 'message': 'Server is not authoritative'}), {'Content-Type': 'application/json'})
+			body_data = json_body(body)
+			player_id = body_data.get('id')
+			player_id = int(player_id) if player_id is not None else None
+			room = rooms.room_of(player_id)
+			if player_id and room:
+				room.simulation.set_input(player_id, body_data.get('input', {}))
 				return self.response(200, 'OK', json.dumps({'status': 'OK'}), {'Content-Type': 'application/json'})
 			return self.response(400, 'Bad Request', json.dumps({'status': 'Error', 'message': 'Invalid player ID'}), {'Content-Type': 'application/json'})
 
 		return self.response(404, 'Not Found', 'Endpoint not found', {})
 
+	def proses_binary(self, payload, room_id=DEFAULT_ROOM):
+		"""
+		Proses satu message binary_protocol (tanpa prefix panjang).
+		room_id dari request upgrade (?room=), dipakai untuk delta request.
+		Return payload balasan, atau None jika message tidak perlu dibalas.
+		"""
+		try:
+			return self._binary_message(payload, room_id)
+		except struct.error:
+			return binary_protocol.encode_ack(False)
+
+	def _binary_message(self, payload, room_id):
+		msg_type = binary_protocol.message_type(payload)
+		if msg_type == binary_protocol.MSG_SET_STATE:
+			player_id, state = binary_protocol.decode_set_state(payload)
+			room = rooms.ensure(player_id, room_id) if player_id else None
+			if room:
+				room.states.set_state(player_id, state)
+			return None
+
+		elif msg_type == binary_protocol.MSG_DELTA_REQUEST:
+			since = binary_protocol.decode_delta_request(payload)
+			return self._binary_delta(rooms.get(room_id), since)
+
+		elif msg_type == binary_protocol.MSG_SET_INPUT:
+			player_id, player_input = binary_protocol.decode_set_input(payload)
+			room = rooms.room_of(player_id)
+			if room and room.simulation:
+				room.simulation.set_input(player_id, player_input)
+			return None
+
+		elif msg_type == binary_protocol.MSG_LEAVE:
+			player_id = binary_protocol.decode_leave(payload)
+			return binary_protocol.encode_ack(bool(player_id) and rooms.leave(player_id))
+
+		return binary_protocol.encode_ack(False)
+
+	def proses_websocket_text(self, text, room_id=DEFAULT_ROOM):
+		"""
+		Perintah JSON dari frame text WebSocket, misalnya
+		{"op": "world_delta", "since": 10} atau {"op": "set_player_state", "id": 1, "state": {...}}.
+		Room dari request upgrade (?room=), bisa diganti per perintah dengan "room".
+		Perintah snapshot/delta/subscribe dengan "player_id" difilter sesuai AOI pemain tersebut.
+		Return string balasan, None jika tidak perlu dibalas, atau generator
+		untuk op subscribe.
+		"""
+		try:
+			command = json.loads(text)
+			op = command.get('op')
+			room_id = str(command.get('room') or room_id)
+		except (ValueError, AttributeError):
+			return json.dumps({'status': 'Error', 'message': 'Invalid command'})
+		try:
+			return self._websocket_command(command, op, room_id)
+		except (TypeError, ValueError) as e:
+			# field dengan tipe salah (misal "id": "abc") dibalas error, koneksi tetap hidup
+			return json.dumps({'status': 'Error', 'message': 'Invalid command: {}' . format(e)})
+
+	def _websocket_command(self, command, op, room_id):
+		if op in ('world_snapshot', 'world_delta', 'subscribe'):
+			room = rooms.get(room_id)
+			if room is None:
+				return json.dumps({'status': 'Error', 'message': 'Room not found'})
+			try:
+				# sama dengan query ?since=&player_id= di HTTP: keduanya integer
+				since = None if command.get('since') is None else int(command.get('since'))
+				viewer = None if command.get('player_id') is None else int(command.get('player_id'))
+			except (TypeError, ValueError):
+				return json.dumps({'status': 'Error', 'message': 'Invalid since or player_id'})
+
+		if op == 'world_snapshot':
+			visible = room.states.visible_snapshot(viewer)
+			if visible is not None:
+				seq, states, far = visible
+				return json.dumps({'status': 'OK', 'seq': seq, 'players': list(states.keys()), 'states': states, 'far': far})
+			seq, states = room.states.snapshot()
+			return json.dumps({'status': 'OK', 'seq': seq, 'players': list(states.keys()), 'states': states})
+
+		elif op == 'world_delta':
+			delta = room.states.delta(since, viewer)
+			delta['status'] = 'OK'
+			return json.dumps(delta)
+
+		elif op == 'subscribe':
+			# Generator: handler koneksi mendorong setiap delta sebagai frame text,
+			# None berarti idle dan handler cukup mengirim ping
+			return (None if delta is None else json.dumps(delta) for delta in self.world_updates(room, since, viewer))
+
+		elif op == 'set_player_state':
+			player_id = command.get('id')
+			player_id = int(player_id) if player_id is not None else None
+			try:
+				state = player_state(command.get('state') or {})
+			except ValueError as e:
+				return json.dumps({'status': 'Error', 'message': 'Invalid state: {}' . format(e)})
+			room = rooms.ensure(player_id, room_id) if player_id else None
+			if room:
+				room.states.set_state(player_id, state)
+			return None
+
+		elif op == 'set_player_input':
+			player_id = command.get('id')
+			player_id = int(player_id) if player_id is not None else None
+			room = rooms.room_of(player_id)
+			if room and room.simulation:
+				room.simulation.set_input(player_id, command.get('input', {}))
+			return None
+
+		return json.dumps({'status': 'Error', 'message': 'Invalid command'})
+
+	def _binary_delta(self, room, since, viewer=None):
+		if room is None:
+			# room sudah kosong dan dihapus, tidak ada pemain yang perlu dikirim
+			return binary_protocol.encode_delta(0, True, {}, [])
+		# Record biner selalu membawa state lengkap, bukan per field
+		return room.states.binary_delta(since, viewer)
+
+	def proses_datagram(self, payload):
+		"""
+		Proses satu datagram dari channel UDP (state atau input pergerakan).
+		Paket yang sudah basi dibuang, balasannya delta sejak seq yang di-ack client
+		(difilter sesuai AOI pengirim jika aktif). Delta yang tidak muat di satu
+		datagram diganti penanda resync, client mengambilnya lewat TCP.
+		"""
+		try:
+			if binary_protocol.message_type(payload) == binary_protocol.MSG_UDP_INPUT:
+				packet_seq, ack, player_id, player_input = binary_protocol.decode_udp_input(payload)
+				room = rooms.room_of(player_id)
+				if room and room.simulation and room.states.accept_packet(player_id, packet_seq):
+					room.simulation.set_input(player_id, player_input)
+			else:
+				packet_seq, ack, player_id, state = binary_protocol.decode_udp_state(payload)
+				# pemain harus sudah join lewat TCP, room-nya dari join tersebut
+				room = rooms.room_of(player_id)
+				if room:
+					room.states.set_state_sequenced(player_id, packet_seq, state)
+		except struct.error:
+			return None
+		return binary_protocol.fit_datagram(self._binary_delta(room or rooms.get(DEFAULT_ROOM), ack, player_id))
+
 
 if __name__=="__main__":
 	httpserver = HttpServer()
\ No newline at end of file
@@ -8,6 +8,8 @@ from player import Player
 
 from clientInterface import ClientInterface
 
+import arena
+
 def select_player_id_by_keyboard(screen):
     import pygame
     font = pygame.font.SysFont("Arial", 48)
@@ -170,7 +172,7 @@ def main():
     pygame.init()
 
     # Screen and Display
-    WIDTH, HEIGHT = 600, 600
+    WIDTH, HEIGHT = arena.WIDTH, arena.HEIGHT
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Multiplayer Knight Game")
     clock = pygame.time.Clock()
@@ -196,23 +198,11 @@ def main():
     
     KNIGHT_ANIMATION_FOLDER = 'assets/images/knight'
 
-    walls = []
-
-    # 4 Corner Walls
-    walls.append(pygame.Rect(0, 0, 10, HEIGHT))
-    walls.append(pygame.Rect(WIDTH - 10, 0, 10, HEIGHT))
-    walls.append(pygame.Rect(0, 0, WIDTH, 10))
-    walls.append(pygame.Rect(0, HEIGHT - 10, WIDTH, 10))
-
-    # Extra Walls
-    scaling_factor = 2.307
-    walls.append(pygame.Rect(130*scaling_factor, 0, 5*scaling_factor, 45*scaling_factor))
-    walls.append(pygame.Rect(130*scaling_factor, 45*scaling_factor, 98*scaling_factor, 5*scaling_factor))
-    walls.append(pygame.Rect(145*scaling_factor, 103*scaling_factor, 115*scaling_factor, 5*scaling_factor))
-    walls.append(pygame.Rect(0, 210*scaling_factor, 160*scaling_factor, 5*scaling_factor))
+    # Wall didefinisikan di arena.py supaya server bisa memakai map yang sama
+    walls = [pygame.Rect(*wall) for wall in arena.WALLS]
 
     # --- Multiplayer Setup ---
-    client = ClientInterface()
+    client = ClientInterface(binary=True, udp=True, subscribe=True)
     
     # Show main menu
     menu_result = show_main_menu(screen)
@@ -234,7 +224,7 @@ def main():
             # Show error message for taken ID
             show_id_taken_error(screen, selected_id)
             # Reset client for next attempt
-            client = ClientInterface()
+            client = ClientInterface(binary=True, udp=True, subscribe=True)
 
     # Create the local player
     local_player = Player(id=player_id, x=100, y=100, 
@@ -261,7 +251,11 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r and game_over:
                     all_players[player_id].respawn(x=100, y=100)
-                    client.set_player_state(player_id, all_players[player_id].get_state_dict())
+                    if client.server_authoritative:
+                        # Server memindahkan pemain ke spawn saat health kembali penuh
+                        client.set_player_input(player_id, all_players[player_id].get_input_dict())
+                    else:
+                        client.set_player_state(player_id, all_players[player_id].get_state_dict())
                     game_over = False
                     game_over_time = None
                 elif event.key == pygame.K_ESCAPE:
@@ -272,7 +266,7 @@ def main():
                         running = False
                     elif menu_choice == "play":
                         # Restart multiplayer
-                        client = ClientInterface()
+                        client = ClientInterface(binary=True, udp=True, subscribe=True)
                         # Try to join with selected ID, loop until successful
                         player_id = None
                         while player_id is None:
@@ -286,7 +280,7 @@ def main():
                                 print(f"Failed to join as Player {selected_id}. ID may already be in use.")
                                 show_id_taken_error(screen, selected_id)
                                 # Reset client for next attempt
-                                client = ClientInterface()
+                                client = ClientInterface(binary=True, udp=True, subscribe=True)
                         
                         # Create new local player
                         local_player = Player(id=player_id, x=100, y=100, 
@@ -298,8 +292,8 @@ def main():
                         start_time = pygame.time.get_ticks()
 
         # --- Update Remote Players ---
-        # Dapatkan daftar semua ID pemain dari server
-        all_ids_from_server = client.get_all_player_ids()
+        # Sinkronkan state semua pemain, server hanya mengirim perubahan sejak seq terakhir
+        all_ids_from_server = client.sync_world()
         # Tambahkan pemain baru yang belum ada di 'all_players'
         for p_id in all_ids_from_server:
             if p_id not in all_players:
@@ -83,12 +83,28 @@ class Player(pygame.sprite.Sprite):
             'is_attacking': self.is_attacking,
             'is_hit': self.is_hit
         }
-    
-        if self.is_attacking:
-            state['attacker_id'] = self.id
-
         return state
 
+    def get_input_dict(self):
+        """Input pemain untuk server-authoritative: arah gerak dan aksi, bukan posisi."""
+        return {
+            'move': [int(self.velocity.x > 0) - int(self.velocity.x < 0),
+                     int(self.velocity.y > 0) - int(self.velocity.y < 0)],
+            'health': self.health,
+            'facing_right': self.facing_right,
+            'is_attacking': self.is_attacking,
+            'is_hit': self.is_hit
+        }
+
+    def reconcile_with_server(self, tolerance=32):
+        """Posisi lokal hanya prediksi, snap ke posisi server jika selisihnya terlalu jauh."""
+        state = self.client_interface.get_cached_player_state(self.id)
+        if not state:
+            return
+        server_x, server_y = state.get('position', self.rect.topleft)
+        if abs(server_x - self.rect.x) > tolerance or abs(server_y - self.rect.y) > tolerance:
+            self.rect.topleft = (server_x, server_y)
+
     def update_from_state(self, state_dict):
         """Memperbarui atribut pemain dari dictionary state yang diterima dari server."""
         if not state_dict:
@@ -101,7 +117,7 @@ class Player(pygame.sprite.Sprite):
 
     def update(self, dt, walls, all_players):
         if self.is_remote:
-            state = self.client_interface.get_player_state(self.id)
+            state = self.client_interface.get_cached_player_state(self.id)
             if state:
                 self.update_from_state(state)
             self.update_animation(dt, moving=True) 
@@ -176,7 +192,11 @@ class Player(pygame.sprite.Sprite):
             self.handle_collision(walls, 'vertical')
             self.update_animation(dt, moving)
 
-            self.client_interface.set_player_state(self.id, self.get_state_dict())
+            if self.client_interface.server_authoritative:
+                self.client_interface.set_player_input(self.id, self.get_input_dict())
+                self.reconcile_with_server()
+            else:
+                self.client_interface.set_player_state(self.id, self.get_state_dict())
 
     def perform_attack(self, all_players):
         attack_rect = self.get_sword_rect()
@@ -198,22 +218,10 @@ class Player(pygame.sprite.Sprite):
                     self.hit_during_attack.add(other_player.id)
 
     def check_if_hit(self, all_players):
-        if self.is_hit: return
-
-        for other_id, other_player in all_players.items():
-            if other_id == self.id:
-                continue
-
-            if other_player.is_remote and other_player.is_attacking:
-                attacker_id = other_player.client_interface.get_player_state(other_id).get('attacker_id')
-                if attacker_id == self.id or other_id == self.id:
-                    continue
-
-                attack_rect = other_player.get_sword_rect()
-                if attack_rect and self.rect.colliderect(attack_rect):
-                    print(f"Player {self.id} got hit by Player {other_id}")
-                    self.register_hit()
-                    break
+        """Hit dari pemain remote ditentukan server (hit_validation.py), client hanya menerapkan hit event untuknya."""
+        for attacker_id in self.client_interface.take_hits(self.id):
+            print(f"Player {self.id} got hit by Player {attacker_id}")
+            self.register_hit()
 
     def register_hit(self):
         if not self.is_hit:
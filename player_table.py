@@ -0,0 +1,117 @@
+"""
+Tabel state pemain yang padat untuk PlayerStateStore.
+
+Setiap pemain menempati satu slot. Record state disimpan dalam format
+binary_protocol.RECORD (7 byte) berurutan di satu bytearray, dan seq
+perubahan per field serta seq join disimpan di array('I') per kolom.
+Tidak ada dict, list atau bool per pemain selain indeks player_id -> slot.
+
+Slot 0..count-1 selalu terisi: saat pemain keluar, record di slot terakhir
+dipindah ke slot yang kosong (swap-remove). Dengan begitu semua record tetap
+bersebelahan dan full snapshot biner cukup satu salinan buffer.
+"""
+
+import array
+
+import binary_protocol
+
+RECORD = binary_protocol.RECORD
+FIELDS = ('position', 'health', 'facing_right', 'is_attacking', 'is_hit')
+MAX_PLAYER_ID = 0xFFFF  # player_id di record berupa uint16
+
+_FLAG_FIELDS = (
+    ('facing_right', binary_protocol.FLAG_FACING_RIGHT),
+    ('is_attacking', binary_protocol.FLAG_ATTACKING),
+    ('is_hit', binary_protocol.FLAG_HIT),
+)
+
+
+def valid_id(player_id):
+    return isinstance(player_id, int) and 0 < player_id <= MAX_PLAYER_ID
+
+
+class PlayerTable:
+    def __init__(self):
+        self.records = bytearray()
+        self.ids = []      # player_id per slot
+        self.slots = {}    # {player_id: slot}
+        self.joined_seq = array.array('I')
+        self.field_seq = {field: array.array('I') for field in FIELDS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, player_id):
+        return player_id in self.slots
+
+    def insert(self, player_id, state, seq):
+        """Tambah pemain di slot baru, semua field dianggap berubah pada seq"""
+        self.slots[player_id] = len(self.ids)
+        self.ids.append(player_id)
+        self.records += RECORD.pack(*binary_protocol.state_to_record(player_id, state))
+        self.joined_seq.append(seq)
+        for column in self.field_seq.values():
+            column.append(seq)
+
+    def remove(self, player_id):
+        slot = self.slots.pop(player_id)
+        last = len(self.ids) - 1
+        if slot != last:
+            # pindahkan pemain di slot terakhir supaya slot tetap padat
+            moved = self.ids[last]
+            self.ids[slot] = moved
+            self.slots[moved] = slot
+            size = RECORD.size
+            self.records[slot * size:(slot + 1) * size] = self.records[last * size:(last + 1) * size]
+            self.joined_seq[slot] = self.joined_seq[last]
+            for column in self.field_seq.values():
+                column[slot] = column[last]
+        self.ids.pop()
+        del self.records[last * RECORD.size:]
+        self.joined_seq.pop()
+        for column in self.field_seq.values():
+            column.pop()
+
+    def update(self, player_id, state, seq):
+        """Tulis state baru, field yang berubah ditandai dengan seq. Return True jika ada yang berubah"""
+        slot = self.slots[player_id]
+        offset = slot * RECORD.size
+        _, x, y, health, flags = RECORD.unpack_from(self.records, offset)
+        record = binary_protocol.state_to_record(player_id, state)
+        _, new_x, new_y, new_health, new_flags = record
+        changed = False
+        if new_x != x or new_y != y:
+            self.field_seq['position'][slot] = seq
+            changed = True
+        if new_health != health:
+            self.field_seq['health'][slot] = seq
+            changed = True
+        if new_flags != flags:
+            for field, bit in _FLAG_FIELDS:
+                if (new_flags ^ flags) & bit:
+                    self.field_seq[field][slot] = seq
+            changed = True
+        if changed:
+            RECORD.pack_into(self.records, offset, *record)
+        return changed
+
+    def state(self, player_id):
+        slot = self.slots.get(player_id)
+        if slot is None:
+            return None
+        _, x, y, health, flags = RECORD.unpack_from(self.records, slot * RECORD.size)
+        return binary_protocol.record_to_state(x, y, health, flags)
+
+    def position(self, player_id):
+        """(x, y) dari record, tanpa membuat state dict"""
+        _, x, y, _, _ = RECORD.unpack_from(self.records, self.slots[player_id] * RECORD.size)
+        return x, y
+
+    def states(self):
+        """{player_id: state} semua pemain, dict dibuat dari record"""
+        return {player_id: binary_protocol.record_to_state(x, y, health, flags)
+                for player_id, x, y, health, flags in RECORD.iter_unpack(self.records)}
+
+    def record_bytes(self, player_id):
+        slot = self.slots[player_id]
+        return self.records[slot * RECORD.size:(slot + 1) * RECORD.size]
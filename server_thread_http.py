@@ -4,7 +4,11 @@ import threading
 import time
 import sys
 import logging
+import argparse
+import struct
 import http as game_http
+import binary_protocol
+import websocket_protocol
 
 httpserver = game_http.HttpServer()
 
@@ -16,51 +20,158 @@ class ProcessTheClient(threading.Thread):
 		threading.Thread.__init__(self)
 
 	def run(self):
-		rcv=""
-		while True:
-			try:
+		parser = game_http.RequestParser()
+		keep_alive = True
+		try:
+			while keep_alive:
+				if parser.recv_into(self.connection) == 0:
+					break
+
+				#proses semua request yang sudah lengkap di buffer secara berurutan (pipelining),
+				#semua balasannya dikirim sekaligus dengan satu sendall
+				balasan = []
+				while True:
+					try:
+						request = parser.next_request()
+					except ValueError as e:
+						#header terlalu besar atau Content-Length rusak, sisa buffer tidak bisa
+						#diparse lagi: balasan sebelumnya tetap dikirim, lalu 400 dan tutup
+						logging.warning("request rusak dari {}: {}" . format(self.address, e))
+						balasan.append(httpserver.bad_request(str(e)))
+						keep_alive = False
+						break
+					if request is None:
+						break
+					baris, headers, body = request
+
+					logging.warning("data dari client: {} {}" . format(baris, body))
+					hasil = httpserver.proses_request(baris, headers, body)
+					if not isinstance(hasil, bytes):
+						#response streaming (GET /subscribe), kirim setiap event sampai client menutup koneksi
+						game_http.send_parts(self.connection, balasan)
+						self.serve_stream(hasil)
+						return
+					if hasil.startswith(b"HTTP/1.1 101"):
+						#client meminta upgrade ke WebSocket atau protokol biner,
+						#sisa buffer sudah milik protokol baru, room dari ?room= di request upgrade
+						game_http.send_parts(self.connection, balasan + [hasil])
+						room_id = game_http.request_room(baris)
+						if b"Sec-WebSocket-Accept" in hasil:
+							self.serve_websocket(parser.remaining(), room_id)
+						else:
+							self.serve_binary(parser.remaining(), room_id)
+						return
+					logging.warning("balas ke  client: {}" . format(hasil))
+					balasan.append(hasil)
+					if not game_http.is_keep_alive(hasil):
+						keep_alive = False
+						break
+
+				if balasan:
+					game_http.send_parts(self.connection, balasan)
+		except (OSError, ValueError) as e:
+			logging.warning("koneksi {} ditutup: {}" . format(self.address, e))
+		finally:
+			self.connection.close()
+
+	def serve_stream(self, events):
+		try:
+			for event in events:
+				self.connection.sendall(event)
+		except OSError as e:
+			logging.warning("subscriber terputus: {}" . format(e))
+		finally:
+			events.close()
+
+	def serve_websocket(self, initial=b"", room_id=game_http.DEFAULT_ROOM):
+		#setelah handshake, koneksi berisi frame WebSocket dua arah
+		buffer = bytearray(initial)
+		fragments = []
+		fragment_opcode = None
+		send_lock = threading.Lock()
+
+		def send(payload, opcode):
+			with send_lock:
+				self.connection.sendall(websocket_protocol.encode_frame(payload, opcode))
+
+		try:
+			while True:
+				frame = websocket_protocol.read_frame(buffer)
+				while frame is not None:
+					fin, opcode, payload = frame
+					frame = websocket_protocol.read_frame(buffer)
+
+					if opcode == websocket_protocol.OP_CLOSE:
+						send(payload[:2], websocket_protocol.OP_CLOSE)
+						return
+					if opcode == websocket_protocol.OP_PING:
+						send(payload, websocket_protocol.OP_PONG)
+						continue
+					if opcode == websocket_protocol.OP_PONG:
+						continue
+
+					#message yang terpecah menjadi beberapa frame digabung dulu
+					if opcode != websocket_protocol.OP_CONTINUATION:
+						fragment_opcode = opcode
+					fragments.append(payload)
+					if not fin:
+						continue
+					payload = b"".join(fragments)
+					fragments = []
+
+					if fragment_opcode == websocket_protocol.OP_BINARY:
+						balasan = httpserver.proses_binary(payload, room_id)
+						if balasan is not None:
+							send(balasan, websocket_protocol.OP_BINARY)
+					elif fragment_opcode == websocket_protocol.OP_TEXT:
+						balasan = httpserver.proses_websocket_text(payload.decode(), room_id)
+						if isinstance(balasan, str):
+							send(balasan, websocket_protocol.OP_TEXT)
+						elif balasan is not None:
+							#op subscribe, delta didorong dari thread terpisah
+							threading.Thread(target=self.push_websocket, args=(balasan, send), daemon=True).start()
 				data = self.connection.recv(1024)
-				if data:
-					#merubah input dari socket (berupa bytes) ke dalam string
-					#agar bisa mendeteksi \r\n
-					d = data.decode()
-					rcv=rcv+d
-
-					if '\r\n\r\n' in rcv:
-						lines = rcv.split('\r\n')
-						request_line = lines[0]
-						method = request_line.split()[0].upper()
-
-						if method == 'POST':
-							# Ambil Content-Length header
-							content_length = 0
-							for line in lines:
-								if line.lower().startswith('content-length:'):
-									content_length = int(line.split(':')[1].strip())
-									break
-
-							header_end = rcv.find('\r\n\r\n') + 4
-							body_received = len(rcv) - header_end
-
-							if body_received < content_length:
-								continue
-
-						#end of command, proses string
-						logging.warning("data dari client: {}" . format(rcv))
-						hasil = httpserver.proses(rcv)
-						#hasil akan berupa bytes
-						#untuk bisa ditambahi dengan string, maka string harus di encode
-						hasil=hasil+"\r\n\r\n".encode()
-						logging.warning("balas ke  client: {}" . format(hasil))
-						#hasil sudah dalam bentuk bytes
-						self.connection.sendall(hasil)
-						rcv=""
-						# self.connection.close()
+				if not data:
+					return
+				buffer += data
+		except (OSError, UnicodeDecodeError, websocket_protocol.ProtocolError) as e:
+			logging.warning("koneksi websocket terputus: {}" . format(e))
+
+	def push_websocket(self, updates, send):
+		try:
+			for text in updates:
+				if text is None:
+					send(b"", websocket_protocol.OP_PING)
 				else:
-					break
-			except OSError as e:
-				pass
-		self.connection.close()
+					send(text, websocket_protocol.OP_TEXT)
+		except OSError:
+			pass
+		finally:
+			updates.close()
+
+	def serve_binary(self, initial=b"", room_id=game_http.DEFAULT_ROOM):
+		#setelah upgrade, koneksi berisi message length-prefixed dari binary_protocol
+		buffer = bytearray(initial)
+		try:
+			while True:
+				payload = binary_protocol.read_frame(buffer)
+				while payload is not None:
+					try:
+						balasan = httpserver.proses_binary(payload, room_id)
+						balasan = None if balasan is None else binary_protocol.frame(balasan)
+					except (struct.error, ValueError) as e:
+						#balasan tidak bisa di-encode, client tetap dibalas supaya tidak menunggu
+						logging.warning("balasan biner gagal di-encode: {}" . format(e))
+						balasan = binary_protocol.frame(binary_protocol.encode_ack(False))
+					if balasan is not None:
+						self.connection.sendall(balasan)
+					payload = binary_protocol.read_frame(buffer)
+				data = self.connection.recv(1024)
+				if not data:
+					return
+				buffer += data
+		except (OSError, ValueError) as e:
+			logging.warning("koneksi biner terputus: {}" . format(e))
 
 
 
@@ -84,11 +195,46 @@ class Server(threading.Thread):
 
 
 
+class UdpServer(threading.Thread):
+	#channel UDP untuk update pergerakan, join/leave tetap lewat TCP
+	def __init__(self):
+		self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		threading.Thread.__init__(self, daemon=True)
+
+	def run(self):
+		self.my_socket.bind(('0.0.0.0', 8885))
+		while True:
+			try:
+				data, address = self.my_socket.recvfrom(binary_protocol.MAX_DATAGRAM)
+				balasan = httpserver.proses_datagram(data)
+				if balasan is not None:
+					self.my_socket.sendto(balasan, address)
+			except OSError as e:
+				logging.warning("udp error: {}" . format(e))
+
+
+
 def main():
+	parser = argparse.ArgumentParser(description='Knight Game Server')
+	parser.add_argument('--tick-rate', type=int, default=0,
+					   help='Jalankan simulasi server-authoritative dengan tick tetap, misal 20/30/60 Hz (default: 0, client authoritative)')
+	parser.add_argument('--aoi-radius', type=int, default=0,
+					   help='Kirim ke setiap pemain hanya pemain lain dalam radius ini (pixel) ditambah far field kasar (default: 0, semua pemain)')
+	args = parser.parse_args()
+
 	logging.basicConfig(level=logging.WARNING)
 	print("Server Starting...")
+	if args.tick_rate > 0:
+		httpserver.start_simulation(args.tick_rate)
+		print(f"Simulation running at {args.tick_rate} Hz")
+	if args.aoi_radius > 0:
+		httpserver.configure_aoi(args.aoi_radius)
+		print(f"Area of interest radius {args.aoi_radius}")
 	svr = Server()
 	svr.start()
+	udp = UdpServer()
+	udp.start()
 	try:
 		svr.join()
 	except KeyboardInterrupt:
@@ -0,0 +1,85 @@
+import threading
+import time
+import logging
+
+import arena
+
+class Simulation(threading.Thread):
+    """
+    Loop simulasi server-authoritative dengan tick tetap.
+    Client hanya mengirim input, setiap tick server menggerakkan semua pemain,
+    menyelesaikan tabrakan dengan wall di arena.py lalu menerbitkan hasilnya
+    ke PlayerStateStore sebagai satu seq.
+    """
+    def __init__(self, store, tick_rate=30):
+        threading.Thread.__init__(self, daemon=True)
+        self.store = store
+        self.tick_rate = tick_rate
+        self.inputs = {}  # {player_id: input terakhir dari client}
+        self.lock = threading.Lock()
+        self.running = True
+
+    def set_input(self, player_id, player_input):
+        """
+        player_input: {'move': [dx, dy], 'facing_right', 'is_attacking', 'health', 'is_hit'}
+        dengan dx, dy bernilai -1, 0 atau 1
+        """
+        with self.lock:
+            self.inputs[player_id] = player_input
+
+    def run(self):
+        interval = 1.0 / self.tick_rate
+        next_tick = time.monotonic()
+        while self.running:
+            try:
+                self.step(interval)
+            except Exception as e:
+                logging.error(f"Simulation tick error: {e}")
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Tertinggal lebih dari satu tick, jangan kejar tick yang terlewat
+                next_tick = time.monotonic()
+
+    def stop(self):
+        self.running = False
+
+    def step(self, dt):
+        _, states = self.store.snapshot()
+        with self.lock:
+            # Buang input pemain yang sudah keluar
+            for player_id in [p for p in self.inputs if p not in states]:
+                del self.inputs[player_id]
+            inputs = dict(self.inputs)
+
+        updates = {}
+        for player_id, player_input in inputs.items():
+            updates[player_id] = self.simulate_player(states[player_id], player_input, dt)
+        if updates:
+            self.store.apply_tick(updates)
+
+    def simulate_player(self, state, player_input, dt):
+        x, y = state['position']
+        health = player_input.get('health', state['health'])
+        is_hit = player_input.get('is_hit', False)
+
+        if health > 0 and state['health'] <= 0:
+            # Respawn: pemain hidup lagi setelah health habis
+            x, y = arena.SPAWN_POSITION
+
+        vx = vy = 0
+        if not is_hit and health > 0:
+            dx, dy = player_input.get('move', (0, 0))
+            vx = max(-1, min(1, dx)) * arena.PLAYER_SPEED
+            vy = max(-1, min(1, dy)) * arena.PLAYER_SPEED
+        x, y = arena.move_player(x, y, vx, vy, dt)
+
+        return {
+            'position': [x, y],
+            'health': health,
+            'facing_right': player_input.get('facing_right', state['facing_right']),
+            'is_attacking': player_input.get('is_attacking', False),
+            'is_hit': is_hit
+        }
@@ -0,0 +1,77 @@
+"""
+Test area of interest: SpatialGrid dan delta per viewer di PlayerStateStore.
+
+    python -m unittest test_aoi
+"""
+
+import unittest
+
+import http as game_http
+from aoi import SpatialGrid, FAR_SCALE
+
+
+class SpatialGridTest(unittest.TestCase):
+    def test_query_splits_near_and_far(self):
+        grid = SpatialGrid(cell_size=100)
+        grid.move(1, 50, 50)
+        grid.move(2, 120, 50)
+        grid.move(3, 5000, 5000)
+        near, far = grid.query(50, 50, 100)
+        self.assertEqual(near, {1, 2})
+        size = 100 * FAR_SCALE
+        self.assertEqual(far, [[6 * size + size // 2, 6 * size + size // 2, 1]])
+
+    def test_radius_is_euclidean(self):
+        grid = SpatialGrid(cell_size=100)
+        grid.move(1, 0, 0)
+        grid.move(2, 90, 90)  # di cell yang bersinggungan, tapi jaraknya ~127
+        near, far = grid.query(0, 0, 100)
+        self.assertEqual(near, {1})
+        self.assertEqual(sum(count for _, _, count in far), 1)
+
+    def test_move_and_remove_update_cells(self):
+        grid = SpatialGrid(cell_size=100)
+        grid.move(1, 10, 10)
+        grid.move(1, 950, 950)
+        self.assertEqual(grid.query(10, 10, 50)[0], set())
+        self.assertEqual(grid.query(950, 950, 50)[0], {1})
+        grid.remove(1)
+        self.assertEqual(len(grid), 0)
+        self.assertEqual((grid.cells, grid.regions), ({}, {}))
+
+
+class VisibleDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.store = game_http.PlayerStateStore(aoi_radius=100)
+        self.store.join(1, {'position': [0, 0]})
+        self.store.join(2, {'position': [50, 0]})
+        self.store.join(3, {'position': [1000, 1000]})
+
+    def test_full_snapshot_only_contains_near_players(self):
+        delta = self.store.delta(None, viewer=1)
+        self.assertTrue(delta['full'])
+        self.assertEqual(sorted(delta['changed']), [1, 2])
+        self.assertEqual(sum(count for _, _, count in delta['far']), 1)
+
+    def test_players_entering_and_leaving_radius(self):
+        seq = self.store.delta(None, viewer=1)['seq']
+        self.store.set_state(3, {'position': [60, 10]})
+        self.store.set_state(2, {'position': [800, 800]})
+        delta = self.store.delta(seq, viewer=1)
+        self.assertFalse(delta['full'])
+        self.assertEqual(delta['joined'], [3])
+        self.assertEqual(delta['changed'][3]['position'], [60, 10])
+        self.assertEqual(delta['left'], [2])
+
+    def test_far_movement_is_not_sent(self):
+        seq = self.store.delta(None, viewer=1)['seq']
+        self.store.set_state(3, {'position': [1100, 1000]})
+        delta = self.store.delta(seq, viewer=1)
+        self.assertEqual((delta['joined'], delta['left'], delta['changed']), ([], [], {}))
+
+    def test_without_viewer_delta_is_unfiltered(self):
+        self.assertEqual(sorted(self.store.delta(None)['changed']), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
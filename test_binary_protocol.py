@@ -0,0 +1,85 @@
+"""
+Test protokol biner untuk full snapshot yang melewati 65535 byte.
+
+    python -m unittest test_binary_protocol
+"""
+
+import socket
+import threading
+import unittest
+
+import binary_protocol
+import http as game_http
+import server_thread_http
+
+PLAYERS = 10000  # 7 byte per pemain, full snapshot sekitar 70 KB
+ROOM = 'test-binary-large'
+
+
+def join_players(count):
+    for player_id in range(1, count + 1):
+        state = {'position': [player_id % 800, player_id % 600], 'health': 100}
+        game_http.rooms.ensure(player_id, ROOM, state)
+
+
+def leave_players(count):
+    for player_id in range(1, count + 1):
+        game_http.rooms.leave(player_id)
+
+
+class LargeSnapshotTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        join_players(PLAYERS)
+
+    @classmethod
+    def tearDownClass(cls):
+        leave_players(PLAYERS)
+
+    def test_frame_round_trip(self):
+        snapshot = game_http.rooms.get(ROOM).states.binary_delta(None)
+        self.assertGreater(len(snapshot), 0xFFFF)
+        buffer = bytearray(binary_protocol.frame(snapshot))
+        self.assertEqual(binary_protocol.read_frame(buffer), snapshot)
+        self.assertEqual(buffer, bytearray())
+
+    def test_read_frame_rejects_oversized_length(self):
+        buffer = bytearray(binary_protocol.LENGTH.pack(binary_protocol.MAX_PAYLOAD + 1))
+        with self.assertRaises(ValueError):
+            binary_protocol.read_frame(buffer)
+
+    def test_serve_binary_sends_full_snapshot(self):
+        server_side, client_side = socket.socketpair()
+        client_side.settimeout(5.0)
+        handler = server_thread_http.ProcessTheClient(server_side, ('test', 0))
+        thread = threading.Thread(target=handler.serve_binary, args=(b'', ROOM), daemon=True)
+        thread.start()
+        try:
+            client_side.sendall(binary_protocol.frame(binary_protocol.encode_delta_request(None)))
+            buffer = bytearray()
+            payload = None
+            while payload is None:
+                data = client_side.recv(65536)
+                self.assertTrue(data, 'koneksi ditutup sebelum snapshot lengkap')
+                buffer += data
+                payload = binary_protocol.read_frame(buffer)
+            delta = binary_protocol.decode_delta(payload)
+            self.assertTrue(delta['full'])
+            self.assertEqual(len(delta['changed']), PLAYERS)
+        finally:
+            client_side.close()
+            thread.join(5.0)
+            server_side.close()
+        self.assertFalse(thread.is_alive())
+
+    def test_udp_reply_fits_one_datagram(self):
+        packet = binary_protocol.encode_udp_state(1, None, 1, {'position': [1, 1], 'health': 100})
+        reply = server_thread_http.httpserver.proses_datagram(packet)
+        self.assertLessEqual(len(reply), binary_protocol.MAX_DATAGRAM)
+        delta = binary_protocol.decode_delta(reply)
+        self.assertTrue(delta['resync'])
+        self.assertFalse(delta['full'])
+
+
+if __name__ == '__main__':
+    unittest.main()
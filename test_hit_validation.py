@@ -0,0 +1,131 @@
+"""
+Test validasi hit di server (HitValidator dengan rewind) dan penerapan hit
+event di client (ClientInterface.take_hits, Player.check_if_hit).
+
+    python -m unittest test_hit_validation
+"""
+
+import unittest
+
+import http as game_http
+from clientInterface import ClientInterface
+from hit_validation import HitValidator
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+ATTACKER, TARGET = 1, 2
+# pedang penyerang di (100, 100) menghadap kanan mengenai pemain di (150, 110)
+IN_REACH = (150, 110)
+OUT_OF_REACH = (400, 400)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class HitValidatorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.validator = HitValidator(clock=self.clock)
+
+    def at(self, when):
+        self.clock.now = when
+
+    def attack(self):
+        return self.validator.record(ATTACKER, 100, 100, True, True)
+
+    def test_hit_uses_position_seen_by_attacker(self):
+        self.validator.record(TARGET, *IN_REACH, True, False)
+        self.validator.acknowledge(ATTACKER, None, 5)
+        self.at(0.1)
+        self.validator.record(TARGET, *OUT_OF_REACH, True, False)
+        self.at(0.15)
+        # penyerang baru menerapkan seq 5, yang dikirim saat target masih dalam jangkauan
+        self.validator.acknowledge(ATTACKER, 5, 6)
+        self.assertEqual(self.attack(), [TARGET])
+
+    def test_without_rewind_current_position_is_used(self):
+        self.validator.record(TARGET, *IN_REACH, True, False)
+        self.at(0.1)
+        self.validator.record(TARGET, *OUT_OF_REACH, True, False)
+        self.at(0.15)
+        self.assertEqual(self.attack(), [])
+
+    def test_rewind_is_limited(self):
+        self.validator.record(TARGET, *IN_REACH, True, False)
+        self.validator.acknowledge(ATTACKER, None, 5)
+        self.at(0.1)
+        self.validator.record(TARGET, *OUT_OF_REACH, True, False)
+        self.at(1.0)
+        self.validator.acknowledge(ATTACKER, 5, 6)
+        self.assertEqual(self.attack(), [])
+
+    def test_one_hit_per_swing_and_cooldown(self):
+        self.validator.record(TARGET, *IN_REACH, True, False)
+        self.assertEqual(self.attack(), [TARGET])
+        self.at(0.05)
+        self.assertEqual(self.attack(), [])
+        self.validator.record(ATTACKER, 100, 100, True, False)
+        self.at(0.1)
+        self.assertEqual(self.attack(), [], 'target masih dalam cooldown')
+        self.validator.record(ATTACKER, 100, 100, True, False)
+        self.at(0.3)
+        self.assertEqual(self.attack(), [TARGET])
+
+    def test_removed_player_cannot_be_hit(self):
+        self.validator.record(TARGET, *IN_REACH, True, False)
+        self.validator.remove(TARGET)
+        self.assertEqual(self.attack(), [])
+
+
+class HitEventTest(unittest.TestCase):
+    def setUp(self):
+        self.store = game_http.PlayerStateStore()
+        self.store.join(TARGET, {'position': list(IN_REACH)})
+        self.store.join(ATTACKER, {'position': [100, 100]})
+        self.client = ClientInterface()
+
+    def test_hit_event_reaches_target_once(self):
+        delta = self.store.delta(None)
+        self.client.apply_world_delta(delta)
+        self.store.set_state(ATTACKER, {'position': [100, 100], 'is_attacking': True})
+        delta = self.store.delta(delta['seq'])
+        self.assertEqual([hit[1:] for hit in delta['hits']], [[ATTACKER, TARGET]])
+        self.client.apply_world_delta(delta)
+        self.assertEqual(self.client.take_hits(TARGET), [ATTACKER])
+        # delta yang sama datang lagi lewat channel lain (UDP dan /subscribe)
+        self.client.apply_world_delta(delta)
+        self.client.apply_world_delta(dict(delta, full=True))
+        self.assertEqual(self.client.take_hits(TARGET), [])
+
+    def test_take_hits_returns_attackers(self):
+        self.client.apply_world_delta({'seq': 3, 'hits': [[2, ATTACKER, TARGET], [3, 5, TARGET], [3, TARGET, 5]]})
+        self.assertEqual(self.client.take_hits(TARGET), [ATTACKER, 5])
+        self.assertEqual(self.client.take_hits(TARGET), [])
+
+    @unittest.skipIf(pygame is None, 'pygame tidak terpasang')
+    def test_check_if_hit_applies_server_hits(self):
+        import player
+        target = player.Player.__new__(player.Player)
+        target.id = TARGET
+        target.client_interface = self.client
+        target.health = 6
+        target.is_hit = False
+        target.hit_timer = 0
+        self.client.apply_world_delta({'seq': 1, 'hits': [[1, ATTACKER, TARGET]]})
+        target.check_if_hit([])
+        self.assertEqual(target.health, 5)
+        self.assertTrue(target.is_hit)
+        target.check_if_hit([])
+        self.assertEqual(target.health, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
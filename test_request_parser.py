@@ -0,0 +1,132 @@
+"""
+Test RequestParser dan pipelining HTTP/1.1 di ProcessTheClient.
+
+    python -m unittest test_request_parser
+"""
+
+import json
+import socket
+import unittest
+
+import http as game_http
+import server_thread_http
+
+ROOM = 'test-request-parser'
+
+
+def request(method, path, body=None):
+    if body is None:
+        return f"{method} {path} HTTP/1.1\r\nHost: test\r\n\r\n".encode()
+    body = json.dumps(body).encode()
+    return f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+
+def read_responses(sock):
+    """Semua response sampai server menutup koneksi, [(status, headers, body)]"""
+    data = b''
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    responses = []
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(':')
+            headers[key] = value.strip()
+        length = int(headers.get('Content-Length', 0))
+        responses.append((int(lines[0].split(' ')[1]), headers, data[:length]))
+        data = data[length:]
+    return responses
+
+
+class RequestParserTest(unittest.TestCase):
+    def test_pipelined_requests_in_one_feed(self):
+        parser = game_http.RequestParser()
+        parser.feed(request('GET', '/a') + request('POST', '/b', {'x': 1}) + b"GET /c HT")
+        self.assertEqual(parser.next_request()[0], 'GET /a HTTP/1.1')
+        baris, headers, body = parser.next_request()
+        self.assertEqual(baris, 'POST /b HTTP/1.1')
+        self.assertEqual(json.loads(body), {'x': 1})
+        self.assertIsNone(parser.next_request())
+        parser.feed(b"TP/1.1\r\n\r\n")
+        self.assertEqual(parser.next_request()[0], 'GET /c HTTP/1.1')
+        self.assertIsNone(parser.next_request())
+
+    def test_body_split_across_feeds(self):
+        parser = game_http.RequestParser(size=16)
+        data = request('POST', '/set_player_state', {'id': 1, 'state': {'health': 3}})
+        for i in range(0, len(data), 7):
+            self.assertIsNone(parser.next_request())
+            parser.feed(data[i:i + 7])
+        self.assertEqual(json.loads(parser.next_request()[2]), {'id': 1, 'state': {'health': 3}})
+
+    def test_invalid_content_length(self):
+        parser = game_http.RequestParser(max_body=10)
+        parser.feed(b"POST /a HTTP/1.1\r\nContent-Length: 11\r\n\r\n")
+        with self.assertRaises(ValueError):
+            parser.next_request()
+        parser = game_http.RequestParser()
+        parser.feed(b"POST /a HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+        with self.assertRaises(ValueError):
+            parser.next_request()
+
+    def test_header_too_large(self):
+        parser = game_http.RequestParser(max_header=64)
+        parser.feed(b"GET /a HTTP/1.1\r\nX-Padding: " + b"a" * 100)
+        with self.assertRaises(ValueError):
+            parser.next_request()
+
+
+class PipeliningTest(unittest.TestCase):
+    def exchange(self, data):
+        server_side, client_side = socket.socketpair()
+        client_side.settimeout(5.0)
+        handler = server_thread_http.ProcessTheClient(server_side, ('test', 0))
+        handler.daemon = True
+        handler.start()
+        try:
+            client_side.sendall(data)
+            client_side.shutdown(socket.SHUT_WR)
+            return read_responses(client_side)
+        finally:
+            client_side.close()
+            handler.join(5.0)
+
+    def tearDown(self):
+        for player_id in (901, 902):
+            game_http.rooms.leave(player_id)
+
+    def test_responses_in_request_order(self):
+        responses = self.exchange(
+            request('POST', '/set_player_state', {'id': 901, 'room': ROOM, 'state': {'health': 4}})
+            + request('GET', f'/get_player_state?room={ROOM}&id=901')
+            + request('GET', f'/get_player_ids?room={ROOM}'))
+        self.assertEqual([r[0] for r in responses], [200, 200, 200])
+        self.assertEqual(json.loads(responses[1][2])['health'], 4)
+        self.assertEqual(json.loads(responses[2][2])['players'], [901])
+
+    def test_bad_body_keeps_connection(self):
+        responses = self.exchange(
+            request('POST', '/set_player_state', ['not', 'an', 'object'])
+            + request('POST', '/set_player_state', {'id': 902, 'room': ROOM, 'state': {'position': 'x'}})
+            + request('GET', '/get_player_ids'))
+        self.assertEqual([r[0] for r in responses], [400, 400, 200])
+        # state rusak tidak meninggalkan pemain (maupun room kosong)
+        self.assertIsNone(game_http.rooms.room_of(902))
+        self.assertIsNone(game_http.rooms.get(ROOM))
+
+    def test_bad_framing_answers_400_and_closes(self):
+        responses = self.exchange(
+            request('GET', '/')
+            + b"POST /set_player_state HTTP/1.1\r\nContent-Length: -1\r\n\r\n"
+            + request('GET', '/'))
+        self.assertEqual([r[0] for r in responses], [200, 400])
+        self.assertEqual(responses[1][1]['Connection'], 'close')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Test RoomRegistry: room dibuat saat pemain pertama join dan dihapus saat
+pemain terakhir keluar, state setiap room terpisah.
+
+    python -m unittest test_rooms
+"""
+
+import unittest
+
+import http as game_http
+
+
+class RoomRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.rooms = game_http.RoomRegistry()
+
+    def tearDown(self):
+        for player_id in list(self.rooms.player_rooms):
+            self.rooms.leave(player_id)
+
+    def test_room_created_on_join_and_retired_on_last_leave(self):
+        self.assertIsNone(self.rooms.get('red'))
+        room = self.rooms.join('red', 1)
+        self.assertIs(self.rooms.get('red'), room)
+        self.rooms.join('red', 2)
+        self.assertTrue(self.rooms.leave(1))
+        self.assertIs(self.rooms.get('red'), room)
+        self.assertTrue(self.rooms.leave(2))
+        self.assertIsNone(self.rooms.get('red'))
+        self.assertFalse(self.rooms.leave(2))
+
+    def test_default_room_is_kept(self):
+        self.rooms.join(game_http.DEFAULT_ROOM, 1)
+        self.rooms.leave(1)
+        self.assertIsNotNone(self.rooms.get(game_http.DEFAULT_ROOM))
+
+    def test_player_id_unique_across_rooms(self):
+        self.assertIsNotNone(self.rooms.join('red', 1))
+        self.assertIsNone(self.rooms.join('blue', 1))
+        self.assertIsNone(self.rooms.get('blue'))
+        # ensure tidak memindahkan pemain yang sudah ada di room lain
+        self.assertIs(self.rooms.ensure(1, 'blue'), self.rooms.get('red'))
+
+    def test_state_is_partitioned(self):
+        red = self.rooms.join('red', 1, {'position': [10, 20]})
+        blue = self.rooms.join('blue', 2, {'position': [30, 40]})
+        self.assertEqual(red.states.ids(), [1])
+        self.assertEqual(blue.states.ids(), [2])
+        self.assertEqual(red.states.get(1)['position'], [10, 20])
+        self.assertIsNone(red.states.get(2))
+
+    def test_invalid_player_id_creates_no_room(self):
+        self.assertIsNone(self.rooms.join('red', 0))
+        self.assertIsNone(self.rooms.get('red'))
+
+
+if __name__ == '__main__':
+    unittest.main()
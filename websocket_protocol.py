@@ -0,0 +1,108 @@
+"""
+Handshake dan framing WebSocket (RFC 6455) untuk HttpServer dan ClientInterface.
+
+Setelah handshake, frame binary membawa message dari binary_protocol (tanpa
+prefix panjang karena frame WebSocket sudah punya panjang), frame text membawa
+perintah JSON, misalnya dari tool spectator di browser.
+"""
+
+import base64
+import hashlib
+import os
+import struct
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Batas payload satu frame, frame yang lebih besar dianggap error protokol
+MAX_PAYLOAD = 1 << 20
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def accept_key(key):
+    """Nilai Sec-WebSocket-Accept untuk Sec-WebSocket-Key dari client"""
+    digest = hashlib.sha1((key.strip() + GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+def new_key():
+    return base64.b64encode(os.urandom(16)).decode()
+
+
+def _mask(payload, mask_key):
+    # XOR per 4 byte lewat int besar, jauh lebih cepat daripada loop per byte
+    length = len(payload)
+    if not length:
+        return b''
+    repeated = (mask_key * (length // 4 + 1))[:length]
+    masked = int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')
+    return masked.to_bytes(length, 'big')
+
+
+def encode_frame(payload, opcode=OP_BINARY, mask=False):
+    """
+    Satu frame FIN. Server mengirim tanpa mask, client wajib memakai mask.
+    Overhead header 2 byte untuk payload < 126 byte (+4 byte mask dari client).
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+    elif length < (1 << 16):
+        header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+    if mask:
+        mask_key = os.urandom(4)
+        return header + mask_key + _mask(payload, mask_key)
+    return header + payload
+
+
+def read_frame(buffer):
+    """
+    Ambil satu frame dari awal buffer (bytearray).
+    Return (fin, opcode, payload) dan menghapusnya dari buffer, atau None jika belum lengkap.
+    """
+    if len(buffer) < 2:
+        return None
+    first, second = buffer[0], buffer[1]
+    fin = bool(first & 0x80)
+    opcode = first & 0x0F
+    masked = bool(second & 0x80)
+    length = second & 0x7F
+    offset = 2
+    if length == 126:
+        if len(buffer) < 4:
+            return None
+        (length,) = struct.unpack_from('!H', buffer, 2)
+        offset = 4
+    elif length == 127:
+        if len(buffer) < 10:
+            return None
+        (length,) = struct.unpack_from('!Q', buffer, 2)
+        offset = 10
+    if length > MAX_PAYLOAD:
+        raise ProtocolError('frame terlalu besar')
+    mask_key = b''
+    if masked:
+        mask_key = bytes(buffer[offset:offset + 4])
+        offset += 4
+    end = offset + length
+    if len(buffer) < end:
+        return None
+    payload = bytes(buffer[offset:end])
+    del buffer[:end]
+    if masked:
+        payload = _mask(payload, mask_key)
+    return fin, opcode, payload